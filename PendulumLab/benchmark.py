@@ -0,0 +1,225 @@
+"""
+File name: benchmark.py
+Author: Troy Chin (CWID: 885586685)
+Date: 2026-10-18
+Version: 1.0
+Status: Ready to deliver to customers
+Description: This script benchmarks the solvers, ensemble, logger and renderer and flags regressions against a baseline.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import numpy as np
+from pendulum import DoublePendulum
+from numerical_methods import NumericalMethods, DormandPrince
+from ensemble import PendulumEnsemble
+from data_logger import DataLogger, StreamingDataLogger
+from fast_rhs import benchmark_rhs
+
+METHODS = ('euler', 'runge_kutta', 'adaptive_runge_kutta', 'midpoint', 'implicit_midpoint', 'stormer_verlet', 'yoshida')
+# These methods are integrated in canonical coordinates [angle1, angle2, p1, p2] with Hamilton's equations
+SYMPLECTIC = ('implicit_midpoint', 'stormer_verlet', 'yoshida')
+
+def best_time(function, repeats=3):
+    """Run function repeats times and return the fastest wall time in seconds."""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def _metric(value, unit, higher_is_better=True):
+    return {'value': float(value), 'unit': unit, 'higher_is_better': higher_is_better}
+
+def _problem(pendulum, method):
+    """Get the right-hand side and initial state a method is run on."""
+    if method in SYMPLECTIC:
+        return pendulum.hamiltonian_equations, np.asarray(pendulum.to_canonical(pendulum.compute_state()))
+    return pendulum.equations_of_motion, np.asarray(pendulum.compute_state(), dtype=float)
+
+def bench_rhs(pendulum, n_evals=20000, repeats=3):
+    """Right-hand side evaluations per second of equations_of_motion and each fast backend."""
+    return {f"rhs/{name}": _metric(rate, 'evals/s')
+            for name, rate in benchmark_rhs(pendulum, n_evals, repeats).items()}
+
+def bench_methods(pendulum, dt=0.01, n_steps=200, repeats=3):
+    """Steps per second of every solve_ode method, called one step at a time as main.py used to."""
+    methods = NumericalMethods(dt=dt)
+    results = {}
+    for method in METHODS:
+        func, y0 = _problem(pendulum, method)
+
+        def run():
+            y = list(y0)
+            for _ in range(n_steps):
+                y = methods.solve_ode(func, y, method=method)
+
+        results[f"solve_ode/{method}"] = _metric(n_steps / best_time(run, repeats), 'steps/s')
+    return results
+
+def bench_ensemble(sizes=(1, 10, 100, 1000, 10000), dt=0.01, n_steps=20, repeats=3):
+    """Member-steps per second of a batched Runge-Kutta ensemble for each ensemble size N."""
+    results = {}
+    for n in sizes:
+        ensemble = PendulumEnsemble(1.0, 1.0, 1.0, 1.0, np.linspace(0.1, 3.0, n), 0.5, 0.0, 0.0)
+        state = ensemble.compute_state()
+
+        def run():
+            y = state
+            for _ in range(n_steps):
+                y = ensemble.runge_kutta(y, dt)
+
+        results[f"ensemble/N={n}"] = _metric(n * n_steps / best_time(run, repeats), 'member-steps/s')
+    return results
+
+def bench_logger(n_states=100000, chunk_size=16384, repeats=3):
+    """States written per second by DataLogger and StreamingDataLogger (one state per call and in blocks)."""
+    states = np.random.default_rng(0).standard_normal((n_states, 4))
+    results = {}
+
+    def in_memory():
+        logger = DataLogger()
+        for state in states:
+            logger.log_state(state)
+
+    results['logger/DataLogger.log_state'] = _metric(n_states / best_time(in_memory, repeats), 'states/s')
+
+    with tempfile.TemporaryDirectory() as directory:
+        def streaming_single():
+            with StreamingDataLogger(directory, chunk_size=chunk_size, overwrite=True) as logger:
+                for state in states:
+                    logger.log_state(state)
+
+        def streaming_block():
+            with StreamingDataLogger(directory, chunk_size=chunk_size, overwrite=True) as logger:
+                logger.log_states(states)
+
+        results['logger/StreamingDataLogger.log_state'] = _metric(n_states / best_time(streaming_single, repeats),
+                                                                  'states/s')
+        results['logger/StreamingDataLogger.log_states'] = _metric(n_states / best_time(streaming_block, repeats),
+                                                                   'states/s')
+    return results
+
+def bench_animation(n_frames=100, repeats=3):
+    """Milliseconds to draw one animation frame with the blitting Agg renderer."""
+    from render import FrameRenderer
+    from visualization import compute_positions
+    states = np.zeros((n_frames, 4))
+    states[:, 0] = np.linspace(0, 2 * np.pi, n_frames)
+    states[:, 1] = np.linspace(0, -4 * np.pi, n_frames)
+    positions = compute_positions(states, 1.0, 1.0)
+    renderer = FrameRenderer(limit=2.1)
+
+    def run():
+        for position in positions:
+            renderer.render(position)
+
+    return {'animation/frame_time': _metric(1000 * best_time(run, repeats) / n_frames, 'ms', False)}
+
+def reference_solution(pendulum, t_end, tolerance=1e-12):
+    """Integrate to t_end with a tight-tolerance Dormand-Prince solver, as the reference for error measurements."""
+    solver = DormandPrince(pendulum.equations_of_motion, 0.0, pendulum.compute_state(), rtol=tolerance,
+                           atol=tolerance, t_bound=t_end)
+    return solver.solve(t_end)
+
+def accuracy_vs_cost(pendulum, t_end=2.0, dts=(0.02, 0.01, 0.005), tolerances=(1e-4, 1e-6, 1e-8)):
+    """
+    Measure the final-state error of every method against a high-precision reference along with
+    its wall time. Fixed-step methods vary dt; the adaptive method varies its tolerance instead.
+    """
+    reference = reference_solution(pendulum, t_end)
+    rows = []
+    for method in METHODS:
+        func, y0 = _problem(pendulum, method)
+        settings = [(0.01, tolerance) for tolerance in tolerances] if method == 'adaptive_runge_kutta' \
+            else [(dt, 1e-6) for dt in dts]
+        for dt, tolerance in settings:
+            n_steps = int(round(t_end / dt))
+            start = time.perf_counter()
+            final = NumericalMethods(dt=dt).integrate(func, y0, (0.0, t_end), n_steps, method=method,
+                                                      tolerance=tolerance)[-1]
+            wall_time = time.perf_counter() - start
+            if method in SYMPLECTIC:
+                final = pendulum.from_canonical(final)
+            rows.append({'method': method, 'dt': dt, 'tolerance': tolerance, 'wall_time': wall_time,
+                         'error': float(np.max(np.abs(np.asarray(final) - reference)))})
+    return rows
+
+def run_suite(quick=False):
+    """Run every benchmark and return a JSON-serializable report; quick uses smaller problem sizes."""
+    pendulum = DoublePendulum(1.0, 1.0, 1.0, 1.0, np.pi / 3, np.pi / 6, 0.0, 0.0)
+    scale = 10 if quick else 1
+    metrics = {}
+    metrics.update(bench_rhs(pendulum, n_evals=20000 // scale))
+    metrics.update(bench_methods(pendulum, n_steps=200 // scale))
+    metrics.update(bench_ensemble(sizes=(1, 100, 1000) if quick else (1, 10, 100, 1000, 10000)))
+    metrics.update(bench_logger(n_states=100000 // scale))
+    metrics.update(bench_animation(n_frames=100 // scale))
+
+    accuracy = accuracy_vs_cost(pendulum, t_end=0.5 if quick else 2.0)
+    for row in accuracy:
+        setting = f"tol={row['tolerance']:g}" if row['method'] == 'adaptive_runge_kutta' else f"dt={row['dt']:g}"
+        metrics[f"error/{row['method']}/{setting}"] = _metric(row['error'], 'rad', False)
+
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'machine': {'python': platform.python_version(), 'numpy': np.__version__, 'platform': platform.platform()},
+        'quick': quick,
+        'metrics': metrics,
+        'accuracy': accuracy,
+    }
+
+def compare(report, baseline, tolerance=0.2):
+    """
+    List the metrics that got worse than the baseline by more than the tolerance (a fraction).
+    Metrics missing from either report are skipped.
+    """
+    regressions = []
+    for name, metric in report['metrics'].items():
+        reference = baseline.get('metrics', {}).get(name)
+        if reference is None or reference['value'] == 0:
+            continue
+        ratio = metric['value'] / reference['value']
+        worse = ratio < 1 - tolerance if metric['higher_is_better'] else ratio > 1 + tolerance
+        if worse:
+            regressions.append({'name': name, 'baseline': reference['value'], 'value': metric['value'],
+                                'unit': metric['unit'], 'ratio': ratio})
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the double pendulum solvers and flag regressions.")
+    parser.add_argument('--output', help="write the JSON report to this file (default: print it)")
+    parser.add_argument('--baseline', help="compare against this saved report and exit with 1 on regressions")
+    parser.add_argument('--save-baseline', action='store_true', help="write the report to --baseline instead")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed slowdown fraction (default 0.2)")
+    parser.add_argument('--quick', action='store_true', help="use small problem sizes")
+    args = parser.parse_args(argv)
+
+    report = run_suite(quick=args.quick)
+    if args.baseline and not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            report['regressions'] = compare(report, json.load(file), args.tolerance)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(text)
+    else:
+        print(text)
+    if args.baseline and args.save_baseline:
+        with open(args.baseline, 'w') as file:
+            file.write(text)
+
+    for regression in report.get('regressions', []):
+        print(f"REGRESSION: {regression['name']}: {regression['value']:.4g} {regression['unit']} "
+              f"(baseline {regression['baseline']:.4g}, x{regression['ratio']:.2f})", file=sys.stderr)
+    return 1 if report.get('regressions') else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+File name: cache.py
+Author: Troy Chin (CWID: 885586685)
+Date: 2026-10-18
+Version: 1.0
+Status: Ready to deliver to customers
+Description: This script caches simulated trajectories on disk so repeated runs are served from files.
+"""
+
+import hashlib
+import json
+import os
+import time
+import numpy as np
+from numerical_methods import NumericalMethods
+from trajectory_store import pendulum_parameters
+
+class TrajectoryCache:
+
+    def __init__(self, directory, max_bytes=1 << 30):
+        """Initialize a cache in directory that evicts least recently used runs above max_bytes."""
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(directory, 'index.json')
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as file:
+                self.index = json.load(file)
+        else:
+            self.index = {}
+
+    def key(self, pendulum, dt, method, tolerance=1e-6):
+        """
+        Hash the parameters, initial state, dt and method of a run, plus the tolerance for the
+        adaptive method. The step count is not part of the key: one entry holds the longest run
+        so far and shorter requests are its prefixes.
+        """
+        description = {
+            'parameters': pendulum_parameters(pendulum),
+            'state': [float(value) for value in pendulum.compute_state()],
+            'dt': float(dt),
+            'method': method,
+        }
+        if method == 'adaptive_runge_kutta':
+            description['tolerance'] = float(tolerance)
+        return hashlib.sha256(json.dumps(description, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.npy")
+
+    def _save_index(self):
+        temporary = self.index_path + '.tmp'
+        with open(temporary, 'w') as file:
+            json.dump(self.index, file)
+        os.replace(temporary, self.index_path)
+
+    def get(self, pendulum, dt, n_steps, method='runge_kutta', tolerance=1e-6):
+        """Return the cached (n_steps + 1, 4) trajectory as a read-only memory map, or None on a miss."""
+        key = self.key(pendulum, dt, method, tolerance)
+        entry = self.index.get(key)
+        if entry is None or entry['n_steps'] < n_steps or not os.path.exists(self._path(key)):
+            return None
+        entry['last_used'] = time.time()
+        self._save_index()
+        return np.load(self._path(key), mmap_mode='r')[:n_steps + 1]
+
+    def trajectory(self, pendulum, dt, n_steps, method='runge_kutta', tolerance=1e-6):
+        """
+        Get the trajectory of pendulum from the cache, integrating only what is missing. A cached
+        shorter run is extended from its last state instead of recomputing its prefix. For the fixed-step
+        methods the extended run is identical to a single long run; the adaptive method restarts its
+        solver at the join, so there the two only agree to within the tolerance.
+        """
+        cached = self.get(pendulum, dt, n_steps, method, tolerance)
+        if cached is not None:
+            return cached
+
+        key = self.key(pendulum, dt, method, tolerance)
+        entry = self.index.get(key)
+        path = self._path(key)
+        methods = NumericalMethods(dt=dt)
+        result = np.lib.format.open_memmap(path + '.tmp.npy', mode='w+', dtype=np.float64, shape=(n_steps + 1, 4))
+        if entry is not None and os.path.exists(path):
+            prefix = np.load(path, mmap_mode='r')
+            done = entry['n_steps']
+            result[:done + 1] = prefix
+            del prefix
+        else:
+            done = 0
+            result[0] = pendulum.compute_state()
+
+        if n_steps > done:
+            # t_span=None steps by exactly dt, so a fixed-step extension matches a single long run
+            methods.integrate(pendulum.equations_of_motion, result[done], None, n_steps - done,
+                              method=method, out=result[done:], tolerance=tolerance)
+        result.flush()
+        del result
+        os.replace(path + '.tmp.npy', path)
+
+        self.index[key] = {'n_steps': n_steps, 'bytes': os.path.getsize(path), 'last_used': time.time()}
+        self._evict(keep=key)
+        self._save_index()
+        return np.load(path, mmap_mode='r')
+
+    def total_bytes(self):
+        """Get the size of all cached trajectories."""
+        return sum(entry['bytes'] for entry in self.index.values())
+
+    def _evict(self, keep=None):
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        for key in sorted(self.index, key=lambda k: self.index[k]['last_used']):
+            if self.total_bytes() <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            if os.path.exists(self._path(key)):
+                os.remove(self._path(key))
+            del self.index[key]
+
+    def clear(self):
+        """Remove every cached trajectory."""
+        for key in list(self.index):
+            if os.path.exists(self._path(key)):
+                os.remove(self._path(key))
+        self.index = {}
+        self._save_index()
@@ -0,0 +1,166 @@
+"""
+File name: chaos_map.py
+Author: Troy Chin (CWID: 885586685)
+Date: 2026-10-18
+Version: 1.0
+Status: Ready to deliver to customers
+Description: This script computes time-to-flip maps of the double pendulum over a grid of initial angles.
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from ensemble import PendulumEnsemble
+
+class ChaosMap:
+
+    def __init__(self, resolution=1000, angle_range=(-np.pi, np.pi), t_max=10.0, dt=0.01, method='runge_kutta',
+                 mass1=1.0, mass2=1.0, length1=1.0, length2=1.0, g=9.81, tile_size=256, cache_dir=None):
+        """
+        Initialize a square grid of resolution x resolution initial angles, released at rest.
+        Pixel [i, j] starts from angle1 = angles[j] and angle2 = angles[i]. Tiles of
+        tile_size x tile_size pixels are integrated one at a time and cached in cache_dir.
+        """
+        self.angles = np.linspace(angle_range[0], angle_range[1], resolution)
+        self.resolution = resolution
+        self.t_max = t_max
+        self.dt = dt
+        self.method = method
+        self.parameters = {'mass1': mass1, 'mass2': mass2, 'length1': length1, 'length2': length2, 'g': g}
+        self.tile_size = tile_size
+        self.cache_dir = cache_dir
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def tiles(self):
+        """List the (row_start, row_stop, col_start, col_stop) bounds of every tile."""
+        starts = range(0, self.resolution, self.tile_size)
+        return [(r, min(r + self.tile_size, self.resolution), c, min(c + self.tile_size, self.resolution))
+                for r in starts for c in starts]
+
+    def _tile_path(self, bounds):
+        """Get the cache file of a tile; the name hashes every setting that affects its pixels."""
+        key = json.dumps({
+            'angles': [self.angles[0], self.angles[-1], self.resolution],
+            't_max': self.t_max, 'dt': self.dt, 'method': self.method,
+            'parameters': self.parameters, 'bounds': bounds,
+        }, sort_keys=True)
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"tile_{bounds[0]}_{bounds[2]}_{digest}.npz")
+
+    def compute_tile(self, bounds):
+        """Integrate one tile and return its (flip_time, final_state) arrays; flip_time is NaN if it never flips."""
+        if self.cache_dir is not None:
+            path = self._tile_path(bounds)
+            if os.path.exists(path):
+                with np.load(path) as cached:
+                    return cached['flip_time'], cached['final_state']
+
+        row_start, row_stop, col_start, col_stop = bounds
+        angle2, angle1 = np.meshgrid(self.angles[row_start:row_stop], self.angles[col_start:col_stop], indexing='ij')
+        shape = angle1.shape
+        flip_time, final_state = flip_times(angle1.ravel(), angle2.ravel(), self.t_max, self.dt, self.method,
+                                            **self.parameters)
+        flip_time = flip_time.reshape(shape)
+        final_state = final_state.reshape(shape + (4,))
+
+        if self.cache_dir is not None:
+            # Write under a temporary name first so an interrupted run never leaves a broken tile
+            temporary = path + '.tmp.npz'
+            np.savez(temporary, flip_time=flip_time, final_state=final_state)
+            os.replace(temporary, path)
+        return flip_time, final_state
+
+    def compute(self, output_dir=None, workers=1):
+        """
+        Compute the whole map tile by tile. With output_dir, the (resolution, resolution) flip-time
+        image and (resolution, resolution, 4) final states are memory-mapped .npy files there, so
+        maps larger than memory can be built. workers > 1 integrates tiles in a process pool.
+        """
+        shape = (self.resolution, self.resolution)
+        if output_dir is not None:
+            os.makedirs(output_dir, exist_ok=True)
+            flip_time = np.lib.format.open_memmap(os.path.join(output_dir, 'flip_time.npy'), mode='w+',
+                                                  dtype=np.float64, shape=shape)
+            final_state = np.lib.format.open_memmap(os.path.join(output_dir, 'final_state.npy'), mode='w+',
+                                                    dtype=np.float64, shape=shape + (4,))
+        else:
+            flip_time = np.empty(shape)
+            final_state = np.empty(shape + (4,))
+
+        tiles = self.tiles()
+        if workers == 1:
+            results = map(self.compute_tile, tiles)
+        else:
+            executor = ProcessPoolExecutor(max_workers=workers)
+            results = executor.map(self.compute_tile, tiles)
+        try:
+            for (row_start, row_stop, col_start, col_stop), (tile_flip, tile_final) in zip(tiles, results):
+                flip_time[row_start:row_stop, col_start:col_stop] = tile_flip
+                final_state[row_start:row_stop, col_start:col_stop] = tile_final
+        finally:
+            if workers != 1:
+                executor.shutdown()
+        return flip_time, final_state
+
+def flip_times(angle1, angle2, t_max, dt, method='runge_kutta', mass1=1.0, mass2=1.0, length1=1.0,
+               length2=1.0, g=9.81):
+    """
+    Integrate pendulums released at rest from 1-D arrays of angles until either arm flips over
+    (|angle| > pi) or t_max is reached. Flipped members are dropped from the working set, so they
+    stop costing work. Returns each member's flip time (NaN if it never flips) and its state at
+    that time (or at t_max).
+    """
+    # Scalar parameters broadcast against however many members are still active
+    ensemble = PendulumEnsemble(mass1, mass2, length1, length2, 0.0, 0.0, 0.0, 0.0, g)
+    steppers = {
+        'euler': ensemble.euler_method,
+        'runge_kutta': ensemble.runge_kutta,
+        'midpoint': ensemble.midpoint_method,
+    }
+    if method not in steppers:
+        raise ValueError("Unknown method. Choose 'euler', 'runge_kutta', or 'midpoint'.")
+    stepper = steppers[method]
+
+    n = len(angle1)
+    state = np.zeros((n, 4))
+    state[:, 0] = angle1
+    state[:, 1] = angle2
+    flip_time = np.full(n, np.nan)
+    final_state = np.empty((n, 4))
+    active = np.arange(n)
+
+    n_steps = int(round(t_max / dt))
+    for i in range(1, n_steps + 1):
+        state = stepper(state, dt)
+        flipped = (np.abs(state[:, 0]) > np.pi) | (np.abs(state[:, 1]) > np.pi)
+        if flipped.any():
+            flip_time[active[flipped]] = i * dt
+            final_state[active[flipped]] = state[flipped]
+            keep = ~flipped
+            state = state[keep]
+            active = active[keep]
+            if len(active) == 0:
+                break
+
+    final_state[active] = state
+    return flip_time, final_state
+
+#Example implementation
+
+def main():
+    import matplotlib.pyplot as plt
+    chaos_map = ChaosMap(resolution=200, t_max=10.0, cache_dir='chaos_map_cache')
+    flip_time, _ = chaos_map.compute()
+    extent = [chaos_map.angles[0], chaos_map.angles[-1], chaos_map.angles[0], chaos_map.angles[-1]]
+    plt.imshow(np.log10(flip_time), origin='lower', extent=extent, cmap='viridis')
+    plt.colorbar(label='log10(time to flip) (s)')
+    plt.xlabel('Initial Angle 1 (rad)')
+    plt.ylabel('Initial Angle 2 (rad)')
+    plt.title('Double Pendulum Time-to-Flip Map')
+    plt.show()
+
+if __name__ == '__main__':
+    main()
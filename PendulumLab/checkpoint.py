@@ -0,0 +1,162 @@
+"""
+File name: checkpoint.py
+Author: Troy Chin (CWID: 885586685)
+Date: 2026-10-18
+Version: 1.0
+Status: Ready to deliver to customers
+Description: This script runs long simulations with periodic checkpoints so they can be resumed after a crash.
+"""
+
+import json
+import os
+import numpy as np
+from numerical_methods import NumericalMethods, DormandPrince
+from data_logger import StreamingDataLogger
+from pendulum import DoublePendulum
+from trajectory_store import pendulum_parameters
+
+class CheckpointedRun:
+
+    def __init__(self, pendulum, dt, n_steps, checkpoint_path, method='runge_kutta', log_directory=None,
+                 checkpoint_every=10000, chunk_size=65536, decimation=1, tolerance=1e-6):
+        """
+        Initialize a run of n_steps steps of size dt that saves a checkpoint to checkpoint_path
+        every checkpoint_every steps. With log_directory, states are streamed to a StreamingDataLogger.
+        """
+        if checkpoint_every < 1:
+            raise ValueError("checkpoint_every must be a positive integer.")
+        self.pendulum = pendulum
+        self.dt = dt
+        self.n_steps = n_steps
+        self.checkpoint_path = checkpoint_path
+        self.method = method
+        self.log_directory = log_directory
+        self.checkpoint_every = checkpoint_every
+        self.tolerance = tolerance
+        self.methods = NumericalMethods(dt=dt)
+
+        self.initial_state = np.array(pendulum.compute_state(), dtype=float)
+        self.state = self.initial_state.copy()
+        self.step_count = 0
+        self.solver = self._make_solver() if method == 'adaptive_runge_kutta' else None
+        self.logger = None
+        if log_directory is not None:
+            self.logger = StreamingDataLogger(log_directory, chunk_size=chunk_size, decimation=decimation)
+
+    def _make_solver(self):
+        # Same settings as NumericalMethods.integrate, so a checkpointed run matches an integrate() call
+        return DormandPrince(self.pendulum.equations_of_motion, 0.0, self.initial_state,
+                             rtol=self.tolerance, atol=self.tolerance, t_bound=self.n_steps * self.dt)
+
+    @property
+    def done(self):
+        return self.step_count >= self.n_steps
+
+    def run(self, max_steps=None):
+        """
+        Advance the run to the end (or by at most max_steps steps), checkpointing after every block.
+        Returns the current state.
+        """
+        target = self.n_steps if max_steps is None else min(self.n_steps, self.step_count + max_steps)
+        block = np.empty((self.checkpoint_every + 1,) + self.state.shape)
+        while self.step_count < target:
+            n = min(self.checkpoint_every, target - self.step_count)
+            self._advance(block[:n + 1], n)
+            if self.logger is not None:
+                # The initial state is logged with the first block only
+                self.logger.log_states(block[:n + 1] if self.step_count == 0 else block[1:n + 1])
+            self.step_count += n
+            self.state = block[n].copy()
+            self.save_checkpoint()
+
+        if self.done and self.logger is not None:
+            self.logger.flush()
+        return self.state
+
+    def _advance(self, out, n):
+        """Fill out with the states after step_count, step_count + 1, ..., step_count + n steps."""
+        if self.solver is None:
+            # t_span=None steps by exactly dt, so blocks take the same steps as one long run
+            self.methods.integrate(self.pendulum.equations_of_motion, self.state, None, n,
+                                   method=self.method, out=out)
+            return
+        out[0] = self.state
+        t_bound = self.solver.t_bound
+        for i in range(1, n + 1):
+            t = (self.step_count + i) * self.dt
+            while self.solver.t < min(t, t_bound):
+                self.solver.step()
+            out[i] = self.solver.dense_output(t)
+
+    def save_checkpoint(self):
+        """Write the checkpoint atomically: to a temporary file first, then renamed over the old one."""
+        meta = {
+            'parameters': pendulum_parameters(self.pendulum),
+            'initial_state': [float(value) for value in self.initial_state],
+            'dt': self.dt, 'n_steps': self.n_steps, 'method': self.method, 'tolerance': self.tolerance,
+            'checkpoint_every': self.checkpoint_every, 'step_count': self.step_count,
+            'log_directory': self.log_directory,
+        }
+        arrays = {'state': self.state}
+        if self.solver is not None:
+            solver_state = self.solver.get_state()
+            meta['solver'] = {key: value for key, value in solver_state.items() if np.isscalar(value)}
+            arrays.update({f"solver_{key}": value for key, value in solver_state.items() if not np.isscalar(value)})
+        if self.logger is not None:
+            logger_state = self.logger.checkpoint_state()
+            meta['logger'] = {key: logger_state[key] for key in ('n_seen', 'n_flushed', 'n_chunks')}
+            meta['logger'].update(chunk_size=self.logger.chunk_size, decimation=self.logger.decimation)
+            arrays['logger_pending'] = logger_state['pending']
+
+        temporary = self.checkpoint_path + '.tmp'
+        with open(temporary, 'wb') as file:
+            np.savez(file, meta=np.array(json.dumps(meta)), **arrays)
+        os.replace(temporary, self.checkpoint_path)
+
+    @classmethod
+    def resume(cls, checkpoint_path):
+        """Rebuild a run from its checkpoint; calling run() then continues exactly where it stopped."""
+        with np.load(checkpoint_path) as checkpoint:
+            meta = json.loads(str(checkpoint['meta']))
+            arrays = {key: checkpoint[key] for key in checkpoint.files if key != 'meta'}
+
+        parameters = meta['parameters']
+        pendulum = DoublePendulum(parameters['mass1'], parameters['mass2'], parameters['length1'],
+                                  parameters['length2'], *meta['initial_state'], g=parameters['g'])
+        run = cls(pendulum, meta['dt'], meta['n_steps'], checkpoint_path, meta['method'],
+                  checkpoint_every=meta['checkpoint_every'], tolerance=meta['tolerance'])
+        run.state = arrays['state']
+        run.step_count = meta['step_count']
+        if run.solver is not None:
+            solver_state = dict(meta['solver'])
+            solver_state.update({key[len('solver_'):]: value for key, value in arrays.items()
+                                 if key.startswith('solver_')})
+            run.solver.set_state(solver_state)
+        if 'logger' in meta:
+            logger = meta['logger']
+            run.log_directory = meta['log_directory']
+            run.logger = StreamingDataLogger(run.log_directory, chunk_size=logger['chunk_size'],
+                                             decimation=logger['decimation'],
+                                             checkpoint=dict(logger, pending=arrays['logger_pending']))
+        return run
+
+def resume(checkpoint_path, max_steps=None):
+    """Resume the run saved in checkpoint_path and advance it; returns the run."""
+    run = CheckpointedRun.resume(checkpoint_path)
+    run.run(max_steps)
+    return run
+
+#Example implementation
+
+def main():
+    pendulum = DoublePendulum(1.0, 1.0, 1.0, 1.0, np.pi / 2, np.pi / 2, 0.0, 0.0)
+    path = 'pendulum_checkpoint.npz'
+    if os.path.exists(path):
+        run = CheckpointedRun.resume(path)
+        print(f"Resuming from step {run.step_count}.")
+    else:
+        run = CheckpointedRun(pendulum, 0.01, 1000000, path, log_directory='pendulum_log')
+    print("Final state:", run.run())
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+File name: cli.py
+Author: Troy Chin (CWID: 885586685)
+Date: 2026-10-18
+Version: 1.0
+Status: Ready to deliver to customers
+Description: This script runs a headless simulation from the command line: python -m cli --help.
+"""
+
+import argparse
+import sys
+import time
+import numpy as np
+from pendulum import DoublePendulum
+from pipeline import Pipeline, integrate_blocks, decimate, energy, TrajectorySink, CSVSink, StatisticsSink
+from trajectory_store import pendulum_parameters
+
+# Methods that integrate the state [angle1, angle2, velocity1, velocity2] directly
+METHODS = ('euler', 'runge_kutta', 'adaptive_runge_kutta', 'midpoint')
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m cli',
+                                     description="Simulate a double pendulum without a display and save the states.")
+    parser.add_argument('--mass1', type=float, default=1.0)
+    parser.add_argument('--mass2', type=float, default=1.0)
+    parser.add_argument('--length1', type=float, default=1.0)
+    parser.add_argument('--length2', type=float, default=1.0)
+    parser.add_argument('--angle1', type=float, default=np.pi / 3, help="initial angle in radians")
+    parser.add_argument('--angle2', type=float, default=np.pi / 6, help="initial angle in radians")
+    parser.add_argument('--velocity1', type=float, default=0.0, help="initial angular velocity in rad/s")
+    parser.add_argument('--velocity2', type=float, default=0.0, help="initial angular velocity in rad/s")
+    parser.add_argument('--g', type=float, default=9.81)
+    parser.add_argument('--method', choices=METHODS, default='runge_kutta')
+    parser.add_argument('--dt', type=float, default=0.01)
+    parser.add_argument('--steps', type=int, default=1000)
+    parser.add_argument('--tolerance', type=float, default=1e-6, help="tolerance of adaptive_runge_kutta")
+    parser.add_argument('--decimation', type=int, default=1, help="keep every n-th state")
+    parser.add_argument('--block-steps', type=int, default=10000, help="steps integrated per block")
+    parser.add_argument('--output', '-o', help="write the states to a .csv or a binary trajectory file (.bin)")
+    parser.add_argument('--quiet', '-q', action='store_true', help="do not print the summary")
+    args = parser.parse_args(argv)
+    if args.dt <= 0 or args.steps < 1 or args.decimation < 1 or args.block_steps < 1:
+        parser.error("dt, steps, decimation and block-steps must be positive.")
+    return args
+
+def run(args):
+    """Run the simulation described by parsed arguments and return the energy statistics."""
+    pendulum = DoublePendulum(args.mass1, args.mass2, args.length1, args.length2, args.angle1, args.angle2,
+                              args.velocity1, args.velocity2, g=args.g)
+    statistics = StatisticsSink('energy')
+    pipeline = (Pipeline(integrate_blocks(pendulum.equations_of_motion, pendulum.compute_state(), args.dt,
+                                          args.steps, block_steps=args.block_steps, method=args.method,
+                                          tolerance=args.tolerance))
+                .then(decimate(args.decimation))
+                .then(energy(pendulum)))
+    if args.output is not None and args.output.endswith('.csv'):
+        pipeline.to(CSVSink(args.output, fields=['energy']))
+    elif args.output is not None:
+        pipeline.to(TrajectorySink(args.output, method=args.method, parameters=pendulum_parameters(pendulum)))
+    pipeline.to(statistics)
+    return pipeline.run()[-1]
+
+def main(argv=None):
+    args = parse_args(argv)
+    start = time.perf_counter()
+    statistics = run(args)
+    if not args.quiet:
+        drift = statistics['max'] - statistics['min']
+        print(f"{args.steps} {args.method} steps (dt={args.dt:g}) in {time.perf_counter() - start:.2f} s, "
+              f"{statistics['count']} states kept, energy spread {drift:.3e}"
+              + (f", written to {args.output}" if args.output else ""))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -10,17 +10,179 @@ Description: This script will handle any data logging from the user.
 
 #Import models here.
 import csv
+import glob
+import os
+import numpy as np
 
 class DataLogger:
-    def __init__(self):
+    def __init__(self, instrumentation=None):
         self.data = []
+        self.instrumentation = instrumentation  # Optional Instrumentation; None costs nothing
 
     def log_state(self, state):
         self.data.append(state)
+        if self.instrumentation is not None:
+            self.instrumentation.count('logged_states')
+
+    def log_states(self, states):
+        """Log a whole block of states, one row per state."""
+        if self.instrumentation is None:
+            self.data.extend([list(state) for state in states])
+            return
+        with self.instrumentation.phase('log'):
+            self.data.extend([list(state) for state in states])
+        self.instrumentation.count('logged_states', len(states))
 
     def save_to_csv(self, filename):
+        if self.instrumentation is None:
+            return self._write_csv(filename)
+        with self.instrumentation.phase('flush'):
+            self._write_csv(filename)
+
+    def _write_csv(self, filename):
         with open(filename, mode='w', newline='') as file:
             writer = csv.writer(file)
             writer.writerow(["Angle 1", "Angle 2", "Velocity 1", "Velocity 2"])  # Header
             writer.writerows(self.data)
 
+class StreamingDataLogger:
+
+    def __init__(self, directory, chunk_size=65536, decimation=1, dtype=np.float64, overwrite=False, checkpoint=None,
+                 instrumentation=None):
+        """
+        Initialize a logger that keeps one chunk in memory and writes full chunks to .npy files in directory.
+        Passing a checkpoint from checkpoint_state() resumes logging from that point instead.
+        """
+        if chunk_size < 1 or decimation < 1:
+            raise ValueError("chunk_size and decimation must be positive integers.")
+        os.makedirs(directory, exist_ok=True)
+        existing = sorted(glob.glob(os.path.join(directory, 'chunk_*.npy')))
+        if checkpoint is not None:
+            # Chunks flushed after the checkpoint are rewritten by the resumed run
+            existing = [path for path in existing if self._chunk_index(path) >= checkpoint['n_chunks']]
+        elif existing and not overwrite:
+            raise FileExistsError(f"{directory} already contains logged chunks. Pass overwrite=True to replace them.")
+        for path in existing:
+            os.remove(path)
+
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.decimation = decimation
+        self.dtype = np.dtype(dtype)
+        self.buffer = None  # Allocated on the first state, once the state width is known
+        self.count = 0  # Rows waiting in the buffer
+        self.n_seen = 0  # States offered to the logger, before decimation
+        self.n_flushed = 0  # Rows already written to disk
+        self.n_chunks = 0
+        self.instrumentation = instrumentation  # Optional Instrumentation; None costs nothing
+
+        if checkpoint is not None:
+            self.n_seen = checkpoint['n_seen']
+            self.n_flushed = checkpoint['n_flushed']
+            self.n_chunks = checkpoint['n_chunks']
+            pending = np.asarray(checkpoint['pending'])
+            if pending.size:
+                self._allocate(pending.shape[1])
+                self.buffer[:len(pending)] = pending
+                self.count = len(pending)
+
+    @staticmethod
+    def _chunk_index(path):
+        return int(os.path.basename(path)[len('chunk_'):-len('.npy')])
+
+    def checkpoint_state(self):
+        """Get the counters, flush offset and buffered rows needed to resume logging after a restart."""
+        return {
+            'n_seen': self.n_seen,
+            'n_flushed': self.n_flushed,
+            'n_chunks': self.n_chunks,
+            'pending': np.empty((0, 0)) if self.buffer is None else self.buffer[:self.count].copy(),
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+
+    def __len__(self):
+        """Number of logged (kept) states, on disk or in the buffer."""
+        return self.n_flushed + self.count
+
+    def _allocate(self, width):
+        if self.buffer is None:
+            self.buffer = np.empty((self.chunk_size, width), dtype=self.dtype)
+
+    def log_state(self, state):
+        """Log a single state, keeping only every decimation-th state."""
+        keep = self.n_seen % self.decimation == 0
+        self.n_seen += 1
+        if self.instrumentation is not None:
+            self.instrumentation.count('logged_states')
+        if not keep:
+            return
+        self._allocate(len(state))
+        self.buffer[self.count] = state
+        self.count += 1
+        if self.count == self.chunk_size:
+            self.flush()
+
+    def log_states(self, states):
+        """Log a block of states, one row per state, keeping only every decimation-th state."""
+        states = np.asarray(states)
+        first = -self.n_seen % self.decimation
+        self.n_seen += len(states)
+        if self.instrumentation is not None:
+            self.instrumentation.count('logged_states', len(states))
+        kept = states[first::self.decimation]
+        if len(kept) == 0:
+            return
+        self._allocate(kept.shape[1])
+
+        while len(kept):
+            n = min(len(kept), self.chunk_size - self.count)
+            self.buffer[self.count:self.count + n] = kept[:n]
+            self.count += n
+            kept = kept[n:]
+            if self.count == self.chunk_size:
+                self.flush()
+
+    def flush(self):
+        """Write the buffered rows to the next chunk file."""
+        if self.count == 0:
+            return
+        if self.instrumentation is None:
+            np.save(self.chunk_path(self.n_chunks), self.buffer[:self.count])
+        else:
+            with self.instrumentation.phase('flush'):
+                np.save(self.chunk_path(self.n_chunks), self.buffer[:self.count])
+            self.instrumentation.count('flushed_states', self.count)
+        self.n_flushed += self.count
+        self.n_chunks += 1
+        self.count = 0
+
+    def chunk_path(self, index):
+        """Get the path of the index-th chunk file."""
+        return os.path.join(self.directory, f"chunk_{index:06d}.npy")
+
+    def iter_chunks(self):
+        """Yield the flushed chunks (memory-mapped) followed by any rows still in the buffer."""
+        for index in range(self.n_chunks):
+            yield np.load(self.chunk_path(index), mmap_mode='r')
+        if self.count:
+            yield self.buffer[:self.count]
+
+    def load(self):
+        """Load every logged state into one array (for runs that fit in memory)."""
+        chunks = list(self.iter_chunks())
+        if not chunks:
+            return np.empty((0, 0 if self.buffer is None else self.buffer.shape[1]), dtype=self.dtype)
+        return np.concatenate(chunks)
+
+    def save_to_csv(self, filename):
+        """Convert the logged states to CSV one chunk at a time."""
+        with open(filename, mode='w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(["Angle 1", "Angle 2", "Velocity 1", "Velocity 2"])  # Header
+            for chunk in self.iter_chunks():
+                writer.writerows(chunk.tolist())
@@ -0,0 +1,147 @@
+"""
+File name: diagnostics.py
+Author: Troy Chin (CWID: 885586685)
+Date: 2026-10-18
+Version: 1.0
+Status: Ready to deliver to customers
+Description: This script computes energies, positions and velocities of whole trajectories in one vectorized pass.
+"""
+
+import numpy as np
+
+def _parameters(states, pendulum, member_axis=0):
+    """
+    Get mass1, mass2, length1, length2 and g shaped to broadcast against the leading axes of states.
+    pendulum is a DoublePendulum or a PendulumEnsemble; per-member parameters of an ensemble line up
+    with the member axis of (N, T, 4) trajectories (or the first axis of (N, 4) states).
+    """
+    values = [np.asarray(value, dtype=np.float64) for value in
+              (pendulum.mass1, pendulum.mass2, pendulum.length1, pendulum.length2, pendulum.g)]
+    if states.ndim == 3:
+        shape = [1, 1]
+        shape[member_axis] = -1
+        values = [value.reshape(shape) if value.size > 1 else value.reshape(()) for value in values]
+    elif states.ndim == 2:
+        values = [value if value.size > 1 else value.reshape(()) for value in values]
+    return values
+
+def _columns(states):
+    states = np.asarray(states, dtype=np.float64)
+    return states, states[..., 0], states[..., 1], states[..., 2], states[..., 3]
+
+def positions(states, pendulum, member_axis=0):
+    """Compute the bob positions (x1, y1, x2, y2) of a (T, 4), (N, 4) or (N, T, 4) trajectory."""
+    states, angle1, angle2, _, _ = _columns(states)
+    _, _, l1, l2, _ = _parameters(states, pendulum, member_axis)
+    result = np.empty(states.shape)
+    result[..., 0] = l1 * np.sin(angle1)
+    result[..., 1] = -l1 * np.cos(angle1)
+    result[..., 2] = result[..., 0] + l2 * np.sin(angle2)
+    result[..., 3] = result[..., 1] - l2 * np.cos(angle2)
+    return result
+
+def velocities(states, pendulum, member_axis=0):
+    """Compute the Cartesian bob velocities (vx1, vy1, vx2, vy2) of a trajectory."""
+    states, angle1, angle2, velocity1, velocity2 = _columns(states)
+    _, _, l1, l2, _ = _parameters(states, pendulum, member_axis)
+    result = np.empty(states.shape)
+    result[..., 0] = l1 * velocity1 * np.cos(angle1)
+    result[..., 1] = l1 * velocity1 * np.sin(angle1)
+    result[..., 2] = result[..., 0] + l2 * velocity2 * np.cos(angle2)
+    result[..., 3] = result[..., 1] + l2 * velocity2 * np.sin(angle2)
+    return result
+
+def kinetic_energy(states, pendulum, member_axis=0):
+    """Compute the kinetic energy of every sample (same expression as DoublePendulum.kinetic_energy)."""
+    states, angle1, angle2, velocity1, velocity2 = _columns(states)
+    m1, m2, l1, l2, _ = _parameters(states, pendulum, member_axis)
+    v1_squared = (l1 * velocity1)**2
+    v2_squared = (v1_squared + (l2 * velocity2)**2 +
+                  2 * l1 * l2 * velocity1 * velocity2 * np.cos(angle1 - angle2))
+    return 0.5 * m1 * v1_squared + 0.5 * m2 * v2_squared
+
+def potential_energy(states, pendulum, member_axis=0):
+    """Compute the potential energy of every sample (zero with both bobs hanging at rest)."""
+    states, angle1, angle2, _, _ = _columns(states)
+    m1, m2, l1, l2, g = _parameters(states, pendulum, member_axis)
+    h1 = l1 * (1 - np.cos(angle1))
+    h2 = h1 + l2 * (1 - np.cos(angle2))
+    return m1 * g * h1 + m2 * g * h2
+
+def total_energy(states, pendulum, member_axis=0):
+    """Compute the total energy of every sample."""
+    return kinetic_energy(states, pendulum, member_axis) + potential_energy(states, pendulum, member_axis)
+
+def energy_drift(states, pendulum, initial_energy=None, member_axis=0):
+    """Compute E - E0 of every sample; E0 is the energy of the first sample along the time axis unless given."""
+    energy = total_energy(states, pendulum, member_axis)
+    if initial_energy is None:
+        if np.ndim(states) == 3:
+            # Time is the axis that does not hold the members: (N, T) energies or (T, N) ones
+            initial_energy = energy[:, :1] if member_axis == 0 else energy[:1]
+        else:
+            initial_energy = energy[0]
+    return energy - initial_energy
+
+class MaxEnergyDrift:
+
+    def __init__(self, pendulum, initial_energy=None):
+        """Initialize a streaming reducer for the largest |E - E0| of a (T, 4) run fed in chunks."""
+        self.pendulum = pendulum
+        self.initial_energy = initial_energy
+        self.max_drift = 0.0
+        self.index = None  # Sample index of the largest drift
+        self.count = 0
+
+    def update(self, chunk):
+        """Consume the next chunk of states."""
+        if len(chunk) == 0:
+            return
+        energy = total_energy(chunk, self.pendulum)
+        if self.initial_energy is None:
+            self.initial_energy = float(energy[0])
+        drift = np.abs(energy - self.initial_energy)
+        i = int(np.argmax(drift))
+        if self.index is None or drift[i] > self.max_drift:
+            self.max_drift, self.index = float(drift[i]), self.count + i
+        self.count += len(chunk)
+
+class RunningMean:
+
+    def __init__(self, function=None):
+        """
+        Initialize a streaming mean of function(chunk), a per-sample quantity (for example
+        lambda chunk: total_energy(chunk, pendulum)); without a function, the state columns are averaged.
+        """
+        self.function = function
+        self.mean = None
+        self.count = 0
+
+    def update(self, chunk):
+        """Consume the next chunk of states, merging its mean into the running mean."""
+        values = np.asarray(chunk if self.function is None else self.function(chunk), dtype=np.float64)
+        n = len(values)
+        if n == 0:
+            return
+        chunk_mean = values.mean(axis=0)
+        if self.mean is None:
+            self.mean = chunk_mean
+        else:
+            self.mean = self.mean + (chunk_mean - self.mean) * (n / (self.count + n))
+        self.count += n
+
+def blocks(states, size=65536):
+    """Yield consecutive blocks of a large (for example memory-mapped) trajectory."""
+    for start in range(0, len(states), size):
+        yield states[start:start + size]
+
+def reduce_chunks(chunks, *reducers):
+    """
+    Feed every chunk to every reducer in one pass and return the reducers. chunks can be
+    StreamingDataLogger.iter_chunks() or blocks(TrajectoryStore(...).states), so the whole run
+    is never loaded at once.
+    """
+    for chunk in chunks:
+        for reducer in reducers:
+            reducer.update(chunk)
+    return reducers
@@ -0,0 +1,146 @@
+"""
+File name: fast_rhs.py
+Author: Troy Chin (CWID: 885586685)
+Date: 2026-10-18
+Version: 1.0
+Status: Ready to deliver to customers
+Description: This script builds faster right-hand sides for the double pendulum equations of motion.
+"""
+
+import math
+import time
+import numpy as np
+from pendulum import DoublePendulum
+
+# Numba is optional - the pure math backend is used when it is not installed.
+try:
+    import numba
+except ModuleNotFoundError:
+    numba = None
+
+BACKENDS = ('math', 'numba')
+
+def make_math_rhs(pendulum):
+    """Build an equations_of_motion replacement using math on Python floats with shared terms computed once."""
+    m2 = float(pendulum.mass2)
+    l1 = float(pendulum.length1)
+    l2 = float(pendulum.length2)
+    g = float(pendulum.g)
+    total_mass = float(pendulum.mass1) + m2
+    total_mass_l1 = total_mass * l1
+    total_mass_g = total_mass * g
+    m2_l1 = m2 * l1
+    m2_l2 = m2 * l2
+    m2_g = m2 * g
+    length_ratio = l2 / l1
+    sin = math.sin
+    cos = math.cos
+
+    def rhs(t, state):
+        angle1, angle2, velocity1, velocity2 = state
+        delta_theta = angle2 - angle1
+        sin_delta = sin(delta_theta)
+        cos_delta = cos(delta_theta)
+        sin1 = sin(angle1)
+        sin2 = sin(angle2)
+        v1_squared = velocity1 * velocity1
+        v2_squared = velocity2 * velocity2
+
+        den1 = total_mass_l1 - m2_l1 * cos_delta * cos_delta
+        den2 = length_ratio * den1
+
+        theta1_ddot = ((m2_l1 * v1_squared * sin_delta * cos_delta + m2_g * sin2 * cos_delta +
+                        m2_l2 * v2_squared * sin_delta - total_mass_g * sin1) / den1)
+        theta2_ddot = ((-m2_l2 * v2_squared * sin_delta * cos_delta + total_mass_g * sin1 * cos_delta -
+                        total_mass_l1 * v1_squared * sin_delta - total_mass_g * sin2) / den2)
+        return [velocity1, velocity2, theta1_ddot, theta2_ddot]
+
+    return rhs
+
+if numba is not None:
+    @numba.njit(cache=True)
+    def _numba_kernel(angle1, angle2, velocity1, velocity2, mass1, mass2, length1, length2, g):
+        """Compiled equations of motion; returns the derivative in state order."""
+        delta_theta = angle2 - angle1
+        sin_delta = math.sin(delta_theta)
+        cos_delta = math.cos(delta_theta)
+        sin1 = math.sin(angle1)
+        sin2 = math.sin(angle2)
+        total_mass = mass1 + mass2
+
+        den1 = total_mass * length1 - mass2 * length1 * cos_delta * cos_delta
+        den2 = (length2 / length1) * den1
+
+        theta1_ddot = ((mass2 * length1 * velocity1 * velocity1 * sin_delta * cos_delta +
+                        mass2 * g * sin2 * cos_delta +
+                        mass2 * length2 * velocity2 * velocity2 * sin_delta -
+                        total_mass * g * sin1) / den1)
+        theta2_ddot = ((-mass2 * length2 * velocity2 * velocity2 * sin_delta * cos_delta +
+                        total_mass * g * sin1 * cos_delta -
+                        total_mass * length1 * velocity1 * velocity1 * sin_delta -
+                        total_mass * g * sin2) / den2)
+        return velocity1, velocity2, theta1_ddot, theta2_ddot
+
+def make_numba_rhs(pendulum):
+    """Build an equations_of_motion replacement backed by a Numba-compiled kernel."""
+    if numba is None:
+        raise ModuleNotFoundError(
+            "ERROR: The Numba backend was requested but Numba is not installed. Install it with 'pip install numba' "
+            "or use backend='math'."
+        )
+    parameters = (float(pendulum.mass1), float(pendulum.mass2), float(pendulum.length1),
+                  float(pendulum.length2), float(pendulum.g))
+
+    def rhs(t, state):
+        angle1, angle2, velocity1, velocity2 = state
+        return list(_numba_kernel(float(angle1), float(angle2), float(velocity1), float(velocity2), *parameters))
+
+    return rhs
+
+def make_fast_rhs(pendulum, backend='auto'):
+    """
+    Build a fast right-hand side for the pendulum. The pendulum parameters are captured when
+    the function is built, so rebuild it after changing masses, lengths or g.
+    backend='auto' uses Numba when installed and falls back to the math backend otherwise.
+    """
+    if backend == 'auto':
+        backend = 'numba' if numba is not None else 'math'
+    if backend == 'math':
+        return make_math_rhs(pendulum)
+    elif backend == 'numba':
+        return make_numba_rhs(pendulum)
+    else:
+        raise ValueError("Unknown backend. Choose 'auto', 'math', or 'numba'.")
+
+def benchmark_rhs(pendulum, n_evals=100000, repeats=3):
+    """Measure right-hand side evaluations per second for the current method and each available backend."""
+    candidates = {'equations_of_motion': pendulum.equations_of_motion}
+    for backend in BACKENDS:
+        if backend == 'numba' and numba is None:
+            continue
+        candidates[backend] = make_fast_rhs(pendulum, backend)
+
+    state = pendulum.compute_state()
+    results = {}
+    for name, rhs in candidates.items():
+        rhs(0, state)  # Warm up (triggers compilation for the Numba backend)
+        best = float('inf')
+        for _ in range(repeats):
+            start = time.perf_counter()
+            for _ in range(n_evals):
+                rhs(0, state)
+            best = min(best, time.perf_counter() - start)
+        results[name] = n_evals / best
+    return results
+
+#Example implementation
+
+def main():
+    pendulum = DoublePendulum(1.0, 1.0, 1.0, 1.0, np.pi / 3, np.pi / 6, 0.0, 0.0)
+    results = benchmark_rhs(pendulum)
+    baseline = results['equations_of_motion']
+    for name, rate in results.items():
+        print(f"{name:>20}: {rate:12,.0f} evaluations/s ({rate / baseline:5.1f}x)")
+
+if __name__ == '__main__':
+    main()
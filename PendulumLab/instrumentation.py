@@ -0,0 +1,99 @@
+"""
+File name: instrumentation.py
+Author: Troy Chin (CWID: 885586685)
+Date: 2026-10-18
+Version: 1.0
+Status: Ready to deliver to customers
+Description: This script collects optional counters and phase timers from a simulation and sends them to sinks.
+"""
+
+import json
+import time
+from collections import defaultdict
+
+class Instrumentation:
+
+    def __init__(self, sinks=()):
+        """
+        Initialize empty counters and timers. Each sink is a callable that receives one dictionary
+        per event (a finished phase or a summary), such as a JSONLinesSink or a plain function.
+        """
+        self.counters = defaultdict(int)
+        self.timers = defaultdict(float)  # Total seconds spent in each phase
+        self.phase_calls = defaultdict(int)
+        self.sinks = list(sinks)
+
+    def count(self, name, n=1):
+        """Add n to a counter."""
+        self.counters[name] += n
+
+    def phase(self, name):
+        """Time a block of code: `with instrumentation.phase('integrate'): ...`."""
+        return _Phase(self, name)
+
+    def wrap_rhs(self, func):
+        """Wrap a right-hand side so every call is counted in the 'rhs_calls' counter."""
+        counters = self.counters
+
+        def counted(t, y):
+            counters['rhs_calls'] += 1
+            return func(t, y)
+        return counted
+
+    def emit(self, event, **fields):
+        """Send an event to every sink."""
+        if not self.sinks:
+            return
+        record = {'event': event, 'time': time.time(), **fields}
+        for sink in self.sinks:
+            sink(record)
+
+    def summary(self):
+        """Get the counters and phase timers as plain dictionaries."""
+        return {
+            'counters': dict(self.counters),
+            'timers': dict(self.timers),
+            'phase_calls': dict(self.phase_calls),
+        }
+
+    def report(self):
+        """Send the summary to the sinks and return it."""
+        summary = self.summary()
+        self.emit('summary', **summary)
+        return summary
+
+class _Phase:
+    """Context manager returned by Instrumentation.phase."""
+
+    def __init__(self, instrumentation, name):
+        self.instrumentation = instrumentation
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        seconds = time.perf_counter() - self.start
+        instrumentation = self.instrumentation
+        instrumentation.timers[self.name] += seconds
+        instrumentation.phase_calls[self.name] += 1
+        instrumentation.emit('phase', name=self.name, seconds=seconds)
+
+class JSONLinesSink:
+
+    def __init__(self, path):
+        """Initialize a sink that appends one JSON object per event to the file at path."""
+        self.file = open(path, 'a')
+
+    def __call__(self, record):
+        self.file.write(json.dumps(record) + '\n')
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
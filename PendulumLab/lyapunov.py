@@ -0,0 +1,58 @@
+"""
+File name: lyapunov.py
+Author: Troy Chin (CWID: 885586685)
+Date: 2026-10-18
+Version: 1.0
+Status: Ready to deliver to customers
+Description: This script computes Lyapunov exponents of the double pendulum from the variational equations.
+"""
+
+import numpy as np
+from ensemble import PendulumEnsemble
+
+def variational_equations(ensemble, t, state, tangent):
+    """Compute the state derivative and the tangent derivative J(state) @ tangent for (N, 4, k) tangents."""
+    return ensemble.equations_of_motion(t, state), ensemble.jacobian(t, state) @ tangent
+
+def tangent_step(ensemble, state, tangent, dt):
+    """Advance the (N, 4) state and (N, 4, k) tangent vectors together by one Runge-Kutta (Order 4) step."""
+    k1, l1 = variational_equations(ensemble, 0, state, tangent)
+    k2, l2 = variational_equations(ensemble, 0, state + 0.5 * dt * k1, tangent + 0.5 * dt * l1)
+    k3, l3 = variational_equations(ensemble, 0, state + 0.5 * dt * k2, tangent + 0.5 * dt * l2)
+    k4, l4 = variational_equations(ensemble, 0, state + dt * k3, tangent + dt * l3)
+    return (state + (dt / 6) * (k1 + 2 * k2 + 2 * k3 + k4),
+            tangent + (dt / 6) * (l1 + 2 * l2 + 2 * l3 + l4))
+
+def lyapunov_spectrum(ensemble, dt, n_steps, renormalize_every=10, n_exponents=4, transient_steps=0):
+    """
+    Estimate the n_exponents largest Lyapunov exponents of every ensemble member at once.
+    The 4x4 tangent matrix is integrated alongside the state and re-orthonormalized by a QR
+    decomposition every renormalize_every steps; the log of |diag(R)| accumulates the growth.
+    The first transient_steps steps are integrated but not averaged. Returns (N, n_exponents)
+    exponents sorted from largest to smallest; the ensemble state is advanced to the end of the run.
+    """
+    state = ensemble.compute_state()
+    for _ in range(transient_steps):
+        state = ensemble.runge_kutta(state, dt)
+
+    tangent = np.broadcast_to(np.eye(4)[:, :n_exponents], (len(state), 4, n_exponents)).copy()
+    log_growth = np.zeros((len(state), n_exponents))
+    steps_since = 0
+    for i in range(n_steps):
+        state, tangent = tangent_step(ensemble, state, tangent, dt)
+        steps_since += 1
+        if steps_since == renormalize_every or i == n_steps - 1:
+            tangent, r = np.linalg.qr(tangent)
+            log_growth += np.log(np.abs(np.diagonal(r, axis1=1, axis2=2)))
+            steps_since = 0
+
+    ensemble.state = state
+    return -np.sort(-log_growth / (n_steps * dt), axis=1)
+
+def largest_lyapunov_exponent(ensemble, dt, n_steps, renormalize_every=10, transient_steps=0):
+    """Estimate only the largest Lyapunov exponent of every member (one tangent vector)."""
+    return lyapunov_spectrum(ensemble, dt, n_steps, renormalize_every, 1, transient_steps)[:, 0]
+
+def pendulum_lyapunov_spectrum(pendulum, dt, n_steps, renormalize_every=10):
+    """Estimate the Lyapunov spectrum of a single DoublePendulum."""
+    return lyapunov_spectrum(PendulumEnsemble.from_pendulums([pendulum]), dt, n_steps, renormalize_every)[0]
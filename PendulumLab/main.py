@@ -11,10 +11,23 @@ from pendulum import DoublePendulum
 from numerical_methods import NumericalMethods
 from visualization import Visualization
 from data_logger import DataLogger
+from instrumentation import Instrumentation, JSONLinesSink
+import argparse
+import os
 import numpy as np
 
-def main():
-    """Main entry point of the system."""
+def main(instrumentation=None, plan=False):
+    """
+    Main entry point of the system. Pass an Instrumentation (or set PENDULUM_PROFILE to a
+    JSON-lines file) to collect RHS call counts and integrate/log/flush/render timings.
+    By default the run uses Runge-Kutta with dt=0.01, so it is the same on every machine;
+    plan=True (--plan) lets the planner pick the method and step size from timed pilot runs.
+    """
+    sink = None
+    if instrumentation is None and os.environ.get('PENDULUM_PROFILE'):
+        sink = JSONLinesSink(os.environ['PENDULUM_PROFILE'])
+        instrumentation = Instrumentation([sink])
+
     # Define initial conditions
     mass1, mass2 = 1.0, 1.0
     length1, length2 = 1.0, 1.0
@@ -22,29 +35,30 @@ def main():
     velocity1, velocity2 = 0.0, 0.0  # Initial angular velocities in radians per second
     g = 9.81
 
-    # Initialize the double pendulum and numerical methods
+    # Initialize the double pendulum
     pendulum = DoublePendulum(mass1, mass2, length1, length2, angle1, angle2, velocity1, velocity2, g)
-    methods = NumericalMethods(dt=0.01)
 
     # Set up data logger
-    logger = DataLogger()
-
-    # Run simulation
-    time_steps = 1000
-    dt = 0.01
-    for t in range(time_steps):
-        # Call compute_state correctly
-        current_state = pendulum.compute_state()  # Get the current state of the pendulum
-        logger.log_state(current_state)  # Log the current state
+    logger = DataLogger(instrumentation=instrumentation)
 
-        # Update the pendulum state
-        pendulum.step(dt)  # Update the state using your existing step method
+    t_max = 10.0
+    if plan:
+        # Pick the cheapest method and step size that keeps the energy drift below the target
+        from planner import plan_integration
+        integration_plan = plan_integration(pendulum, t_max, tolerance=1e-4, metric='energy')
+        print(integration_plan.report())
+        time_steps, dt = integration_plan.n_steps, integration_plan.dt
+        trajectory = integration_plan.integrate(pendulum, instrumentation=instrumentation)
+    else:
+        # Run simulation over the whole time span in a single call
+        time_steps, dt = 1000, 0.01
+        methods = NumericalMethods(dt=dt, instrumentation=instrumentation)
+        trajectory = methods.integrate(pendulum.equations_of_motion, pendulum.compute_state(),
+                                       (0, time_steps * dt), time_steps, method='runge_kutta')
 
-        # Use the current state as the initial conditions for the ODE solver
-        next_state = methods.solve_ode(pendulum.equations_of_motion, current_state)
-
-        # Log the next state if needed or print it
-        print(next_state)
+    # Log the state at the start of every time step
+    logger.log_states(trajectory[:-1])
+    print(trajectory[-1])
 
     # Prepare data for visualization
     angles1 = [state[0] for state in logger.data]
@@ -54,10 +68,14 @@ def main():
 
     # Create visualization instance and animate
     visualization = Visualization(logger, pendulum, dt)
-    visualization.animate(frames=len(logger.data))  # Adjust frames as needed
+    if instrumentation is None:
+        visualization.animate(trajectory=trajectory, target_fps=30)  # Replays the simulated trajectory
+    else:
+        with instrumentation.phase('render'):
+            visualization.animate(trajectory=trajectory, target_fps=30)
 
     # Plot angles and velocities
-    visualization.plot_angles_and_velocities(t_max=time_steps * dt, dt=dt,
+    visualization.plot_angles_and_velocities(times=np.arange(len(logger.data)) * dt,
                                             angles1=angles1,
                                             angles2=angles2,
                                             velocities1=velocities1,
@@ -69,5 +87,15 @@ def main():
     # Save logged data to CSV
     logger.save_to_csv('double_pendulum_data.csv')
 
+    if instrumentation is not None:
+        summary = instrumentation.report()
+        print("Counters:", summary['counters'])
+        print("Phase times (s):", summary['timers'])
+    if sink is not None:
+        sink.close()
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Simulate, animate and plot the double pendulum.")
+    parser.add_argument('--plan', action='store_true',
+                        help="let the planner choose the method and step size (timed, machine dependent)")
+    main(plan=parser.parse_args().plan)
\ No newline at end of file
@@ -0,0 +1,209 @@
+"""
+File name: montecarlo.py
+Author: Troy Chin (CWID: 885586685)
+Date: 2026-10-18
+Version: 1.0
+Status: Ready to deliver to customers
+Description: This script propagates uncertain parameters through the pendulum with batched Monte Carlo runs.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from ensemble import PendulumEnsemble
+
+# Ensemble parameters in the order they are sampled, so a seed always gives the same members
+PARAMETERS = ('mass1', 'mass2', 'length1', 'length2', 'angle1', 'angle2', 'velocity1', 'velocity2', 'g')
+DEFAULT_RANGES = ((-2 * np.pi, 2 * np.pi), (-2 * np.pi, 2 * np.pi), (-20.0, 20.0), (-20.0, 20.0))
+
+class Normal:
+
+    def __init__(self, mean, std):
+        """Initialize a normal distribution."""
+        self.mean = mean
+        self.std = std
+
+    def sample(self, rng, n):
+        return rng.normal(self.mean, self.std, n)
+
+class Uniform:
+
+    def __init__(self, low, high):
+        """Initialize a uniform distribution on [low, high)."""
+        self.low = low
+        self.high = high
+
+    def sample(self, rng, n):
+        return rng.uniform(self.low, self.high, n)
+
+class OnlineStatistics:
+
+    def __init__(self, n_samples, ranges=DEFAULT_RANGES, bins=400):
+        """
+        Initialize running statistics of the (N, 4) states at each of n_samples time samples: the count,
+        mean and sum of squared deviations (M2), plus a histogram per sample and column with fixed edges
+        over ranges as the quantile sketch. Values outside a range fall into an under- or overflow bin,
+        so quantiles there are clamped to the range; memory does not depend on the number of members.
+        """
+        self.ranges = np.asarray(ranges, dtype=float)
+        self.bins = bins
+        self.count = np.zeros(n_samples, dtype=np.int64)
+        self.mean = np.zeros((n_samples, 4))
+        self.m2 = np.zeros((n_samples, 4))
+        self.histogram = np.zeros((n_samples, 4, bins + 2), dtype=np.int64)
+
+    def update(self, index, states):
+        """Add the (N, 4) states of a batch at time sample index (Chan's merge of the batch moments)."""
+        states = np.asarray(states, dtype=np.float64)
+        n = len(states)
+        if n == 0:
+            return
+        batch_mean = states.mean(axis=0)
+        batch_m2 = ((states - batch_mean)**2).sum(axis=0)
+        self._merge_moments(index, n, batch_mean, batch_m2)
+
+        low, high = self.ranges[:, 0], self.ranges[:, 1]
+        position = np.floor((states - low) / (high - low) * self.bins)
+        # Bin 0 is the underflow and bin bins + 1 the overflow (NaN from a diverged member counts as overflow)
+        position = np.clip(np.nan_to_num(position, nan=self.bins), -1, self.bins).astype(np.int64) + 1
+        flat = position + np.arange(4) * (self.bins + 2)
+        self.histogram[index] += np.bincount(flat.ravel(), minlength=4 * (self.bins + 2)).reshape(4, -1)
+
+    def _merge_moments(self, index, n, mean, m2):
+        count = self.count[index]
+        total = count + n
+        delta = mean - self.mean[index]
+        self.mean[index] += delta * (n / total)
+        self.m2[index] += m2 + delta**2 * (count * n / total)
+        self.count[index] = total
+
+    def merge(self, other):
+        """Merge the statistics of another run over the same time samples, ranges and bins."""
+        if self.histogram.shape != other.histogram.shape or not np.array_equal(self.ranges, other.ranges):
+            raise ValueError("Only statistics with the same samples, ranges and bins can be merged.")
+        for index in np.flatnonzero(other.count):
+            self._merge_moments(index, other.count[index], other.mean[index], other.m2[index])
+        self.histogram += other.histogram
+        return self
+
+    def variance(self, ddof=1):
+        """Get the (n_samples, 4) variance of the states."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.m2 / (self.count - ddof)[:, np.newaxis]
+
+    def std(self, ddof=1):
+        """Get the (n_samples, 4) standard deviation of the states."""
+        return np.sqrt(self.variance(ddof))
+
+    def quantile(self, q):
+        """Estimate the (n_samples, 4) q-quantile from the histograms, interpolating inside a bin."""
+        cumulative = np.cumsum(self.histogram, axis=-1)
+        target = q * self.count[:, np.newaxis, np.newaxis]
+        k = np.argmax(cumulative >= np.maximum(target, 1e-300), axis=-1)[..., np.newaxis]
+        before = np.take_along_axis(cumulative, k, axis=-1) - np.take_along_axis(self.histogram, k, axis=-1)
+        inside = np.take_along_axis(self.histogram, k, axis=-1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            fraction = np.where(inside > 0, (target - before) / inside, 0.0)
+        low, high = self.ranges[:, 0], self.ranges[:, 1]
+        value = low + (k[..., 0] - 1 + fraction[..., 0]) * (high - low) / self.bins
+        return np.clip(value, low, high)
+
+class MonteCarlo:
+
+    def __init__(self, distributions, dt=0.01, n_steps=1000, record_every=10, method='runge_kutta',
+                 batch_size=10000, seed=0, ranges=DEFAULT_RANGES, bins=400):
+        """
+        Initialize a Monte Carlo run. distributions maps PendulumEnsemble parameters (mass1, ..., g) to a
+        Normal, a Uniform (or any object with sample(rng, n)) or a constant; missing parameters keep the
+        defaults of DoublePendulum(1, 1, 1, 1, 0, 0, 0, 0). Statistics are kept every record_every steps.
+        """
+        unknown = set(distributions) - set(PARAMETERS)
+        if unknown:
+            raise ValueError(f"Unknown parameters: {', '.join(sorted(unknown))}.")
+        self.distributions = dict(distributions)
+        self.dt = dt
+        self.n_steps = n_steps
+        self.record_every = record_every
+        self.method = method
+        self.batch_size = batch_size
+        self.seed = seed
+        self.ranges = ranges
+        self.bins = bins
+
+    @property
+    def times(self):
+        """Times of the recorded samples."""
+        return np.arange(0, self.n_steps + 1, self.record_every) * self.dt
+
+    def sample(self, rng, n):
+        """Draw the parameters of n members as a dictionary of arrays (constants stay scalars)."""
+        defaults = {'mass1': 1.0, 'mass2': 1.0, 'length1': 1.0, 'length2': 1.0, 'angle1': 0.0, 'angle2': 0.0,
+                    'velocity1': 0.0, 'velocity2': 0.0, 'g': 9.81}
+        values = {}
+        for name in PARAMETERS:
+            distribution = self.distributions.get(name, defaults[name])
+            values[name] = distribution.sample(rng, n) if hasattr(distribution, 'sample') else distribution
+        return values
+
+    def run_batch(self, seed_sequence, n):
+        """Integrate one batch of n members as a vectorized ensemble and return its OnlineStatistics."""
+        rng = np.random.default_rng(seed_sequence)
+        ensemble = PendulumEnsemble(**self.sample(rng, n))
+        statistics = OnlineStatistics(len(self.times), self.ranges, self.bins)
+        statistics.update(0, ensemble.state)
+        for step in range(1, self.n_steps + 1):
+            ensemble.step(self.dt, self.method)
+            if step % self.record_every == 0:
+                statistics.update(step // self.record_every, ensemble.state)
+        return statistics
+
+    def run(self, n_members, workers=1):
+        """
+        Run n_members members in batches of batch_size and return the merged OnlineStatistics. Batch b
+        always draws from the b-th child of SeedSequence(seed) and batches are merged in order, so the
+        result does not depend on the number of worker processes.
+        """
+        sizes = [min(self.batch_size, n_members - start) for start in range(0, n_members, self.batch_size)]
+        seeds = np.random.SeedSequence(self.seed).spawn(len(sizes))
+        total = OnlineStatistics(len(self.times), self.ranges, self.bins)
+        if workers == 1:
+            for seed_sequence, n in zip(seeds, sizes):
+                total.merge(self.run_batch(seed_sequence, n))
+            return total
+
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # At most two batches per worker are in flight; the oldest is merged first
+            batches = iter(zip(seeds, sizes))
+            in_flight = deque()
+            for seed_sequence, n in batches:
+                in_flight.append(executor.submit(self.run_batch, seed_sequence, n))
+                if len(in_flight) >= 2 * workers:
+                    break
+            while in_flight:
+                total.merge(in_flight.popleft().result())
+                batch = next(batches, None)
+                if batch is not None:
+                    in_flight.append(executor.submit(self.run_batch, *batch))
+        return total
+
+#Example implementation
+def main():
+    import matplotlib.pyplot as plt
+    monte_carlo = MonteCarlo({'mass2': Normal(1.0, 0.05), 'length2': Normal(1.0, 0.02),
+                              'angle1': Normal(np.pi / 3, 0.01), 'angle2': Normal(np.pi / 6, 0.01)},
+                             dt=0.01, n_steps=1000, record_every=5, batch_size=5000)
+    statistics = monte_carlo.run(20000, workers=None)
+    times = monte_carlo.times
+    plt.fill_between(times, statistics.quantile(0.05)[:, 1], statistics.quantile(0.95)[:, 1], alpha=0.3,
+                     label='Angle 2, 5% to 95%')
+    plt.plot(times, statistics.mean[:, 1], label='Angle 2, mean')
+    plt.xlabel('Time (s)')
+    plt.ylabel('Angle (rad)')
+    plt.title('Uncertainty Propagation of the Double Pendulum')
+    plt.legend()
+    plt.show()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""
+File name: nlink.py
+Author: Troy Chin (CWID: 885586685)
+Date: 2026-10-18
+Version: 1.0
+Status: Ready to deliver to customers
+Description: This script models a planar chain of N point masses on rigid massless rods with O(N) dynamics.
+"""
+
+import numpy as np
+
+def solve_tridiagonal(lower, diagonal, upper, rhs):
+    """
+    Solve a tridiagonal system with the Thomas algorithm in O(N). lower[i] multiplies x[i] in row i + 1
+    and upper[i] multiplies x[i + 1] in row i, so both have one entry fewer than diagonal.
+    """
+    n = len(diagonal)
+    c = np.empty(n)
+    d = np.empty(n)
+    c[0] = upper[0] / diagonal[0] if n > 1 else 0.0
+    d[0] = rhs[0] / diagonal[0]
+    for i in range(1, n):
+        denominator = diagonal[i] - lower[i - 1] * c[i - 1]
+        if i < n - 1:
+            c[i] = upper[i] / denominator
+        d[i] = (rhs[i] - lower[i - 1] * d[i - 1]) / denominator
+    x = d
+    for i in range(n - 2, -1, -1):
+        x[i] -= c[i] * x[i + 1]
+    return x
+
+class NLinkPendulum:
+
+    def __init__(self, masses, lengths, angles, velocities, g=9.81):
+        """
+        Initialize a chain of len(masses) links. Link i hangs from bob i - 1 (the pivot for the first link);
+        angles are measured from the downward vertical like DoublePendulum.angle1 and angle2.
+        """
+        self.masses = np.asarray(masses, dtype=float)
+        self.lengths = np.asarray(lengths, dtype=float)
+        self.angles = np.asarray(angles, dtype=float)
+        self.velocities = np.asarray(velocities, dtype=float)
+        self.n_links = len(self.masses)
+        if not (len(self.lengths) == len(self.angles) == len(self.velocities) == self.n_links):
+            raise ValueError("masses, lengths, angles and velocities must all have one entry per link.")
+        self.g = g  # Gravitational constant
+        # Mass carried below each joint: the sum of masses[i:]
+        self.suffix_masses = np.cumsum(self.masses[::-1])[::-1]
+
+    @classmethod
+    def from_double_pendulum(cls, pendulum):
+        """Build the two-link chain equivalent to a DoublePendulum."""
+        return cls([pendulum.mass1, pendulum.mass2], [pendulum.length1, pendulum.length2],
+                   [pendulum.angle1, pendulum.angle2], [pendulum.velocity1, pendulum.velocity2], g=pendulum.g)
+
+    def compute_state(self):
+        """Compute the current state [angles..., velocities...] (DoublePendulum's order for N = 2)."""
+        return np.concatenate([self.angles, self.velocities])
+
+    def set_state(self, state):
+        """Set the angles and angular velocities from a state."""
+        state = np.asarray(state, dtype=float)
+        self.angles = state[:self.n_links].copy()
+        self.velocities = state[self.n_links:].copy()
+
+    def equations_of_motion(self, t, state):
+        """
+        Compute the state derivative in O(N). The rod tensions satisfy a symmetric tridiagonal system
+        (each rod's length is constant, so the bobs at its ends share their acceleration along it),
+        which is solved with the Thomas algorithm; the angular accelerations follow from the tensions.
+        """
+        n = self.n_links
+        state = np.asarray(state, dtype=float)
+        angles, velocities = state[:n], state[n:]
+        m, l, g = self.masses, self.lengths, self.g
+
+        delta = np.diff(angles)  # angles[i + 1] - angles[i]
+        cos_delta = np.cos(delta)
+        sin_delta = np.sin(delta)
+        inverse_mass = 1 / m
+
+        diagonal = -inverse_mass.copy()
+        diagonal[1:] -= inverse_mass[:-1]
+        off_diagonal = cos_delta * inverse_mass[:-1]
+        rhs = -l * velocities**2
+        rhs[0] -= g * np.cos(angles[0])
+        tension = solve_tridiagonal(off_diagonal, diagonal, off_diagonal, rhs)
+
+        # Acceleration of each bob relative to the one above it, across its rod
+        transverse = np.zeros(n)
+        transverse[:-1] += tension[1:] * sin_delta * inverse_mass[:-1]
+        transverse[1:] -= tension[:-1] * sin_delta * inverse_mass[:-1]
+        transverse[0] -= g * np.sin(angles[0])
+        return np.concatenate([velocities, transverse / l])
+
+    def mass_matrix(self, state):
+        """Build the dense N x N mass matrix M[i, j] = suffix_mass[max(i, j)] * l[i] * l[j] * cos(angle i - angle j)."""
+        angles = np.asarray(state, dtype=float)[:self.n_links]
+        index = np.arange(self.n_links)
+        carried = self.suffix_masses[np.maximum.outer(index, index)]
+        return carried * np.outer(self.lengths, self.lengths) * np.cos(np.subtract.outer(angles, angles))
+
+    def generalized_forces(self, state):
+        """Compute the forcing terms f so that M(state) @ angular_accelerations = f."""
+        state = np.asarray(state, dtype=float)
+        angles, velocities = state[:self.n_links], state[self.n_links:]
+        index = np.arange(self.n_links)
+        carried = self.suffix_masses[np.maximum.outer(index, index)]
+        coupling = carried * np.outer(self.lengths, self.lengths) * np.sin(np.subtract.outer(angles, angles))
+        return -coupling @ velocities**2 - self.suffix_masses * self.g * self.lengths * np.sin(angles)
+
+    def get_positions(self, state=None):
+        """Get the (N, 2) bob positions of a state (the current one by default)."""
+        state = self.compute_state() if state is None else np.asarray(state, dtype=float)
+        angles = state[:self.n_links]
+        x = np.cumsum(self.lengths * np.sin(angles))
+        y = -np.cumsum(self.lengths * np.cos(angles))
+        return np.column_stack([x, y])
+
+    def kinetic_energy(self, state=None) -> float:
+        """Compute the kinetic energy from the bob velocities in O(N)."""
+        state = self.compute_state() if state is None else np.asarray(state, dtype=float)
+        angles, velocities = state[:self.n_links], state[self.n_links:]
+        vx = np.cumsum(self.lengths * velocities * np.cos(angles))
+        vy = np.cumsum(self.lengths * velocities * np.sin(angles))
+        return 0.5 * float(np.sum(self.masses * (vx**2 + vy**2)))
+
+    def potential_energy(self, state=None) -> float:
+        """Compute the potential energy (zero with every bob hanging at rest)."""
+        state = self.compute_state() if state is None else np.asarray(state, dtype=float)
+        heights = np.cumsum(self.lengths * (1 - np.cos(state[:self.n_links])))
+        return float(np.sum(self.masses * self.g * heights))
+
+    def total_energy(self, state=None) -> float:
+        """Calculate the net energy of the system."""
+        return self.kinetic_energy(state) + self.potential_energy(state)
+
+#Example implementation
+def main():
+    from numerical_methods import NumericalMethods
+    chain = NLinkPendulum([1.0, 1.0, 1.0], [1.0, 1.0, 1.0], [np.pi / 2, np.pi / 2, np.pi / 2], [0.0, 0.0, 0.0])
+    trajectory = NumericalMethods(dt=0.001).integrate(chain.equations_of_motion, chain.compute_state(),
+                                                      (0.0, 5.0), 5000)
+    energy = [chain.total_energy(state) for state in trajectory]
+    print(f"Triple pendulum: final angles {trajectory[-1][:3]}, energy drift {energy[-1] - energy[0]:.2e}")
+
+if __name__ == '__main__':
+    main()
@@ -9,12 +9,14 @@ Description: This script contains the numerical methods implemented in this lab.
 
 # Import numerical methods here.
 
-import matplotlib.pyplot as plt
+import numpy as np
 
 class NumericalMethods:
     
-    def __init__(self, dt=0.01):
+    def __init__(self, dt=0.01, instrumentation=None):
         self.dt = dt
+        self.instrumentation = instrumentation  # Optional Instrumentation; None costs nothing
+        self._adaptive_run = None  # Dormand-Prince solver continued by consecutive adaptive_runge_kutta calls
 
     def euler_method(self, func, y0):
         """Function for solving ODEs using Euler's Method."""
@@ -30,29 +32,31 @@ class NumericalMethods:
         return [yi + (self.dt / 6) * (k1i + 2 * k2i + 2 * k3i + k4i) for yi, k1i, k2i, k3i, k4i in zip(y0, k1, k2, k3, k4)]
 
     def adaptive_runge_kutta(self, func, y0, tolerance=1e-6):
-        """Function for solving ODEs using Adaptive Runge-Kutta Method."""
-        h = self.dt
-        y = y0
-        error = tolerance + 1
-
-        while error > tolerance:
-            k1 = func(0, y)
-            k2 = func(0, [yi + 0.25 * h * k1i for yi, k1i in zip(y, k1)])
-            k3 = func(0, [yi + (3/32) * h * k1i + (9/32) * h * k2i for yi, k1i, k2i in zip(y, k1, k2)])
-            k4 = func(0, [yi + (1932/2197) * h * k1i - (7200/2197) * h * k2i + (7296/2197) * h * k3i for yi, k1i, k2i, k3i in zip(y, k1, k2, k3)])
-            k5 = func(0, [yi + (439/216) * h * k1i - 8 * h * k2i + (3680/513) * h * k3i - (845/4104) * h * k4i for yi, k1i, k2i, k3i, k4i in zip(y, k1, k2, k3, k4)])
-            k6 = func(0, [yi - (8/27) * h * k1i + 2 * h * k2i - (3544/2565) * h * k3i + (1859/4104) * h * k4i - (11/40) * h * k5i for yi, k1i, k2i, k3i, k4i, k5i in zip(y, k1, k2, k3, k4, k5)])
-
-            y4 = [yi + h * ((25/216) * k1i + (1408/2565) * k3i + (2197/4104) * k4i - (1/5) * k5i) for yi, k1i, k3i, k4i, k5i in zip(y, k1, k3, k4, k5)]
-            y5 = [yi + h * ((16/135) * k1i + (6656/12825) * k3i + (28561/56430) * k4i - (9/50) * k5i + (2/55) * k6i) for yi, k1i, k3i, k4i, k5i, k6i in zip(y, k1, k3, k4, k5, k6)]
-
-            error = max(abs(y5i - y4i) for y5i, y4i in zip(y5, y4))
-            if error > tolerance:
-                h *= 0.9 * (tolerance / error) ** 0.2
-            else:
-                y = y5
+        """
+        Function for advancing y0 by dt with the adaptive Dormand-Prince solver. The solver is kept
+        between calls: when the next call continues from the state this one returned (same func and
+        tolerance), it carries on with its accepted step size and FSAL stage instead of restarting.
+        """
+        y0 = np.asarray(y0, dtype=float)
+        run = self._adaptive_run
+        if (run is None or run['func'] != func or run['tolerance'] != tolerance
+                or not np.array_equal(run['y'], y0)):
+            rhs = func if self.instrumentation is None else self.instrumentation.wrap_rhs(func)
+            run = {'func': func, 'tolerance': tolerance, 'steps': 0, 'y': y0,
+                   'solver': DormandPrince(rhs, 0.0, y0, rtol=tolerance, atol=tolerance)}
+            self._adaptive_run = run
 
-        return y
+        solver = run['solver']
+        rejected = solver.n_rejected
+        # Output times are multiples of dt, as in integrate(..., t_span=None)
+        t = (run['steps'] + 1) * self.dt
+        while solver.t < t:
+            solver.step()
+        if self.instrumentation is not None:
+            self.instrumentation.count('rejected_steps', solver.n_rejected - rejected)
+        run['steps'] += 1
+        run['y'] = solver.dense_output(t)
+        return list(run['y'])
 
     def midpoint_method(self, func, y0):
         """Function for solving ODEs using the Midpoint Method."""
@@ -61,21 +65,534 @@ class NumericalMethods:
         dydt_mid = func(0, y_mid)
         return [yi + self.dt * dyi_mid for yi, dyi_mid in zip(y0, dydt_mid)]
 
+    def implicit_midpoint(self, func, y0, tolerance=1e-12, max_iterations=100):
+        """Function for solving ODEs using the (symplectic) Implicit Midpoint Method."""
+        return list(self._implicit_midpoint_step(func, y0, self.dt, tolerance, max_iterations))
+
+    def stormer_verlet(self, func, y0, tolerance=1e-12, max_iterations=100):
+        """Function for solving Hamiltonian ODEs [q, p] using the Störmer-Verlet (leapfrog) Method."""
+        return list(self._stormer_verlet_step(func, y0, self.dt, tolerance, max_iterations))
+
+    def yoshida(self, func, y0, tolerance=1e-12, max_iterations=100):
+        """Function for solving Hamiltonian ODEs [q, p] using Yoshida's 4th order composition of Störmer-Verlet."""
+        return list(self._yoshida_step(func, y0, self.dt, tolerance, max_iterations))
+
+    # Triple-jump weights that raise the symmetric 2nd order Störmer-Verlet step to 4th order
+    YOSHIDA_WEIGHTS = (1 / (2 - 2 ** (1 / 3)), -2 ** (1 / 3) / (2 - 2 ** (1 / 3)), 1 / (2 - 2 ** (1 / 3)))
+
+    def _fixed_point(self, update, guess, tolerance, max_iterations):
+        """Iterate x = update(x) until successive iterates agree to within the tolerance."""
+        for _ in range(max_iterations):
+            new = update(guess)
+            if np.max(np.abs(new - guess)) <= tolerance * (1 + np.max(np.abs(new))):
+                return new
+            guess = new
+        raise RuntimeError("Implicit step did not converge. Try a smaller dt.")
+
+    def _implicit_midpoint_step(self, func, y0, h, tolerance=1e-12, max_iterations=100):
+        """Solve y1 = y0 + h * f((y0 + y1) / 2) for y1 by fixed-point iteration."""
+        y0 = np.asarray(y0, dtype=float)
+        guess = y0 + h * np.asarray(func(0, y0))
+        return self._fixed_point(lambda y1: y0 + h * np.asarray(func(0, 0.5 * (y0 + y1))),
+                                 guess, tolerance, max_iterations)
+
+    def _stormer_verlet_step(self, func, y0, h, tolerance=1e-12, max_iterations=100):
+        """Take one generalized leapfrog step; func must return [dH/dp, -dH/dq] for the state [q, p]."""
+        y0 = np.asarray(y0, dtype=float)
+        n = y0.shape[-1] // 2
+        q0, p0 = y0[..., :n], y0[..., n:]
+
+        def rhs(q, p):
+            derivative = np.asarray(func(0, np.concatenate([q, p], axis=-1)))
+            return derivative[..., :n], derivative[..., n:]
+
+        # Half kick (implicit in the momenta), full drift (implicit in the coordinates), half kick
+        p_half = self._fixed_point(lambda p: p0 + 0.5 * h * rhs(q0, p)[1],
+                                   p0 + 0.5 * h * rhs(q0, p0)[1], tolerance, max_iterations)
+        q_dot0 = rhs(q0, p_half)[0]
+        q1 = self._fixed_point(lambda q: q0 + 0.5 * h * (q_dot0 + rhs(q, p_half)[0]),
+                               q0 + h * q_dot0, tolerance, max_iterations)
+        p1 = p_half + 0.5 * h * rhs(q1, p_half)[1]
+        return np.concatenate([q1, p1], axis=-1)
+
     def solve_ode(self, func, y0, method='runge_kutta', tolerance=1e-6):
+        if method == 'adaptive_runge_kutta':
+            # Wraps func itself, once per run, so the solver can recognise the run it continues
+            if self.instrumentation is not None:
+                self.instrumentation.count('steps')
+            return self.adaptive_runge_kutta(func, y0, tolerance)
+        if self.instrumentation is not None:
+            func = self.instrumentation.wrap_rhs(func)
+            self.instrumentation.count('steps')
         if method == 'euler':
             return self.euler_method(func, y0)
         elif method == 'runge_kutta':
             return self.runge_kutta(func, y0)
-        elif method == 'adaptive_runge_kutta':
-            return self.adaptive_runge_kutta(func, y0, tolerance)
         elif method == 'midpoint':
             return self.midpoint_method(func, y0)
+        elif method == 'implicit_midpoint':
+            return self.implicit_midpoint(func, y0)
+        elif method == 'stormer_verlet':
+            return self.stormer_verlet(func, y0)
+        elif method == 'yoshida':
+            return self.yoshida(func, y0)
+        else:
+            raise ValueError("Unknown method. Choose 'euler', 'runge_kutta', 'adaptive_runge_kutta', 'midpoint', "
+                             "'implicit_midpoint', 'stormer_verlet', or 'yoshida'.")
+
+    def integrate(self, func, y0, t_span, n_steps, method='runge_kutta', out=None, tolerance=1e-6):
+        """
+        Integrate over t_span and return the (n_steps + 1, len(y0)) trajectory at n_steps equal intervals.
+        With t_span=None the run starts at t=0 and steps by exactly self.dt, so runs split into
+        pieces take bit-for-bit the same steps as one long run.
+        """
+        if self.instrumentation is None:
+            return self._integrate(func, y0, t_span, n_steps, method, out, tolerance)
+        with self.instrumentation.phase('integrate'):
+            out = self._integrate(self.instrumentation.wrap_rhs(func), y0, t_span, n_steps, method, out, tolerance)
+        self.instrumentation.count('steps', n_steps)
+        return out
+
+    def _steppers(self, method):
+        """Get the in-place stepper of a fixed-step method (None for the adaptive method)."""
+        steppers = {
+            'euler': self._euler_step,
+            'runge_kutta': self._runge_kutta_step,
+            'midpoint': self._midpoint_step,
+            'implicit_midpoint': self._implicit_step(self._implicit_midpoint_step),
+            'stormer_verlet': self._implicit_step(self._stormer_verlet_step),
+            'yoshida': self._implicit_step(self._yoshida_step),
+        }
+        if method not in steppers and method != 'adaptive_runge_kutta':
+            raise ValueError("Unknown method. Choose 'euler', 'runge_kutta', 'adaptive_runge_kutta', 'midpoint', "
+                             "'implicit_midpoint', 'stormer_verlet', or 'yoshida'.")
+        return steppers.get(method)
+
+    def _time_grid(self, t_span, n_steps):
+        """Get the start time, end time and step of a run (see integrate for t_span=None)."""
+        if t_span is None:
+            return 0.0, n_steps * self.dt, self.dt
+        t0, t1 = t_span
+        return t0, t1, (t1 - t0) / n_steps
+
+    def _integrate(self, func, y0, t_span, n_steps, method, out, tolerance):
+        stepper = self._steppers(method)
+        t0, t1, h = self._time_grid(t_span, n_steps)
+        y0 = np.asarray(y0, dtype=float)
+        if out is None:
+            out = np.empty((n_steps + 1,) + y0.shape)
+        elif out.shape != (n_steps + 1,) + y0.shape:
+            raise ValueError("Output array must have shape (n_steps + 1,) + y0.shape.")
+
+        if method == 'adaptive_runge_kutta':
+            # The adaptive solver chooses its own steps; output times are sampled by dense output
+            solver = DormandPrince(func, t0, y0, rtol=tolerance, atol=tolerance, t_bound=t1)
+            out[0] = y0
+            for i in range(1, n_steps + 1):
+                t = t0 + i * h
+                while solver.t < min(t, t1):
+                    solver.step()
+                out[i] = solver.dense_output(t)
+            if self.instrumentation is not None:
+                self.instrumentation.count('rejected_steps', solver.n_rejected)
+            return out
+
+        # Stage buffers are allocated once and reused by every step
+        k = np.empty((4,) + y0.shape)
+        tmp = np.empty_like(y0)
+
+        out[0] = y0
+        for i in range(n_steps):
+            stepper(func, t0 + i * h, out[i], h, out[i + 1], k, tmp)
+        return out
+
+    def detect_events(self, func, y0, t_span, n_steps, events, method='runge_kutta', tolerance=1e-6):
+        """
+        Integrate like integrate() but keep only the states where an event function crosses zero.
+        Each crossing is located inside its step by root-finding on an interpolant (cubic Hermite
+        for the fixed-step methods, dense output for the adaptive method), so the trajectory itself
+        is never stored. events are Event instances or plain functions event(t, y). Returns an
+        EventLog; the run stops early at the first terminal event.
+        """
+        events = [event if isinstance(event, Event) else Event(event) for event in events]
+        if self.instrumentation is None:
+            return self._detect_events(func, y0, t_span, n_steps, events, method, tolerance)
+        with self.instrumentation.phase('integrate'):
+            log = self._detect_events(self.instrumentation.wrap_rhs(func), y0, t_span, n_steps, events, method,
+                                      tolerance)
+        self.instrumentation.count('events', len(log))
+        return log
+
+    def _detect_events(self, func, y0, t_span, n_steps, events, method, tolerance):
+        stepper = self._steppers(method)
+        t0, t1, h = self._time_grid(t_span, n_steps)
+        y = np.array(y0, dtype=float)
+        log = EventLog()
+        values = [event(t0, y) for event in events]
+
+        if stepper is None:
+            solver = DormandPrince(func, t0, y, rtol=tolerance, atol=tolerance, t_bound=t1)
+            while solver.t < t1:
+                solver.step()
+                new_values = [event(solver.t, solver.y) for event in events]
+                if log.record(events, solver.t_old, solver.t, values, new_values, solver.dense_output):
+                    return log
+                values = new_values
+            log.finish(solver.t, solver.y)
+            return log
+
+        k = np.empty((4,) + y.shape)
+        tmp = np.empty_like(y)
+        y_next = np.empty_like(y)
+        for i in range(n_steps):
+            t, t_next = t0 + i * h, t0 + (i + 1) * h
+            stepper(func, t, y, h, y_next, k, tmp)
+            new_values = [event(t_next, y_next) for event in events]
+            if any(event.crossed(old, new) for event, old, new in zip(events, values, new_values)):
+                interpolant = _hermite(t, y.copy(), func(t, y), t_next, y_next.copy(), func(t_next, y_next))
+                if log.record(events, t, t_next, values, new_values, interpolant):
+                    return log
+            y, y_next = y_next, y
+            values = new_values
+        log.finish(t0 + n_steps * h, y)
+        return log
+
+    def _yoshida_step(self, func, y0, h, tolerance=1e-12, max_iterations=100):
+        """Compose three Störmer-Verlet steps into one 4th order symplectic step."""
+        y = y0
+        for weight in self.YOSHIDA_WEIGHTS:
+            y = self._stormer_verlet_step(func, y, weight * h, tolerance, max_iterations)
+        return y
+
+    def _implicit_step(self, step):
+        """Adapt a step function returning the new state to the in-place stepper signature of integrate."""
+        def stepper(func, t, y, h, y_next, k, tmp):
+            y_next[...] = step(func, y, h)
+        return stepper
+
+    def _euler_step(self, func, t, y, h, y_next, k, tmp):
+        """Write one Euler step from y into y_next."""
+        k[0] = func(t, y)
+        np.multiply(k[0], h, out=y_next)
+        y_next += y
+
+    def _runge_kutta_step(self, func, t, y, h, y_next, k, tmp):
+        """Write one Runge-Kutta (Order 4) step from y into y_next."""
+        k[0] = func(t, y)
+        np.multiply(k[0], 0.5 * h, out=tmp)
+        tmp += y
+        k[1] = func(t + 0.5 * h, tmp)
+        np.multiply(k[1], 0.5 * h, out=tmp)
+        tmp += y
+        k[2] = func(t + 0.5 * h, tmp)
+        np.multiply(k[2], h, out=tmp)
+        tmp += y
+        k[3] = func(t + h, tmp)
+
+        # y + (h / 6) * (k1 + 2 * k2 + 2 * k3 + k4), accumulated in place
+        np.multiply(k[1], 2, out=y_next)
+        y_next += k[0]
+        np.multiply(k[2], 2, out=tmp)
+        y_next += tmp
+        y_next += k[3]
+        y_next *= h / 6
+        y_next += y
+
+    def _midpoint_step(self, func, t, y, h, y_next, k, tmp):
+        """Write one Midpoint step from y into y_next."""
+        k[0] = func(t, y)
+        np.multiply(k[0], 0.5 * h, out=tmp)
+        tmp += y
+        k[1] = func(t + 0.5 * h, tmp)
+        np.multiply(k[1], h, out=y_next)
+        y_next += y
+
+class Event:
+
+    def __init__(self, function, direction=0, terminal=False, condition=None):
+        """
+        Initialize an event at the zeros of function(t, y). direction=1 only counts crossings from
+        negative to positive, -1 the opposite and 0 both. A terminal event stops the run. condition(t, y),
+        if given, must also hold at the located event state for it to count.
+        """
+        self.function = function
+        self.direction = direction
+        self.terminal = terminal
+        self.condition = condition
+
+    def __call__(self, t, y):
+        return self.function(t, y)
+
+    def crossed(self, old, new):
+        """Check whether the event value changed sign in the permitted direction."""
+        up = old < 0 <= new
+        down = old > 0 >= new
+        return up if self.direction > 0 else down if self.direction < 0 else up or down
+
+    def locate(self, interpolant, t_a, t_b, g_a, g_b, xtol=1e-12, max_iterations=100):
+        """Find the event time in [t_a, t_b] with the Illinois variant of regula falsi."""
+        side = 0
+        t_previous = t_a
+        for _ in range(max_iterations):
+            t = (t_a * g_b - t_b * g_a) / (g_b - g_a)
+            g = self.function(t, interpolant(t))
+            if g == 0 or abs(t - t_previous) <= xtol * max(1.0, abs(t)):
+                break
+            t_previous = t
+            # Halve the value at an end point that is kept twice in a row, so both ends converge
+            if (g > 0) == (g_b > 0):
+                t_b, g_b = t, g
+                if side == -1:
+                    g_a *= 0.5
+                side = -1
+            else:
+                t_a, g_a = t, g
+                if side == 1:
+                    g_b *= 0.5
+                side = 1
+        return t
+
+class EventLog:
+
+    def __init__(self):
+        """Initialize an empty record of event times, states and the index of the event that fired."""
+        self.times = []
+        self.states = []
+        self.events = []
+        self.terminated = False
+        self.t = None  # Time and state where the run stopped
+        self.y = None
+
+    def __len__(self):
+        return len(self.times)
+
+    def record(self, events, t_a, t_b, values, new_values, interpolant):
+        """Locate and keep the events of one step in time order; return True if a terminal event fired."""
+        found = []
+        for index, (event, old, new) in enumerate(zip(events, values, new_values)):
+            if event.crossed(old, new):
+                t = event.locate(interpolant, t_a, t_b, old, new)
+                y = interpolant(t)
+                if event.condition is None or event.condition(t, y):
+                    found.append((t, index, y))
+        for t, index, y in sorted(found, key=lambda item: item[0]):
+            self.times.append(t)
+            self.states.append(np.array(y))
+            self.events.append(index)
+            if events[index].terminal:
+                self.terminated = True
+                self.finish(t, y)
+                return True
+        return False
+
+    def finish(self, t, y):
+        """Store the final time and state and turn the records into arrays."""
+        self.t = t
+        self.y = np.array(y)
+        self.times = np.array(self.times)
+        self.states = np.array(self.states).reshape((len(self.times),) + self.y.shape)
+        self.events = np.array(self.events, dtype=int)
+
+    def of(self, index):
+        """Get (times, states) of one event."""
+        mask = self.events == index
+        return self.times[mask], self.states[mask]
+
+def _hermite(t_a, y_a, f_a, t_b, y_b, f_b):
+    """Build the cubic Hermite interpolant of a step from its end states and derivatives."""
+    h = t_b - t_a
+    f_a, f_b = np.asarray(f_a), np.asarray(f_b)
+
+    def interpolant(t):
+        x = (t - t_a) / h
+        return ((2 * x**3 - 3 * x**2 + 1) * y_a + (x**3 - 2 * x**2 + x) * h * f_a +
+                (-2 * x**3 + 3 * x**2) * y_b + (x**3 - x**2) * h * f_b)
+    return interpolant
+
+def poincare_section(angle=0, value=0.0, direction=1, terminal=False):
+    """
+    Event for the Poincaré section angle = value (mod 2 pi) crossed with a positive (direction=1),
+    negative (direction=-1) or either (direction=0) angular velocity; angle 0 is angle1 and 1 is angle2.
+    """
+    velocity = angle + 2
+    return Event(lambda t, y: np.sin(y[angle] - value), 0, terminal,
+                 lambda t, y: np.cos(y[angle] - value) > 0 and
+                 (direction * y[velocity] > 0 if direction else y[velocity] != 0))
+
+def flip_event(arm=None, terminal=True):
+    """Event for an arm flipping over the top (|angle| > pi), as in chaos_map; arm None watches both."""
+    if arm is None:
+        return Event(lambda t, y: np.pi - max(abs(y[0]), abs(y[1])), -1, terminal)
+    return Event(lambda t, y: np.pi - abs(y[arm]), -1, terminal)
+
+class DormandPrince:
+    """Stateful Dormand-Prince 5(4) solver that carries its step size from one step to the next."""
+
+    # Butcher tableau of the Dormand-Prince pair
+    C = np.array([0, 1/5, 3/10, 4/5, 8/9, 1, 1])
+    A = [
+        [],
+        [1/5],
+        [3/40, 9/40],
+        [44/45, -56/15, 32/9],
+        [19372/6561, -25360/2187, 64448/6561, -212/729],
+        [9017/3168, -355/33, 46732/5247, 49/176, -5103/18656],
+    ]
+    B = np.array([35/384, 0, 500/1113, 125/192, -2187/6784, 11/84, 0])
+    # Difference between the 5th and embedded 4th order weights
+    E = np.array([71/57600, 0, -71/16695, 71/1920, -17253/339200, 22/525, -1/40])
+    # Coefficients of the 4th order continuous extension (powers 1 to 4 of the step fraction)
+    P = np.array([
+        [1, -8048581381/2820520608, 8663915743/2820520608, -12715105075/11282082432],
+        [0, 0, 0, 0],
+        [0, 131558114200/32700410799, -68118460800/10900136933, 87487479700/32700410799],
+        [0, -1754552775/470086768, 14199869525/1410260304, -10690763975/1880347072],
+        [0, 127303824393/49829197408, -318862633887/49829197408, 701980252875/199316789632],
+        [0, -282668133/205662961, 2019193451/616988883, -1453857185/822651844],
+        [0, 40617522/29380423, -110615467/29380423, 69997945/29380423],
+    ])
+
+    def __init__(self, func, t0, y0, rtol=1e-6, atol=1e-9, h0=None, t_bound=np.inf,
+                 safety=0.9, min_factor=0.2, max_factor=10.0):
+        """Initialize the solver at (t0, y0); h0 is estimated from the ODE when not given."""
+        if not (np.isfinite(rtol) and rtol > 0 and np.isfinite(atol) and atol > 0):
+            raise ValueError("rtol and atol must be positive finite numbers.")
+        self.func = func
+        self.t = t0
+        self.y = np.array(y0, dtype=float)
+        self.rtol = rtol
+        self.atol = atol
+        self.t_bound = t_bound
+        self.safety = safety
+        self.min_factor = min_factor
+        self.max_factor = max_factor
+
+        self.n_fev = 0
+        self.n_accepted = 0
+        self.n_rejected = 0
+
+        # Stage derivatives; K[0] always holds f(t, y) thanks to the FSAL property
+        self.K = np.empty((7,) + self.y.shape)
+        self.K[0] = self._eval(self.t, self.y)
+        self._K_last = np.empty_like(self.K)
+        self.h = self._initial_step() if h0 is None else h0
+
+        # Last accepted step, used by dense_output()
+        self.t_old = self.t
+        self.y_old = self.y.copy()
+        self.h_last = 0.0
+
+    def _eval(self, t, y):
+        """Evaluate the right-hand side and count the call."""
+        self.n_fev += 1
+        return self.func(t, y)
+
+    def _error_norm(self, error, y_new):
+        """Compute the RMS of the error scaled by the mixed tolerance."""
+        scale = self.atol + self.rtol * np.maximum(np.abs(self.y), np.abs(y_new))
+        return np.sqrt(np.mean((error / scale) ** 2))
+
+    def _initial_step(self):
+        """Estimate a starting step size from the local scale of y and its derivatives."""
+        scale = self.atol + self.rtol * np.abs(self.y)
+        d0 = np.sqrt(np.mean((self.y / scale) ** 2))
+        d1 = np.sqrt(np.mean((self.K[0] / scale) ** 2))
+        h0 = 1e-6 if d0 < 1e-5 or d1 < 1e-5 else 0.01 * d0 / d1
+        h0 = min(h0, self.t_bound - self.t)
+
+        f1 = np.asarray(self._eval(self.t + h0, self.y + h0 * self.K[0]))
+        d2 = np.sqrt(np.mean(((f1 - self.K[0]) / scale) ** 2)) / h0
+        if d1 <= 1e-15 and d2 <= 1e-15:
+            h1 = max(1e-6, h0 * 1e-3)
+        else:
+            h1 = (0.01 / max(d1, d2)) ** (1 / 5)
+        return min(100 * h0, h1, self.t_bound - self.t)
+
+    def step(self):
+        """Take one accepted step, shrinking the trial step until the error is within tolerance."""
+        if self.t >= self.t_bound:
+            raise RuntimeError("The solver has already reached t_bound.")
+
+        K = self.K
+        h = min(self.h, self.t_bound - self.t)
+        rejected = False
+        while True:
+            for i in range(1, 6):
+                dy = np.tensordot(self.A[i], K[:i], axes=1)
+                K[i] = self._eval(self.t + self.C[i] * h, self.y + h * dy)
+            y_new = self.y + h * np.tensordot(self.B[:6], K[:6], axes=1)
+            # K[6] is f(t + h, y_new) and becomes K[0] of the next step
+            K[6] = self._eval(self.t + h, y_new)
+            error = self._error_norm(h * np.tensordot(self.E, K, axes=1), y_new)
+
+            if error <= 1:
+                break
+            if not np.isfinite(error) and not (np.all(np.isfinite(self.y)) and np.all(np.isfinite(K[0]))):
+                raise RuntimeError(f"The solution is no longer finite at t={self.t}.")
+            self.n_rejected += 1
+            rejected = True
+            # A non-finite error from a finite state means the trial step overflowed; cut it hard
+            h *= max(self.min_factor, self.safety * error ** -0.2) if np.isfinite(error) else self.min_factor
+            if h < 10 * np.spacing(abs(self.t)):
+                raise RuntimeError(f"Step size underflow at t={self.t}; the solution may blow up there "
+                                   "or the tolerance is too tight.")
+
+        # Grow (or shrink) the step for next time; do not grow right after a rejection
+        if error == 0:
+            factor = self.max_factor
         else:
-            raise ValueError("Unknown method. Choose 'euler', 'runge_kutta', 'adaptive_runge_kutta', or 'midpoint'.")
+            factor = min(self.max_factor, self.safety * error ** -0.2)
+        if rejected:
+            factor = min(1.0, factor)
+
+        self.t_old, self.y_old, self.h_last = self.t, self.y, h
+        self.t = self.t + h
+        self.y = y_new
+        self.h = h * factor
+        self.n_accepted += 1
+
+        # Keep this step's stages for dense output and start the next step from the FSAL stage
+        self.K, self._K_last = self._K_last, K
+        self.K[0] = K[6]
+        return self.t, self.y
+
+    def dense_output(self, t):
+        """Interpolate the solution at a time inside the last accepted step."""
+        if self.h_last == 0:
+            return self.y.copy()
+        x = (t - self.t_old) / self.h_last
+        weights = self.P @ np.array([x, x**2, x**3, x**4])
+        return self.y_old + self.h_last * np.tensordot(weights, self._K_last, axes=1)
+
+    def get_state(self):
+        """Get everything needed to continue this solver exactly where it is (see set_state)."""
+        return {
+            't': self.t, 'y': self.y.copy(), 'h': self.h,
+            't_old': self.t_old, 'y_old': self.y_old.copy(), 'h_last': self.h_last,
+            'K': self.K.copy(), 'K_last': self._K_last.copy(),
+            'n_fev': self.n_fev, 'n_accepted': self.n_accepted, 'n_rejected': self.n_rejected,
+        }
+
+    def set_state(self, state):
+        """Restore a state saved by get_state, including the adaptive step size and the FSAL stage."""
+        self.t, self.h, self.t_old, self.h_last = (float(state[key]) for key in ('t', 'h', 't_old', 'h_last'))
+        self.y = np.array(state['y'], dtype=float)
+        self.y_old = np.array(state['y_old'], dtype=float)
+        self.K = np.array(state['K'], dtype=float)
+        self._K_last = np.array(state['K_last'], dtype=float)
+        self.n_fev, self.n_accepted, self.n_rejected = (int(state[key]) for key in ('n_fev', 'n_accepted', 'n_rejected'))
+
+    def solve(self, t_end):
+        """Step until t_end is reached and return the state interpolated at t_end."""
+        while self.t < t_end:
+            self.step()
+        return self.dense_output(t_end)
 
 #Example implementation            
 
 def main():
+    import matplotlib.pyplot as plt
+
     def simple_ode(t, y):
         """Simple linear ODE."""
         return [3 * yi for yi in y]
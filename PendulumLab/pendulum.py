@@ -62,14 +62,64 @@ class DoublePendulum:
                          (self.mass1 + self.mass2) * self.length1 * velocity1**2 * np.sin(delta_theta) -
                          (self.mass1 + self.mass2) * self.g * np.sin(angle2)) / den2)
 
-        return [velocity1, theta1_ddot, velocity2, theta2_ddot]
+        # Derivatives are returned in the same order as compute_state()
+        return [velocity1, velocity2, theta1_ddot, theta2_ddot]
+
+    def to_canonical(self, state):
+        """Convert a state [angle1, angle2, velocity1, velocity2] to canonical [angle1, angle2, p1, p2]."""
+        angle1, angle2, velocity1, velocity2 = state
+        coupling = self.mass2 * self.length1 * self.length2 * np.cos(angle1 - angle2)
+        p1 = (self.mass1 + self.mass2) * self.length1**2 * velocity1 + coupling * velocity2
+        p2 = self.mass2 * self.length2**2 * velocity2 + coupling * velocity1
+        return [angle1, angle2, p1, p2]
+
+    def from_canonical(self, canonical):
+        """Convert canonical coordinates [angle1, angle2, p1, p2] back to a state."""
+        angle1, angle2 = canonical[:2]
+        velocity1, velocity2 = self.hamiltonian_equations(0, canonical)[:2]
+        return [angle1, angle2, velocity1, velocity2]
+
+    def hamiltonian(self, canonical) -> float:
+        """Compute the Hamiltonian (total energy) from canonical coordinates."""
+        angle1, angle2, p1, p2 = canonical
+        m1, m2, l1, l2 = self.mass1, self.mass2, self.length1, self.length2
+        delta_theta = angle1 - angle2
+
+        kinetic = ((m2 * l2**2 * p1**2 + (m1 + m2) * l1**2 * p2**2 -
+                    2 * m2 * l1 * l2 * p1 * p2 * np.cos(delta_theta)) /
+                   (2 * m2 * l1**2 * l2**2 * (m1 + m2 * np.sin(delta_theta)**2)))
+        potential = ((m1 + m2) * self.g * l1 * (1 - np.cos(angle1)) +
+                     m2 * self.g * l2 * (1 - np.cos(angle2)))
+        return kinetic + potential
+
+    def hamiltonian_equations(self, t, canonical):
+        """Compute Hamilton's equations for canonical coordinates [angle1, angle2, p1, p2]."""
+        angle1, angle2, p1, p2 = canonical
+        m1, m2, l1, l2 = self.mass1, self.mass2, self.length1, self.length2
+
+        delta_theta = angle1 - angle2
+        sin_delta = np.sin(delta_theta)
+        cos_delta = np.cos(delta_theta)
+        den = m1 + m2 * sin_delta**2
+
+        theta1_dot = (l2 * p1 - l1 * p2 * cos_delta) / (l1**2 * l2 * den)
+        theta2_dot = ((m1 + m2) * l1 * p2 - m2 * l2 * p1 * cos_delta) / (m2 * l1 * l2**2 * den)
+
+        # Derivative of the kinetic energy with respect to delta_theta, split in two terms
+        c1 = p1 * p2 * sin_delta / (l1 * l2 * den)
+        c2 = ((m2 * l2**2 * p1**2 + (m1 + m2) * l1**2 * p2**2 - 2 * m2 * l1 * l2 * p1 * p2 * cos_delta) *
+              np.sin(2 * delta_theta) / (2 * l1**2 * l2**2 * den**2))
+
+        p1_dot = -(m1 + m2) * self.g * l1 * np.sin(angle1) - c1 + c2
+        p2_dot = -m2 * self.g * l2 * np.sin(angle2) + c1 - c2
+        return [theta1_dot, theta2_dot, p1_dot, p2_dot]
 
     def step(self, dt):
         """Compute the instantaneous rate of change per time of velocity and position."""
         derivatives = self.equations_of_motion(0, self.compute_state())
         self.angle1 += derivatives[0] * dt
-        self.velocity1 += derivatives[1] * dt
-        self.angle2 += derivatives[2] * dt
+        self.angle2 += derivatives[1] * dt
+        self.velocity1 += derivatives[2] * dt
         self.velocity2 += derivatives[3] * dt
 
     def get_positions(self) -> tuple:
@@ -82,16 +132,19 @@ class DoublePendulum:
 
     def kinetic_energy(self) -> float:
         """Compute the kinetic energy of the entire system."""
-        v1 = self.length1 * self.velocity1
-        v2 = self.length2 * self.velocity2
-        T1 = 0.5 * self.mass1 * v1**2
-        T2 = 0.5 * self.mass2 * v2**2
+        v1_squared = (self.length1 * self.velocity1)**2
+        # The second bob moves with the first, so its speed includes the coupling term
+        v2_squared = (v1_squared + (self.length2 * self.velocity2)**2 +
+                      2 * self.length1 * self.length2 * self.velocity1 * self.velocity2 *
+                      np.cos(self.angle1 - self.angle2))
+        T1 = 0.5 * self.mass1 * v1_squared
+        T2 = 0.5 * self.mass2 * v2_squared
         return T1 + T2
 
     def potential_energy(self) -> float:
-        """Compute the potential energy of the entire system."""
+        """Compute the potential energy of the entire system (zero with both bobs hanging at rest)."""
         h1 = self.length1 * (1 - np.cos(self.angle1))
-        h2 = self.length2 * (1 - np.cos(self.angle2))
+        h2 = h1 + self.length2 * (1 - np.cos(self.angle2))
         V1 = self.mass1 * self.g * h1
         V2 = self.mass2 * self.g * h2
         return V1 + V2
@@ -0,0 +1,288 @@
+"""
+File name: pipeline.py
+Author: Troy Chin (CWID: 885586685)
+Date: 2026-10-18
+Version: 1.0
+Status: Ready to deliver to customers
+Description: This script streams a simulation through lazy stages (decimate, energy, events, coordinates) into sinks.
+"""
+
+import csv
+from collections import deque
+import numpy as np
+import diagnostics
+from numerical_methods import NumericalMethods, Event, EventLog, _hermite
+from trajectory_store import TrajectoryWriter
+
+class Block:
+
+    def __init__(self, start, times, states, dt, fields=None):
+        """
+        Initialize one block of samples: start is the index of its first sample in the stream, dt the
+        spacing of the samples (None once they are no longer evenly spaced, e.g. after event filtering)
+        and fields holds per-sample columns added by the stages, such as 'energy' or 'positions'.
+        """
+        self.start = start
+        self.times = times
+        self.states = states
+        self.dt = dt
+        self.fields = fields if fields is not None else {}
+
+    def __len__(self):
+        return len(self.states)
+
+def integrate_blocks(func, y0, dt, n_steps, block_steps=1000, method='runge_kutta', tolerance=1e-6, t0=0.0,
+                     instrumentation=None):
+    """
+    Yield the n_steps + 1 states of a run in blocks of at most block_steps states. Only one block is in
+    memory at a time; the fixed-step methods take the same steps as a single integrate() call.
+    """
+    methods = NumericalMethods(dt=dt, instrumentation=instrumentation)
+    y = np.asarray(y0, dtype=float)
+    yield Block(0, np.array([t0]), y[np.newaxis].copy(), dt)
+    done = 0
+    while done < n_steps:
+        steps = min(block_steps, n_steps - done)
+        trajectory = methods.integrate(func, y, None, steps, method=method, tolerance=tolerance)
+        y = trajectory[-1]
+        times = t0 + (done + np.arange(1, steps + 1)) * dt
+        yield Block(done + 1, times, trajectory[1:], dt)
+        done += steps
+
+def decimate(n):
+    """Stage that keeps every n-th sample of the stream (sample indices 0, n, 2n, ...)."""
+    def stage(blocks):
+        for block in blocks:
+            offset = -block.start % n
+            keep = slice(offset, None, n)
+            if offset >= len(block):
+                continue
+            yield Block((block.start + offset) // n, block.times[keep], block.states[keep],
+                        block.dt * n if block.dt is not None else None,
+                        {name: values[keep] for name, values in block.fields.items()})
+    return stage
+
+def energy(pendulum):
+    """Stage that adds the 'energy' field (total energy of every sample)."""
+    def stage(blocks):
+        for block in blocks:
+            block.fields['energy'] = diagnostics.total_energy(block.states, pendulum)
+            yield block
+    return stage
+
+def coordinates(pendulum):
+    """Stage that adds the 'positions' field, the Cartesian bob positions (x1, y1, x2, y2) of every sample."""
+    def stage(blocks):
+        for block in blocks:
+            block.fields['positions'] = diagnostics.positions(block.states, pendulum)
+            yield block
+    return stage
+
+def events(events, func):
+    """
+    Stage that replaces the samples with the states where an event fires. Crossings between consecutive
+    samples (also across block boundaries) are located on the cubic Hermite interpolant built from func,
+    the right-hand side, as in NumericalMethods.detect_events. The 'event' field is the index of the event
+    that fired. A terminal event ends the stream, so nothing upstream is computed past it.
+    """
+    events = [event if isinstance(event, Event) else Event(event) for event in events]
+
+    def stage(blocks):
+        count = 0
+        previous = None  # (t, y, event values) of the last sample seen
+        for block in blocks:
+            log = EventLog()
+            terminated = False
+            for t, y in zip(block.times, block.states):
+                values = [event(t, y) for event in events]
+                if previous is not None:
+                    t_a, y_a, old = previous
+                    if any(event.crossed(a, b) for event, a, b in zip(events, old, values)):
+                        interpolant = _hermite(t_a, y_a, func(t_a, y_a), t, y, func(t, y))
+                        if log.record(events, t_a, t, old, values, interpolant):
+                            terminated = True
+                            break
+                previous = (t, y, values)
+            if not terminated and previous is not None:
+                log.finish(previous[0], previous[1])
+            if len(log):
+                yield Block(count, log.times, log.states, None, {'event': log.events})
+                count += len(log)
+            if terminated:
+                return
+    return stage
+
+def tap(*sinks):
+    """Stage that passes every block through unchanged after sending it to the sinks."""
+    def stage(blocks):
+        for block in blocks:
+            for sink in sinks:
+                sink.consume(block)
+            yield block
+    stage.sinks = sinks
+    return stage
+
+class Pipeline:
+
+    def __init__(self, source):
+        """Initialize a pipeline over a source of Blocks, such as integrate_blocks(...). Nothing runs until run()."""
+        self.source = source
+        self.stages = []
+        self.sinks = []
+
+    def then(self, stage):
+        """Append a stage and return the pipeline."""
+        self.stages.append(stage)
+        return self
+
+    def to(self, *sinks):
+        """Attach sinks that receive every block leaving the last stage and return the pipeline."""
+        self.sinks.extend(sinks)
+        return self
+
+    def __iter__(self):
+        """Iterate over the blocks leaving the last stage, without feeding the sinks."""
+        blocks = iter(self.source)
+        for stage in self.stages:
+            blocks = stage(blocks)
+        return blocks
+
+    def run(self):
+        """
+        Pull every block through the stages into the sinks, close all sinks and return their results
+        (sinks tapped by stages first, in stage order, then the sinks attached with to()).
+        """
+        sinks = [sink for stage in self.stages for sink in getattr(stage, 'sinks', ())] + self.sinks
+        try:
+            for block in self:
+                for sink in self.sinks:
+                    sink.consume(block)
+        finally:
+            results = [sink.close() for sink in sinks]
+        return results
+
+class TrajectorySink:
+
+    def __init__(self, path, method=None, parameters=None, dtype=np.float64):
+        """Initialize a sink that appends the states to a binary trajectory file (see trajectory_store)."""
+        self.path = path
+        self.method = method
+        self.parameters = parameters
+        self.dtype = dtype
+        self.writer = None  # Opened on the first block, once dt, t0 and the width are known
+
+    def consume(self, block):
+        if self.writer is None:
+            if block.dt is None:
+                raise ValueError("A trajectory file needs evenly spaced samples; attach it before event filtering.")
+            self.writer = TrajectoryWriter(self.path, block.dt, width=block.states.shape[1], t0=block.times[0],
+                                           method=self.method, parameters=self.parameters, dtype=self.dtype)
+        self.writer.append(block.states)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        return self.path
+
+class CSVSink:
+
+    def __init__(self, path, fields=()):
+        """Initialize a sink that writes the time, the state and the named fields of every sample to a CSV file."""
+        self.path = path
+        self.fields = list(fields)
+        self.file = None
+        self.writer = None
+
+    def consume(self, block):
+        columns = [block.times[:, np.newaxis], block.states]
+        columns += [np.asarray(block.fields[name]).reshape(len(block), -1) for name in self.fields]
+        rows = np.hstack(columns)
+        if self.writer is None:
+            self.file = open(self.path, 'w', newline='')
+            self.writer = csv.writer(self.file)
+            header = ['Time'] + [f"State {i}" for i in range(block.states.shape[1])]
+            for name in self.fields:
+                width = np.asarray(block.fields[name]).reshape(len(block), -1).shape[1]
+                header += [name] if width == 1 else [f"{name} {i}" for i in range(width)]
+            self.writer.writerow(header)
+        self.writer.writerows(rows.tolist())
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+        return self.path
+
+class StatisticsSink:
+
+    def __init__(self, field=None):
+        """Initialize a sink that keeps the count, mean, minimum and maximum of a field (the states by default)."""
+        self.field = field
+        self.mean = diagnostics.RunningMean()
+        self.minimum = None
+        self.maximum = None
+
+    def consume(self, block):
+        values = block.states if self.field is None else block.fields[self.field]
+        if len(values) == 0:
+            return
+        self.mean.update(values)
+        low, high = np.min(values, axis=0), np.max(values, axis=0)
+        self.minimum = low if self.minimum is None else np.minimum(self.minimum, low)
+        self.maximum = high if self.maximum is None else np.maximum(self.maximum, high)
+
+    def close(self):
+        return {'count': self.mean.count, 'mean': self.mean.mean, 'min': self.minimum, 'max': self.maximum}
+
+class LivePlotSink:
+
+    def __init__(self, field='positions', window=2000, pause=0.001):
+        """
+        Initialize a sink that draws the trace of the second bob (the 'positions' field) or a scalar field
+        against time, keeping only the last window samples. matplotlib is imported on the first block.
+        """
+        self.field = field
+        self.window = window
+        self.pause = pause
+        self.x = deque(maxlen=window)
+        self.y = deque(maxlen=window)
+        self.figure = None
+
+    def consume(self, block):
+        import matplotlib.pyplot as plt
+        if self.figure is None:
+            self.figure, self.ax = plt.subplots()
+            self.line, = self.ax.plot([], [], lw=1)
+            self.ax.set_title(self.field)
+        values = block.fields[self.field]
+        if self.field == 'positions':
+            self.x.extend(values[:, 2])
+            self.y.extend(values[:, 3])
+        else:
+            self.x.extend(block.times)
+            self.y.extend(values)
+        self.line.set_data(self.x, self.y)
+        self.ax.relim()
+        self.ax.autoscale_view()
+        plt.pause(self.pause)
+
+    def close(self):
+        return self.figure
+
+#Example implementation
+def main():
+    from pendulum import DoublePendulum
+    pendulum = DoublePendulum(1.0, 1.0, 1.0, 1.0, np.pi / 3, np.pi / 6, 0.0, 0.0)
+    statistics = StatisticsSink('energy')
+    crossings = StatisticsSink()
+    pipeline = (Pipeline(integrate_blocks(pendulum.equations_of_motion, pendulum.compute_state(), 0.001, 100000))
+                .then(decimate(10))
+                .then(energy(pendulum))
+                .then(tap(CSVSink('double_pendulum_pipeline.csv', fields=['energy']), statistics))
+                .then(events([lambda t, y: y[0]], pendulum.equations_of_motion))
+                .to(crossings))
+    _, energy_stats, crossing_stats = pipeline.run()
+    print(f"Energy range: {energy_stats['min']:.6f} to {energy_stats['max']:.6f}")
+    print(f"angle1 crossed zero {crossing_stats['count']} times")
+
+if __name__ == '__main__':
+    main()
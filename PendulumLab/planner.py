@@ -0,0 +1,242 @@
+"""
+File name: planner.py
+Author: Troy Chin (CWID: 885586685)
+Date: 2026-10-18
+Version: 1.0
+Status: Ready to deliver to customers
+Description: This script picks the cheapest integration method and step size that meets an accuracy target.
+"""
+
+import math
+import numpy as np
+from numerical_methods import NumericalMethods, DormandPrince
+from instrumentation import Instrumentation
+from ensemble import PendulumEnsemble
+from lyapunov import largest_lyapunov_exponent
+from diagnostics import total_energy
+
+FIXED_STEP_METHODS = ('euler', 'midpoint', 'runge_kutta', 'implicit_midpoint', 'stormer_verlet', 'yoshida')
+# These methods are integrated in canonical coordinates [angle1, angle2, p1, p2] with Hamilton's equations
+SYMPLECTIC_METHODS = ('implicit_midpoint', 'stormer_verlet', 'yoshida')
+# Nominal orders, used when the pilot errors are too close to round-off to fit an order
+ORDERS = {'euler': 1, 'midpoint': 2, 'runge_kutta': 4, 'implicit_midpoint': 2, 'stormer_verlet': 2, 'yoshida': 4,
+          'adaptive_runge_kutta': 1}
+METRICS = ('position', 'energy')
+LOG_MAX_GROWTH = math.log(np.finfo(float).max)
+
+class IntegrationPlan:
+
+    def __init__(self, method, dt, n_steps, tolerance, metric, target, predicted_error, predicted_seconds,
+                 predicted_rhs_calls, candidates):
+        """
+        Initialize a plan to take n_steps steps of dt with method. For 'adaptive_runge_kutta', dt is the
+        output spacing and tolerance the solver tolerance. candidates lists every method considered.
+        """
+        self.method = method
+        self.dt = dt
+        self.n_steps = n_steps
+        self.tolerance = tolerance
+        self.metric = metric
+        self.target = target
+        self.predicted_error = predicted_error
+        self.predicted_seconds = predicted_seconds
+        self.predicted_rhs_calls = predicted_rhs_calls
+        self.candidates = candidates
+
+    def integrate(self, pendulum, instrumentation=None):
+        """Run the plan from the pendulum's current state and return the (n_steps + 1, 4) trajectory."""
+        methods = NumericalMethods(dt=self.dt, instrumentation=instrumentation)
+        func, y0 = _system(pendulum, self.method, pendulum.compute_state())
+        trajectory = methods.integrate(func, y0, None, self.n_steps, method=self.method, tolerance=self.tolerance)
+        if self.method in SYMPLECTIC_METHODS:
+            trajectory = np.stack(pendulum.from_canonical(trajectory.T), axis=1)
+        return trajectory
+
+    def report(self):
+        """Describe the chosen method and its predicted cost next to the other candidates."""
+        lines = [f"Plan: {self.method}, dt={self.dt:.3g}, {self.n_steps} steps"
+                 + (f", tolerance={self.tolerance:.1e}" if self.method == 'adaptive_runge_kutta' else "")
+                 + f"; predicted {self.metric} error {self.predicted_error:.2e} (target {self.target:.1e}),"
+                 f" {self.predicted_seconds:.3g} s, {self.predicted_rhs_calls:,.0f} RHS calls"]
+        for candidate in sorted(self.candidates, key=lambda c: c['predicted_seconds']):
+            status = "" if candidate['feasible'] else " (cannot reach target)"
+            lines.append(f"  {candidate['method']:>20}: order {candidate['order']:.2f}, "
+                         f"{candidate['predicted_seconds']:.3g} s{status}")
+        return "\n".join(lines)
+
+def _system(pendulum, method, state):
+    """Get the right-hand side and initial value a method is run on from a state."""
+    if method in SYMPLECTIC_METHODS:
+        return pendulum.hamiltonian_equations, np.asarray(pendulum.to_canonical(state))
+    return pendulum.equations_of_motion, np.asarray(state, dtype=float)
+
+def _fit_power_law(x, y):
+    """Fit y = C * x**p by least squares in log-log space and return (C, p)."""
+    slope, intercept = np.polyfit(np.log(x), np.log(y), 1)
+    return math.exp(intercept), slope
+
+def pilot_starts(pendulum, t_end, pilot_time, n_windows=3, survey_dt=0.02, survey_time=100.0):
+    """
+    Choose the initial states of the pilot windows: the pendulum's own state, then the fastest state
+    (largest |velocity1| + |velocity2|) in each of n_windows - 1 segments of a coarse Runge-Kutta
+    survey, so the pilots also see the most violent part of the motion.
+    """
+    state = np.asarray(pendulum.compute_state(), dtype=float)
+    horizon = min(t_end, survey_time) - pilot_time
+    if n_windows < 2 or horizon <= 0:
+        return state[np.newaxis]
+    n_steps = max(n_windows, int(round(horizon / survey_dt)))
+    survey = NumericalMethods(dt=survey_dt).integrate(pendulum.equations_of_motion, state, None, n_steps)
+    speed = np.abs(survey[:, 2]) + np.abs(survey[:, 3])
+    segments = np.array_split(np.arange(1, n_steps + 1), n_windows - 1)
+    return np.vstack([state] + [survey[segment[np.argmax(speed[segment])]] for segment in segments])
+
+def _pilot(pendulum, method, dt, starts, pilot_time, metric, references, tolerance=1e-6):
+    """Integrate every pilot window and return (worst error, seconds per step, RHS calls per step)."""
+    instrumentation = Instrumentation()
+    methods = NumericalMethods(dt=dt, instrumentation=instrumentation)
+    n_steps = max(1, int(round(pilot_time / dt)))
+    error = 0.0
+    for index, start in enumerate(starts):
+        func, y0 = _system(pendulum, method, start)
+        trajectory = methods.integrate(func, y0, None, n_steps, method=method, tolerance=tolerance)
+        if method in SYMPLECTIC_METHODS:
+            trajectory = np.stack(pendulum.from_canonical(trajectory.T), axis=1)
+        if metric == 'energy':
+            energy = total_energy(trajectory, pendulum)
+            error = max(error, float(np.max(np.abs(energy - energy[0]))))
+        else:
+            error = max(error, float(np.max(np.abs(trajectory[-1, :2] - references[index, :2]))))
+    total_steps = n_steps * len(starts)
+    return (error, instrumentation.timers['integrate'] / total_steps,
+            instrumentation.counters['rhs_calls'] / total_steps)
+
+def error_growth(pendulum, t_end, pilot_time, metric, dt=0.01, lyapunov_time=100.0):
+    """
+    Estimate how much larger the error is at t_end than at the end of a pilot window. Errors are
+    taken to grow in proportion to time. Position errors also grow like exp(lambda * t), with the
+    largest Lyapunov exponent lambda measured over min(t_end, lyapunov_time), so chaotic motion asks
+    for smaller steps.
+    """
+    growth = t_end / pilot_time
+    if metric == 'position' and t_end > pilot_time:
+        ensemble = PendulumEnsemble.from_pendulums([pendulum])
+        n_steps = max(1, int(round(min(t_end, lyapunov_time) / dt)))
+        exponent = largest_lyapunov_exponent(ensemble, dt, n_steps)[0]
+        # Long chaotic runs overflow a float; no step is then small enough, so the growth is infinite
+        log_growth = math.log(growth) + max(exponent, 0.0) * (t_end - pilot_time)
+        return math.exp(log_growth) if log_growth < LOG_MAX_GROWTH else math.inf
+    return growth
+
+def plan_integration(pendulum, t_end, tolerance, metric='position', methods=None, pilot_time=1.0, n_windows=3,
+                     pilot_dts=(0.04, 0.02, 0.01), pilot_tolerances=(1e-4, 1e-6, 1e-8), output_dt=0.01,
+                     max_dt=0.05, min_dt=1e-5, safety=0.5):
+    """
+    Plan an integration of the pendulum up to t_end whose error stays below tolerance. The metric is
+    'position' (largest angle error at t_end, in radians) or 'energy' (largest drift of the total energy).
+
+    Every method is run over n_windows short pilot windows (see pilot_starts) at a few step sizes, or
+    tolerances for the adaptive method. The worst errors are fitted with error = C * dt**p and
+    extrapolated to t_end with error_growth; the energy error of the symplectic methods stays bounded
+    instead. The target is scaled by safety, and the method with the lowest predicted run time is chosen.
+    """
+    if metric not in METRICS:
+        raise ValueError("Unknown metric. Choose 'position' or 'energy'.")
+    methods = methods or FIXED_STEP_METHODS + ('adaptive_runge_kutta',)
+    pilot_time = min(pilot_time, t_end)
+    starts = pilot_starts(pendulum, t_end, pilot_time, n_windows)
+    growth = error_growth(pendulum, t_end, pilot_time, metric, min(pilot_dts))
+    references = None
+    if metric == 'position':
+        references = np.array([DormandPrince(pendulum.equations_of_motion, 0.0, start, rtol=1e-12, atol=1e-12,
+                                             t_bound=pilot_time).solve(pilot_time) for start in starts])
+
+    candidates = []
+    for method in methods:
+        if method == 'adaptive_runge_kutta':
+            candidates.append(_plan_adaptive(pendulum, starts, t_end, tolerance, metric, references, pilot_time,
+                                             growth, pilot_tolerances, output_dt, safety))
+            continue
+
+        pilots = []
+        for dt in pilot_dts:
+            try:
+                pilots.append((dt,) + _pilot(pendulum, method, dt, starts, pilot_time, metric, references))
+            except RuntimeError:
+                continue  # The implicit solve did not converge at this step size
+        usable = [pilot for pilot in pilots if np.isfinite(pilot[1]) and pilot[1] > 1e-13]
+        if len(usable) >= 2:
+            constant, order = _fit_power_law([p[0] for p in usable], [p[1] for p in usable])
+        elif usable:
+            order = ORDERS[method]
+            constant = usable[0][1] / usable[0][0] ** order
+        else:
+            constant, order = 0.0, ORDERS[method]
+        order = max(order, 0.5)  # Guard against a flat fit extrapolating to absurd step sizes
+
+        # Symplectic methods keep the energy error bounded instead of drifting
+        method_growth = 1.0 if metric == 'energy' and method in SYMPLECTIC_METHODS else growth
+        if constant == 0:
+            dt = max_dt
+        else:
+            dt = min(max_dt, (safety * tolerance / (constant * method_growth)) ** (1 / order))
+        feasible = bool(pilots) and dt >= min_dt
+        n_steps = math.ceil(t_end / max(dt, min_dt))  # A candidate that cannot reach the target is costed at min_dt
+        dt = t_end / n_steps
+        seconds_per_step = pilots[-1][2] if pilots else float('inf')
+        rhs_per_step = pilots[-1][3] if pilots else float('inf')
+        candidates.append({
+            'method': method, 'dt': dt, 'n_steps': n_steps, 'tolerance': 1e-6, 'order': order,
+            'predicted_error': constant * method_growth * dt ** order,
+            'predicted_seconds': n_steps * seconds_per_step, 'predicted_rhs_calls': n_steps * rhs_per_step,
+            'feasible': feasible,
+        })
+
+    feasible = [candidate for candidate in candidates if candidate['feasible']]
+    if not feasible:
+        raise ValueError("No method reaches the target tolerance. Loosen the tolerance or lower min_dt.")
+    best = min(feasible, key=lambda candidate: candidate['predicted_seconds'])
+    return IntegrationPlan(best['method'], best['dt'], best['n_steps'], best['tolerance'], metric, tolerance,
+                           best['predicted_error'], best['predicted_seconds'], best['predicted_rhs_calls'],
+                           candidates)
+
+def _plan_adaptive(pendulum, starts, t_end, tolerance, metric, references, pilot_time, growth, pilot_tolerances,
+                   output_dt, safety):
+    """Plan the adaptive method: fit the error and the cost against the solver tolerance."""
+    pilots = [(solver_tolerance,) + _pilot(pendulum, 'adaptive_runge_kutta', output_dt, starts, pilot_time,
+                                           metric, references, solver_tolerance)
+              for solver_tolerance in pilot_tolerances]
+    usable = [pilot for pilot in pilots if pilot[1] > 1e-13]
+    if len(usable) >= 2:
+        constant, order = _fit_power_law([p[0] for p in usable], [p[1] for p in usable])
+    else:
+        constant, order = 1.0, ORDERS['adaptive_runge_kutta']
+    order = max(order, 0.5)
+    solver_tolerance = (safety * tolerance / (constant * growth)) ** (1 / order)
+    # The run uses a tolerance of at most 1e-3; tighter than 1e-13 is lost in round-off
+    run_tolerance = min(max(solver_tolerance, 1e-13), 1e-3)
+
+    # The work per output step grows like a power of 1 / tolerance as well
+    time_constant, time_power = _fit_power_law([p[0] for p in pilots], [p[2] for p in pilots])
+    rhs_constant, rhs_power = _fit_power_law([p[0] for p in pilots], [p[3] for p in pilots])
+    n_steps = math.ceil(t_end / output_dt)
+    return {
+        'method': 'adaptive_runge_kutta', 'dt': t_end / n_steps, 'n_steps': n_steps,
+        'tolerance': run_tolerance, 'order': order,
+        'predicted_error': constant * growth * run_tolerance ** order,
+        'predicted_seconds': n_steps * time_constant * run_tolerance ** time_power,
+        'predicted_rhs_calls': n_steps * rhs_constant * run_tolerance ** rhs_power,
+        'feasible': solver_tolerance >= 1e-13,
+    }
+
+#Example implementation
+
+def main():
+    from pendulum import DoublePendulum
+    for angle in (np.pi / 6, np.pi / 2, 0.95 * np.pi):
+        pendulum = DoublePendulum(1.0, 1.0, 1.0, 1.0, angle, angle, 0.0, 0.0)
+        print(f"Initial angles {angle:.2f} rad:")
+        print(plan_integration(pendulum, t_end=10.0, tolerance=1e-4).report())
+
+if __name__ == '__main__':
+    main()
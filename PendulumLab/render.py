@@ -0,0 +1,168 @@
+"""
+File name: render.py
+Author: Troy Chin (CWID: 885586685)
+Date: 2026-10-18
+Version: 1.0
+Status: Ready to deliver to customers
+Description: This script renders stored trajectories to PNG frames, GIF or MP4 without a display.
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from visualization import compute_positions
+
+FORMATS = ('png', 'gif', 'mp4')
+PALETTE_COLORS = 128
+
+class FrameRenderer:
+
+    def __init__(self, limit=2.0, size=(6, 6), dpi=100):
+        """Build one Agg figure and draw its static background once; frames then only redraw the lines."""
+        # Figure and FigureCanvasAgg never touch pyplot, so no GUI backend is probed
+        self.figure = Figure(figsize=size, dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.ax = self.figure.add_subplot()
+        self.line1, = self.ax.plot([], [], 'o-', lw=2, color='blue', animated=True)
+        self.line2, = self.ax.plot([], [], 'o-', lw=2, color='red', animated=True)
+        self.ax.set_xlim(-limit, limit)
+        self.ax.set_ylim(-limit, limit)
+        self.ax.set_aspect('equal')
+        self.ax.grid()
+        self.ax.set_title("Pendulum Movement", fontsize=14)
+        self.ax.set_xlabel("X Position (m)", fontsize=12)
+        self.ax.set_ylabel("Y Position (m)", fontsize=12)
+
+        self.canvas.draw()
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+
+        # A shared palette built from a reference frame lets every worker emit small palettized
+        # images, so GIF stitching does not have to quantize each frame again
+        from PIL import Image
+        reference = Image.fromarray(self.render((0.5 * limit, -0.5 * limit, limit, -0.5 * limit)))
+        self.palette = reference.quantize(colors=PALETTE_COLORS, method=Image.Quantize.MEDIANCUT)
+
+    def render_image(self, position):
+        """Render one frame as a palettized PIL image."""
+        from PIL import Image
+        frame = Image.fromarray(self.render(position))
+        return frame.quantize(palette=self.palette, dither=Image.Dither.NONE)
+
+    def render(self, position):
+        """Render one frame for bob positions (x1, y1, x2, y2) and return its RGB pixels."""
+        x1, y1, x2, y2 = position
+        self.line1.set_data([0, x1], [0, y1])
+        self.line2.set_data([x1, x2], [y1, y2])
+
+        # Blit: restore the cached background and draw only the moving artists
+        self.canvas.restore_region(self.background)
+        self.ax.draw_artist(self.line1)
+        self.ax.draw_artist(self.line2)
+        return np.asarray(self.canvas.buffer_rgba())[..., :3]
+
+def _render_chunk(positions, first_frame, fmt, target, fps, settings):
+    """Render one chunk of frames in a worker process, as PNG files in target or as the MP4 segment target."""
+    renderer = FrameRenderer(**settings)
+    if fmt == 'mp4':
+        height, width = renderer.render(positions[0]).shape[:2]
+        command = [shutil.which('ffmpeg'), '-y', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+                   '-s', f'{width}x{height}', '-r', str(fps), '-i', '-',
+                   '-c:v', 'libx264', '-pix_fmt', 'yuv420p', target]
+        with subprocess.Popen(command, stdin=subprocess.PIPE) as ffmpeg:
+            for position in positions:
+                ffmpeg.stdin.write(np.ascontiguousarray(renderer.render(position)).tobytes())
+            ffmpeg.stdin.close()
+        if ffmpeg.returncode:
+            raise RuntimeError(f"ffmpeg failed while writing {target}.")
+        return [target]
+
+    paths = []
+    for offset, position in enumerate(positions):
+        path = os.path.join(target, f"frame_{first_frame + offset:06d}.png")
+        renderer.render_image(position).save(path, compress_level=1)
+        paths.append(path)
+    return paths
+
+def render_trajectory(states, output, length1=1.0, length2=1.0, dt=0.01, fps=30, fmt=None,
+                      workers=None, chunk_frames=500, size=(6, 6), dpi=100):
+    """
+    Render a (T, 4) trajectory headlessly. fmt is 'png' (output is a directory of frames),
+    'gif' or 'mp4' (output is a file; MP4 needs ffmpeg on the PATH) and is taken from the
+    output extension when omitted. Samples are skipped so the clip plays in real time at fps.
+    Chunks of chunk_frames frames are rendered in parallel and stitched at the end.
+    """
+    fmt = fmt or (os.path.splitext(output)[1].lstrip('.').lower() or 'png')
+    if fmt not in FORMATS:
+        raise ValueError("Unknown format. Choose 'png', 'gif', or 'mp4'.")
+    if fmt == 'mp4' and shutil.which('ffmpeg') is None:
+        raise RuntimeError("ERROR: MP4 output needs ffmpeg on the PATH. Install ffmpeg or render 'png'/'gif'.")
+
+    frame_step = max(1, int(round(1 / (dt * fps))))
+    positions = compute_positions(states, length1, length2)[::frame_step]
+    settings = {'limit': 1.05 * (length1 + length2), 'size': size, 'dpi': dpi}
+    starts = range(0, len(positions), chunk_frames)
+
+    with tempfile.TemporaryDirectory() as scratch:
+        frame_directory = output if fmt == 'png' else scratch
+        os.makedirs(frame_directory, exist_ok=True)
+        if fmt == 'mp4':
+            targets = [os.path.join(scratch, f"segment_{i:05d}.mp4") for i in range(len(starts))]
+        else:
+            targets = [frame_directory] * len(starts)
+
+        jobs = [(positions[start:start + chunk_frames], start, fmt, target, fps, settings)
+                for start, target in zip(starts, targets)]
+        if workers == 1:
+            chunks = [_render_chunk(*job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                chunks = list(executor.map(_render_chunk, *zip(*jobs)))
+        files = [path for chunk in chunks for path in chunk]
+
+        if fmt == 'gif':
+            _stitch_gif(files, output, fps)
+        elif fmt == 'mp4':
+            _stitch_mp4(files, output, scratch)
+    return output if fmt != 'png' else files
+
+def _stitch_gif(frame_paths, output, fps):
+    """
+    Combine palettized PNG frames into one looping GIF, writing one frame at a time so only a
+    single frame is open or in memory (Image.save with append_images keeps every frame).
+    """
+    from PIL import Image, GifImagePlugin
+    duration = int(round(1000 / fps))
+    with open(output, 'wb') as file:
+        palette = None
+        for path in frame_paths:
+            with Image.open(path) as frame:
+                frame.load()
+                if palette is None:
+                    # The first frame's palette becomes the global color table
+                    palette = frame.palette.tobytes()
+                    header, _ = GifImagePlugin.getheader(frame, info={'loop': 0, 'duration': duration})
+                    file.write(b''.join(header))
+                # Frames already share one palette; a frame that does not carries its own table
+                own_palette = frame.palette.tobytes() != palette
+                file.write(b''.join(GifImagePlugin.getdata(frame, duration=duration,
+                                                           include_color_table=own_palette)))
+        file.write(b';')  # GIF trailer
+
+def _stitch_mp4(segment_paths, output, scratch):
+    """Join MP4 segments without re-encoding, using ffmpeg's concat demuxer."""
+    listing = os.path.join(scratch, 'segments.txt')
+    with open(listing, 'w') as file:
+        file.writelines(f"file '{path}'\n" for path in segment_paths)
+    subprocess.run([shutil.which('ffmpeg'), '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0',
+                    '-i', listing, '-c', 'copy', output], check=True)
+
+def render_store(store, output, fps=30, **kwargs):
+    """Render a TrajectoryStore using the lengths and dt recorded in its header."""
+    parameters = store.parameters
+    return render_trajectory(store.states, output, parameters.get('length1', 1.0), parameters.get('length2', 1.0),
+                             store.dt, fps=fps, **kwargs)
@@ -0,0 +1,405 @@
+"""
+File name: server.py
+Author: Troy Chin (CWID: 885586685)
+Date: 2026-10-18
+Version: 1.0
+Status: Ready to deliver to customers
+Description: This script serves live pendulum simulations over HTTP chunked responses and WebSockets.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit, parse_qsl
+import numpy as np
+from numerical_methods import NumericalMethods
+from pendulum import DoublePendulum
+
+# Binary chunk: first sample index (uint64), row count and row width (uint32), then the raw
+# little-endian rows in the job dtype. One chunk is one HTTP chunk or one WebSocket binary frame.
+CHUNK_HEADER = struct.Struct('<QII')
+WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+TEXT, BINARY, CLOSE = 0x1, 0x2, 0x8
+METHODS = ('euler', 'runge_kutta', 'adaptive_runge_kutta', 'midpoint')
+DEFAULTS = {
+    'mass1': 1.0, 'mass2': 1.0, 'length1': 1.0, 'length2': 1.0, 'g': 9.81,
+    'angle1': np.pi / 2, 'angle2': np.pi / 2, 'velocity1': 0.0, 'velocity2': 0.0,
+    'method': 'runge_kutta', 'dt': 0.01, 'n_steps': 1000, 'decimation': 1, 'chunk_steps': 1000,
+    'dtype': 'float64', 'tolerance': 1e-6,
+}
+MAX_STEPS = 10**9
+
+def parse_job(values):
+    """Validate job settings (from JSON or a query string) and fill in the defaults."""
+    job = dict(DEFAULTS)
+    for key, value in values.items():
+        if key not in DEFAULTS:
+            raise ValueError(f"Unknown job setting '{key}'.")
+        job[key] = value if isinstance(DEFAULTS[key], str) else type(DEFAULTS[key])(value)
+    if job['method'] not in METHODS:
+        raise ValueError("Unknown method. Choose 'euler', 'runge_kutta', 'adaptive_runge_kutta', or 'midpoint'.")
+    if job['dtype'] not in ('float64', 'float32'):
+        raise ValueError("Unknown dtype. Choose 'float64' or 'float32'.")
+    # NaN or infinite inputs (or a zero tolerance) make the adaptive solver loop without end
+    if not all(np.isfinite(job[key]) for key, value in DEFAULTS.items() if isinstance(value, float)):
+        raise ValueError("Masses, lengths, g, angles, velocities, dt and tolerance must be finite numbers.")
+    if not job['dt'] > 0 or not 0 < job['n_steps'] <= MAX_STEPS or job['decimation'] < 1 or job['chunk_steps'] < 1:
+        raise ValueError("dt, n_steps, decimation and chunk_steps must be positive (n_steps at most 1e9).")
+    if not all(job[key] > 0 for key in ('mass1', 'mass2', 'length1', 'length2', 'tolerance')):
+        raise ValueError("mass1, mass2, length1, length2 and tolerance must be positive.")
+    return job
+
+def simulate_block(job, state, n_steps):
+    """Advance a job's state by n_steps steps in a worker process and return the (n_steps, 4) new states."""
+    pendulum = DoublePendulum(job['mass1'], job['mass2'], job['length1'], job['length2'], *state, g=job['g'])
+    # t_span=None steps by exactly dt, so fixed-step blocks match one long run; the adaptive
+    # method starts its step size afresh at each block
+    trajectory = NumericalMethods(dt=job['dt']).integrate(pendulum.equations_of_motion, state, None, n_steps,
+                                                          method=job['method'], tolerance=job['tolerance'])
+    return trajectory[1:]
+
+def encode_chunk(first_index, rows):
+    """Pack decimated rows into one binary chunk."""
+    rows = np.ascontiguousarray(rows)
+    return CHUNK_HEADER.pack(first_index, rows.shape[0], rows.shape[1]) + rows.tobytes()
+
+def decode_chunk(payload, dtype='float64'):
+    """Unpack a binary chunk into (first sample index, rows)."""
+    first_index, n_rows, width = CHUNK_HEADER.unpack_from(payload)
+    rows = np.frombuffer(payload, dtype=np.dtype(dtype).newbyteorder('<'), offset=CHUNK_HEADER.size)
+    return first_index, rows.reshape(n_rows, width)
+
+def websocket_frame(opcode, payload, mask=False):
+    """Build one unfragmented WebSocket frame (clients must mask, servers must not)."""
+    length = len(payload)
+    mask_bit = 0x80 if mask else 0
+    if length < 126:
+        header = struct.pack('!BB', 0x80 | opcode, mask_bit | length)
+    elif length < 1 << 16:
+        header = struct.pack('!BBH', 0x80 | opcode, mask_bit | 126, length)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, mask_bit | 127, length)
+    if not mask:
+        return header + payload
+    key = os.urandom(4)
+    return header + key + _apply_mask(payload, key)
+
+def _apply_mask(payload, key):
+    data = np.frombuffer(payload, dtype=np.uint8)
+    return (data ^ np.resize(np.frombuffer(key, dtype=np.uint8), len(data))).tobytes()
+
+async def read_websocket_frame(reader):
+    """Read one WebSocket frame and return (opcode, payload), unmasking client frames."""
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        length, = struct.unpack('!H', await reader.readexactly(2))
+    elif length == 127:
+        length, = struct.unpack('!Q', await reader.readexactly(8))
+    key = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    return first & 0x0F, payload if key is None else _apply_mask(payload, key)
+
+async def _read_head(reader):
+    """Read an HTTP request or response head and return (first line, headers with lower-case names)."""
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    return lines[0], headers
+
+class JobError(Exception):
+    """A job failed while its results were being streamed."""
+
+class SimulationServer:
+
+    def __init__(self, host='127.0.0.1', port=8765, workers=None, max_jobs=8, queue_size=4, executor=None):
+        """
+        Initialize a server that integrates jobs in a pool of worker processes. At most max_jobs jobs
+        stream at once (more get 503). Each job computes a block only when its queue of queue_size
+        chunks has room, so a slow client pauses its own job without holding a worker.
+        """
+        self.host = host
+        self.port = port
+        self.max_jobs = max_jobs
+        self.queue_size = queue_size
+        self.executor = executor or ProcessPoolExecutor(max_workers=workers)
+        self.jobs = asyncio.Semaphore(max_jobs)
+        self.active_jobs = 0
+        self.server = None
+        self.connections = set()
+
+    async def start(self):
+        """Start listening and return the bound port (useful with port=0)."""
+        self.server = await asyncio.start_server(self.handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def close(self):
+        """Stop accepting connections, end the open streams and shut the worker pool down."""
+        if self.server is not None:
+            self.server.close()
+        for task in list(self.connections):
+            task.cancel()
+        await asyncio.gather(*self.connections, return_exceptions=True)
+        if self.server is not None:
+            await self.server.wait_closed()
+        self.executor.shutdown(cancel_futures=True)
+
+    async def serve_forever(self):
+        await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def handle(self, reader, writer):
+        """Route one connection: /health, /simulate (chunked HTTP) or /ws (WebSocket)."""
+        task = asyncio.current_task()
+        self.connections.add(task)
+        try:
+            request_line, headers = await _read_head(reader)
+            method, target, _ = request_line.split(' ', 2)
+            url = urlsplit(target)
+            if method != 'GET':
+                await self._respond(writer, 405, {'error': "Only GET is supported."})
+            elif url.path == '/health':
+                await self._respond(writer, 200, {'active_jobs': self.active_jobs, 'max_jobs': self.max_jobs})
+            elif url.path == '/simulate':
+                await self._stream_http(writer, dict(parse_qsl(url.query)))
+            elif url.path == '/ws' and headers.get('upgrade', '').lower() == 'websocket':
+                await self._stream_websocket(reader, writer, headers)
+            else:
+                await self._respond(writer, 404, {'error': f"No route for {url.path}."})
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass  # The client went away or sent a malformed request
+        except asyncio.CancelledError:
+            pass  # The server is closing
+        finally:
+            self.connections.discard(task)
+            writer.close()
+
+    async def _respond(self, writer, status, body):
+        reasons = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                   500: 'Internal Server Error', 503: 'Service Unavailable'}
+        data = json.dumps(body).encode('utf-8')
+        writer.write(f"HTTP/1.1 {status} {reasons[status]}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode('latin-1') + data)
+        await writer.drain()
+
+    def _metadata(self, job):
+        return {'dtype': np.dtype(job['dtype']).newbyteorder('<').str, 'width': 4,
+                'dt': job['dt'] * job['decimation'], 'n_samples': job['n_steps'] // job['decimation'] + 1}
+
+    async def _admit(self, job_values, reject):
+        """Validate a job and take a job slot; on failure send the error with reject and return None."""
+        try:
+            job = parse_job(job_values)
+        except (ValueError, TypeError) as error:
+            await reject(400, {'error': str(error)})
+            return None
+        if self.jobs.locked():
+            await reject(503, {'error': f"All {self.max_jobs} job slots are busy. Try again later."})
+            return None
+        await self.jobs.acquire()
+        self.active_jobs += 1
+        return job
+
+    def _release(self):
+        self.active_jobs -= 1
+        self.jobs.release()
+
+    async def _produce(self, job, queue):
+        """
+        Compute a job block by block, queueing decimated chunks; None marks the end and a JobError
+        takes its place when the computation fails, so the consumer never waits on a dead producer.
+        """
+        try:
+            await self._compute(job, queue)
+        except Exception as error:
+            await queue.put(JobError(f"{type(error).__name__}: {error}"))
+        else:
+            await queue.put(None)
+
+    async def _compute(self, job, queue):
+        loop = asyncio.get_running_loop()
+        dtype = np.dtype(job['dtype'])
+        state = np.array([job['angle1'], job['angle2'], job['velocity1'], job['velocity2']])
+        await queue.put(encode_chunk(0, state[np.newaxis].astype(dtype)))
+        done = 0
+        decimation = job['decimation']
+        while done < job['n_steps']:
+            n = min(job['chunk_steps'], job['n_steps'] - done)
+            block = await loop.run_in_executor(self.executor, simulate_block, job, state, n)
+            state = block[-1]
+            # Keep the samples whose index (done + 1 ... done + n) is a multiple of the decimation
+            first = -(done + 1) % decimation
+            kept = block[first::decimation]
+            if len(kept):
+                await queue.put(encode_chunk((done + 1 + first) // decimation, kept.astype(dtype)))
+            done += n
+
+    async def _pump(self, job, send):
+        """Run the producer and send its chunks as the client accepts them."""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        producer = asyncio.create_task(self._produce(job, queue))
+        try:
+            while True:
+                chunk = await queue.get()
+                if chunk is None:
+                    break
+                if isinstance(chunk, JobError):
+                    raise chunk
+                await send(chunk)
+            await producer
+        finally:
+            producer.cancel()
+
+    async def _stream_http(self, writer, query):
+        async def reject(status, body):
+            await self._respond(writer, status, body)
+
+        job = await self._admit(query, reject)
+        if job is None:
+            return
+        try:
+            metadata = self._metadata(job)
+            writer.write(("HTTP/1.1 200 OK\r\nContent-Type: application/octet-stream\r\n"
+                          "Transfer-Encoding: chunked\r\nTrailer: X-Pendulum-Error\r\nConnection: close\r\n"
+                          f"X-Pendulum-Dtype: {metadata['dtype']}\r\nX-Pendulum-Width: {metadata['width']}\r\n"
+                          f"X-Pendulum-Dt: {metadata['dt']!r}\r\n\r\n").encode('latin-1'))
+
+            async def send(chunk):
+                writer.write(f"{len(chunk):X}\r\n".encode('latin-1') + chunk + b"\r\n")
+                await writer.drain()
+
+            try:
+                await self._pump(job, send)
+            except JobError as error:
+                # The status line is already sent, so a failure is reported in the trailer
+                writer.write(f"0\r\nX-Pendulum-Error: {error}\r\n\r\n".encode('latin-1', 'replace'))
+            else:
+                writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        finally:
+            self._release()
+
+    async def _stream_websocket(self, reader, writer, headers):
+        accept = base64.b64encode(hashlib.sha1((headers['sec-websocket-key'] + WEBSOCKET_GUID)
+                                               .encode('latin-1')).digest()).decode('latin-1')
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode('latin-1'))
+        await writer.drain()
+
+        async def send_text(body):
+            writer.write(websocket_frame(TEXT, json.dumps(body).encode('utf-8')))
+            await writer.drain()
+
+        async def reject(status, body):
+            await send_text(dict(body, status=status))
+            writer.write(websocket_frame(CLOSE, struct.pack('!H', 1008)))
+            await writer.drain()
+
+        opcode, payload = await read_websocket_frame(reader)
+        if opcode != TEXT:
+            return
+        job = await self._admit(json.loads(payload), reject)
+        if job is None:
+            return
+        try:
+            await send_text(dict(self._metadata(job), status=200))
+
+            async def send(chunk):
+                writer.write(websocket_frame(BINARY, chunk))
+                await writer.drain()
+
+            try:
+                await self._pump(job, send)
+            except JobError as error:
+                await send_text({'error': str(error), 'status': 500})
+                writer.write(websocket_frame(CLOSE, struct.pack('!H', 1011)))
+            else:
+                await send_text({'done': True})
+                writer.write(websocket_frame(CLOSE, struct.pack('!H', 1000)))
+            await writer.drain()
+        finally:
+            self._release()
+
+async def fetch_http(host, port, **job):
+    """Client helper: run a job over /simulate and return the (n_samples, 4) states."""
+    reader, writer = await asyncio.open_connection(host, port)
+    query = '&'.join(f"{key}={value}" for key, value in job.items())
+    writer.write(f"GET /simulate?{query} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode('latin-1'))
+    await writer.drain()
+    status_line, headers = await _read_head(reader)
+    if ' 200 ' not in status_line:
+        body = await reader.read()
+        writer.close()
+        raise RuntimeError(f"{status_line}: {body.decode('utf-8')}")
+    chunks = []
+    while True:
+        size = int((await reader.readuntil(b'\r\n')).strip(), 16)
+        if size == 0:
+            break
+        data = await reader.readexactly(size + 2)
+        chunks.append(decode_chunk(data[:-2], headers['x-pendulum-dtype'])[1])
+    # Trailer lines end with an empty line; X-Pendulum-Error reports a job that failed mid-stream
+    error = None
+    while True:
+        line = (await reader.readuntil(b'\r\n')).decode('latin-1').strip()
+        if not line:
+            break
+        if line.lower().startswith('x-pendulum-error:'):
+            error = line.split(':', 1)[1].strip()
+    writer.close()
+    if error is not None:
+        raise RuntimeError(error)
+    return np.concatenate(chunks)
+
+async def fetch_websocket(host, port, **job):
+    """Client helper: run a job over /ws and return the (n_samples, 4) states."""
+    reader, writer = await asyncio.open_connection(host, port)
+    key = base64.b64encode(os.urandom(16)).decode('latin-1')
+    writer.write((f"GET /ws HTTP/1.1\r\nHost: {host}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                  f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode('latin-1'))
+    writer.write(websocket_frame(TEXT, json.dumps(job).encode('utf-8'), mask=True))
+    await writer.drain()
+    await _read_head(reader)
+    opcode, payload = await read_websocket_frame(reader)
+    metadata = json.loads(payload)
+    if metadata['status'] != 200:
+        writer.close()
+        raise RuntimeError(metadata['error'])
+    chunks = []
+    while True:
+        opcode, payload = await read_websocket_frame(reader)
+        if opcode == BINARY:
+            chunks.append(decode_chunk(payload, metadata['dtype'])[1])
+            continue
+        message = {} if opcode == CLOSE else json.loads(payload)
+        if 'error' in message:
+            writer.close()
+            raise RuntimeError(message['error'])
+        if opcode == CLOSE or message.get('done'):
+            break
+    writer.close()
+    return np.concatenate(chunks)
+
+#Example implementation
+
+def main():
+    server = SimulationServer()
+    print(f"Serving simulations on http://{server.host}:{server.port} "
+          "(GET /simulate?angle1=1.5&n_steps=10000, WebSocket /ws, GET /health)")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
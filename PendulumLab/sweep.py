@@ -0,0 +1,132 @@
+"""
+File name: sweep.py
+Author: Troy Chin (CWID: 885586685)
+Date: 2026-10-18
+Version: 1.0
+Status: Ready to deliver to customers
+Description: This script runs parameter sweeps of the double pendulum across a pool of worker processes.
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import numpy as np
+from ensemble import PendulumEnsemble
+
+class ParameterSweep:
+
+    def __init__(self, angles1, angles2, mass_ratios=(1.0,), length_ratios=(1.0,),
+                 mass1=1.0, length1=1.0, g=9.81, dt=0.01, n_steps=1000, method='runge_kutta'):
+        """Initialize a grid over (angle1, angle2, mass2 / mass1, length2 / length1); angle1 varies slowest."""
+        self.axes = [np.atleast_1d(np.asarray(axis, dtype=float))
+                     for axis in (angles1, angles2, mass_ratios, length_ratios)]
+        self.shape = tuple(len(axis) for axis in self.axes)
+        self.mass1 = mass1
+        self.length1 = length1
+        self.g = g
+        self.dt = dt
+        self.n_steps = n_steps
+        self.method = method
+
+    def __len__(self):
+        return int(np.prod(self.shape))
+
+    def parameters(self, start, stop):
+        """Get the angle1, angle2, mass ratio and length ratio arrays for grid points start to stop."""
+        indices = np.unravel_index(np.arange(start, stop), self.shape)
+        return [axis[index] for axis, index in zip(self.axes, indices)]
+
+    def signature(self):
+        """Describe the sweep so a resumed run can check it is continuing the same sweep."""
+        return {
+            'axes': [axis.tolist() for axis in self.axes],
+            'mass1': self.mass1, 'length1': self.length1, 'g': self.g,
+            'dt': self.dt, 'n_steps': self.n_steps, 'method': self.method,
+        }
+
+    def run_chunk(self, start, stop):
+        """Integrate grid points start to stop as one vectorized ensemble and return their final states."""
+        angles1, angles2, mass_ratios, length_ratios = self.parameters(start, stop)
+        ensemble = PendulumEnsemble(self.mass1, self.mass1 * mass_ratios, self.length1, self.length1 * length_ratios,
+                                    angles1, angles2, 0.0, 0.0, self.g)
+        return ensemble.simulate(self.dt, self.n_steps, method=self.method)
+
+    def run(self, output, chunk_size=10000, workers=None):
+        """
+        Run the sweep and store the (len(self), 4) final states in the .npy file at output.
+        Finished chunks are recorded in output + '.progress', so running again after a crash
+        only computes the chunks that are missing. workers=1 runs in this process.
+        """
+        n_chunks = -(-len(self) // chunk_size)
+        progress_path = output + '.progress'
+        header = dict(self.signature(), chunk_size=chunk_size)
+        done = self._load_progress(output, progress_path, header)
+
+        if done is None:
+            results = np.lib.format.open_memmap(output, mode='w+', dtype=np.float64, shape=(len(self), 4))
+            with open(progress_path, 'w') as progress:
+                progress.write(json.dumps(header) + '\n')
+            done = set()
+        else:
+            results = np.lib.format.open_memmap(output, mode='r+')
+
+        pending = [chunk for chunk in range(n_chunks) if chunk not in done]
+        with open(progress_path, 'a') as progress:
+            for chunk, states in self._compute(pending, chunk_size, workers):
+                start = chunk * chunk_size
+                results[start:start + len(states)] = states
+                results.flush()
+                # Only mark the chunk as done once its rows are on disk
+                progress.write(f"{chunk}\n")
+                progress.flush()
+                os.fsync(progress.fileno())
+        return results
+
+    def _load_progress(self, output, progress_path, header):
+        """Read the finished chunk indices of an earlier run, or None when starting fresh."""
+        if not (os.path.exists(output) and os.path.exists(progress_path)):
+            return None
+        with open(progress_path) as progress:
+            lines = progress.read().splitlines()
+        if not lines:
+            return None
+        if json.loads(lines[0]) != header:
+            raise ValueError(f"{output} belongs to a different sweep or chunk size. "
+                             "Remove it or choose another output file.")
+        return {int(line) for line in lines[1:] if line.strip()}
+
+    def _compute(self, chunks, chunk_size, workers):
+        """Yield (chunk, final states) pairs, keeping at most two chunks per worker in flight."""
+        bounds = {chunk: (chunk * chunk_size, min((chunk + 1) * chunk_size, len(self))) for chunk in chunks}
+        if workers == 1:
+            for chunk in chunks:
+                yield chunk, self.run_chunk(*bounds[chunk])
+            return
+
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            window = 2 * workers
+            queue = iter(chunks)
+            in_flight = {}
+            for chunk in queue:
+                in_flight[executor.submit(self.run_chunk, *bounds[chunk])] = chunk
+                if len(in_flight) >= window:
+                    break
+            while in_flight:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    yield in_flight.pop(future), future.result()
+                    next_chunk = next(queue, None)
+                    if next_chunk is not None:
+                        in_flight[executor.submit(self.run_chunk, *bounds[next_chunk])] = next_chunk
+
+#Example implementation
+
+def main():
+    sweep = ParameterSweep(np.linspace(-np.pi, np.pi, 100), np.linspace(-np.pi, np.pi, 100),
+                           mass_ratios=[0.5, 1.0, 2.0], n_steps=500)
+    results = sweep.run('sweep_results.npy', chunk_size=2500)
+    print(f"Finished {len(sweep)} grid points; final states stored in sweep_results.npy ({results.shape}).")
+
+if __name__ == '__main__':
+    main()
@@ -7,12 +7,40 @@ Status: Ready to deliver to customers
 Description: Unit tests for the double pendulum simulation components.
 """
 
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
 import numpy as np
-from numerical_methods import NumericalMethods
-from data_logger import DataLogger
+from numerical_methods import NumericalMethods, DormandPrince, Event, poincare_section, flip_event
+from data_logger import DataLogger, StreamingDataLogger
 from pendulum import DoublePendulum
-from visualization import Visualization
+from visualization import Visualization, compute_positions
+from ensemble import PendulumEnsemble
+import fast_rhs
+from sweep import ParameterSweep
+import render
+from chaos_map import ChaosMap, flip_times
+from cache import TrajectoryCache
+from lyapunov import lyapunov_spectrum, largest_lyapunov_exponent, pendulum_lyapunov_spectrum
+import benchmark
+from instrumentation import Instrumentation, JSONLinesSink
+import planner
+from planner import plan_integration
+import diagnostics
+import server
+from nlink import NLinkPendulum, solve_tridiagonal
+import pipeline
+import cli
+from montecarlo import MonteCarlo, OnlineStatistics, Normal, Uniform
+from checkpoint import CheckpointedRun, resume
+from trajectory_store import (TrajectoryStore, TrajectoryWriter, save_logger, save_trajectory, pendulum_parameters,
+                              save_ensemble_trajectory, HEADER_SIZE)
 
 #Import any test models here.
 
@@ -48,6 +76,22 @@ class TestSimulation(unittest.TestCase):
         self.assertAlmostEqual(self.pendulum.angle1, self.angle1)
         self.assertAlmostEqual(self.pendulum.angle2, self.angle2)
 
+    def test_energy_conserved_by_equations_of_motion(self):
+        """Test that total_energy is a constant of the equations of motion."""
+        energy = self.pendulum.total_energy()
+        trajectory = self.numerical_methods.integrate(self.pendulum.equations_of_motion,
+                                                      self.pendulum.compute_state(), (0, 5), 1000)
+        self.pendulum.initial_conditions(self.mass1, self.mass2, self.length1, self.length2, *trajectory[-1])
+        self.assertAlmostEqual(self.pendulum.total_energy(), energy, delta=1e-6)
+
+    def test_canonical_coordinates(self):
+        """Test the Hamiltonian formulation against the Lagrangian one."""
+        pendulum = DoublePendulum(1.3, 0.7, 1.1, 0.8, 0.9, -2.1, 0.4, -1.3, 9.7)
+        state = pendulum.compute_state()
+        canonical = pendulum.to_canonical(state)
+        np.testing.assert_allclose(pendulum.from_canonical(canonical), state, atol=1e-12)
+        self.assertAlmostEqual(pendulum.hamiltonian(canonical), pendulum.total_energy(), delta=1e-12)
+
     def test_data_logging(self):
         """Test the data logging functionality."""
         test_data = [self.angle1, self.angle2, self.velocity1, self.velocity2]
@@ -58,6 +102,602 @@ class TestSimulation(unittest.TestCase):
         self.assertEqual(len(logged_data), 1)  # Check if one entry is logged
         self.assertEqual(logged_data[0], test_data)
         
+class TestStreamingDataLogger(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.states = np.arange(4 * 23, dtype=float).reshape(23, 4)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_chunked_decimated_logging(self):
+        """Test that single and block logging keep every k-th state in fixed-size chunks."""
+        single = StreamingDataLogger(os.path.join(self.directory.name, 'single'), chunk_size=3, decimation=2)
+        for state in self.states:
+            single.log_state(state)
+        block = StreamingDataLogger(os.path.join(self.directory.name, 'block'), chunk_size=3, decimation=2)
+        block.log_states(self.states[:5])
+        block.log_states(self.states[5:])
+
+        for logger in (single, block):
+            self.assertEqual(logger.n_chunks, 4)  # 12 kept states, 3 per chunk
+            self.assertEqual(logger.count, 0)
+            np.testing.assert_array_equal(logger.load(), self.states[::2])
+
+    def test_csv_conversion(self):
+        """Test the optional CSV export of a streaming run."""
+        with StreamingDataLogger(self.directory.name, chunk_size=10) as logger:
+            logger.log_states(self.states)
+        filename = os.path.join(self.directory.name, 'states.csv')
+        logger.save_to_csv(filename)
+        np.testing.assert_array_equal(np.loadtxt(filename, delimiter=',', skiprows=1), self.states)
+        with self.assertRaises(FileExistsError):
+            StreamingDataLogger(self.directory.name)
+
+class TestTrajectoryStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'run.traj')
+        self.states = np.random.default_rng(0).normal(size=(101, 4))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_float32_ensemble(self):
+        """Test that float32 ensemble trajectories stream to half-size files and read back per member."""
+        ensemble = PendulumEnsemble(1.0, 1.0, 1.0, 1.0, np.linspace(-1, 1, 6), 0.3, 0.0, 0.0, dtype=np.float32)
+        with TrajectoryWriter(self.path, 0.01, dtype=np.float32, members=len(ensemble)) as writer:
+            trajectory = ensemble.simulate(0.01, 20, record=True, writer=writer)
+        store = TrajectoryStore(self.path)
+        self.assertEqual(store.states.dtype, np.float32)
+        self.assertEqual(store.members, 6)
+        np.testing.assert_array_equal(store.ensemble_states(), trajectory)
+
+        wide = os.path.join(self.directory.name, 'wide.traj')
+        save_ensemble_trajectory(wide, trajectory.astype(np.float64), 0.01)
+        self.assertEqual(os.path.getsize(wide) - HEADER_SIZE, 2 * (os.path.getsize(self.path) - HEADER_SIZE))
+
+    def test_round_trip_and_queries(self):
+        """Test header, memory-mapped states, time windows and sub-sampling."""
+        pendulum = DoublePendulum(1.0, 2.0, 1.5, 0.5, 0.1, 0.2, 0.0, 0.0)
+        with TrajectoryWriter(self.path, dt=0.01, method='runge_kutta',
+                              parameters=pendulum_parameters(pendulum)) as writer:
+            writer.append(self.states[:40])
+            writer.append(self.states[40:])
+        store = TrajectoryStore(self.path)
+        self.assertIsInstance(store.states, np.memmap)
+        self.assertEqual((len(store), store.method, store.parameters['mass2']), (101, 'runge_kutta', 2.0))
+        np.testing.assert_array_equal(store.states, self.states)
+
+        times, states = store.window(0.25, 0.5)
+        np.testing.assert_allclose(times, np.arange(25, 51) * 0.01)
+        np.testing.assert_array_equal(states, self.states[25:51])
+        times, states = store.every(10)
+        self.assertEqual(len(times), 11)
+        np.testing.assert_array_equal(states, self.states[::10])
+
+    def test_float32_and_logger_export(self):
+        """Test reduced-precision storage and conversion from a streaming logger."""
+        save_trajectory(self.path, self.states, dt=0.01, dtype=np.float32)
+        store = TrajectoryStore(self.path)
+        self.assertEqual(store.states.dtype, np.float32)
+        np.testing.assert_allclose(store.states, self.states, rtol=1e-6)
+
+        logger = StreamingDataLogger(os.path.join(self.directory.name, 'chunks'), chunk_size=16, decimation=2)
+        logger.log_states(self.states)
+        save_logger(self.path, logger, dt=0.01)
+        store = TrajectoryStore(self.path)
+        self.assertAlmostEqual(store.dt, 0.02)
+        np.testing.assert_array_equal(store.states, self.states[::2])
+
+class TestTrajectoryCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.pendulum = DoublePendulum(1.0, 1.0, 1.0, 1.0, np.pi / 3, np.pi / 6, 0.0, 0.0)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_hits_and_extension(self):
+        """Test that hits are memory-mapped and longer runs continue the cached prefix."""
+        cache = TrajectoryCache(self.directory.name)
+        self.assertIsNone(cache.get(self.pendulum, 0.01, 50))
+        first = cache.trajectory(self.pendulum, 0.01, 50)
+        hit = cache.get(self.pendulum, 0.01, 20)
+        self.assertIsInstance(hit, np.memmap)
+        np.testing.assert_array_equal(hit, first[:21])
+
+        extended = cache.trajectory(self.pendulum, 0.01, 120)
+        direct = NumericalMethods(dt=0.01).integrate(self.pendulum.equations_of_motion,
+                                                     self.pendulum.compute_state(), None, 120)
+        np.testing.assert_array_equal(extended, direct)
+        self.assertIsNone(cache.get(self.pendulum, 0.01, 120, method='euler'))
+
+    def test_adaptive_tolerance_in_key(self):
+        """Test that adaptive runs with different tolerances are cached separately."""
+        cache = TrajectoryCache(self.directory.name)
+        loose = np.array(cache.trajectory(self.pendulum, 0.1, 50, 'adaptive_runge_kutta', tolerance=1e-2))
+        tight = np.array(cache.trajectory(self.pendulum, 0.1, 50, 'adaptive_runge_kutta', tolerance=1e-10))
+        expected = NumericalMethods(dt=0.1).integrate(self.pendulum.equations_of_motion,
+                                                      self.pendulum.compute_state(), None, 50,
+                                                      method='adaptive_runge_kutta', tolerance=1e-10)
+        np.testing.assert_array_equal(tight, expected)
+        self.assertFalse(np.array_equal(loose, tight))
+        self.assertEqual(cache.key(self.pendulum, 0.01, 'euler', 1e-2), cache.key(self.pendulum, 0.01, 'euler'))
+
+    def test_lru_eviction(self):
+        """Test that the least recently used run is evicted once the size limit is exceeded."""
+        cache = TrajectoryCache(self.directory.name, max_bytes=2 * (128 + 101 * 32))
+        other = DoublePendulum(1.0, 1.0, 1.0, 1.0, 0.1, 0.2, 0.0, 0.0)
+        third = DoublePendulum(1.0, 1.0, 1.0, 1.0, 0.3, 0.4, 0.0, 0.0)
+        cache.trajectory(self.pendulum, 0.01, 100)
+        cache.trajectory(other, 0.01, 100)
+        cache.get(self.pendulum, 0.01, 100)  # Now other is the least recently used
+        cache.trajectory(third, 0.01, 100)
+        reopened = TrajectoryCache(self.directory.name, max_bytes=cache.max_bytes)
+        self.assertIsNone(reopened.get(other, 0.01, 100))
+        self.assertIsNotNone(reopened.get(self.pendulum, 0.01, 100))
+        self.assertLessEqual(reopened.total_bytes(), cache.max_bytes)
+
+class TestCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.pendulum = DoublePendulum(1.0, 1.0, 1.0, 1.0, np.pi / 2, np.pi / 3, 0.0, 0.0)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_resume_is_bit_identical(self):
+        """Test that an interrupted and resumed run matches an uninterrupted one exactly, logs included."""
+        for method in ('runge_kutta', 'adaptive_runge_kutta'):
+            base = os.path.join(self.directory.name, method)
+            settings = {'method': method, 'checkpoint_every': 70, 'chunk_size': 64, 'decimation': 3}
+            full = CheckpointedRun(self.pendulum, 0.01, 500, base + '_full.npz',
+                                   log_directory=base + '_full', **settings)
+            full.run()
+
+            interrupted = CheckpointedRun(self.pendulum, 0.01, 500, base + '.npz', log_directory=base, **settings)
+            interrupted.run(max_steps=230)  # Last checkpoint at step 210
+            interrupted.logger.flush()  # Chunk written after the checkpoint, as a crash could leave behind
+            resumed = resume(base + '.npz')
+
+            self.assertEqual(resumed.step_count, 500)
+            np.testing.assert_array_equal(resumed.state, full.state)
+            np.testing.assert_array_equal(resumed.logger.load(), full.logger.load())
+            self.assertEqual(len(resumed.logger), len(range(0, 501, 3)))
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_accuracy_vs_cost(self):
+        """Test that the error against the reference shrinks with dt at the expected order."""
+        pendulum = DoublePendulum(1.0, 1.0, 1.0, 1.0, np.pi / 3, np.pi / 6, 0.0, 0.0)
+        rows = benchmark.accuracy_vs_cost(pendulum, t_end=0.5, dts=(0.02, 0.01))
+        errors = {(row['method'], row['dt']): row['error'] for row in rows}
+        self.assertEqual({row['method'] for row in rows}, set(benchmark.METHODS))
+        self.assertGreater(errors[('runge_kutta', 0.02)] / errors[('runge_kutta', 0.01)], 10)
+        self.assertGreater(errors[('euler', 0.02)] / errors[('euler', 0.01)], 1.5)
+
+    def test_compare_flags_regressions(self):
+        """Test that only metrics worse than the baseline by more than the tolerance are flagged."""
+        baseline = {'metrics': {'rate': {'value': 100.0, 'unit': 'steps/s', 'higher_is_better': True},
+                                'frame': {'value': 10.0, 'unit': 'ms', 'higher_is_better': False}}}
+        report = {'metrics': {'rate': {'value': 70.0, 'unit': 'steps/s', 'higher_is_better': True},
+                              'frame': {'value': 11.0, 'unit': 'ms', 'higher_is_better': False},
+                              'new': {'value': 1.0, 'unit': 'ms', 'higher_is_better': False}}}
+        regressions = benchmark.compare(report, baseline, tolerance=0.2)
+        self.assertEqual([regression['name'] for regression in regressions], ['rate'])
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.pendulum = DoublePendulum(1.0, 1.0, 1.0, 1.0, np.pi / 3, np.pi / 6, 0.0, 0.0)
+        self.instrumentation = Instrumentation()
+
+    def test_integrate_counters(self):
+        """Test that RHS calls and steps are counted without changing the result."""
+        plain = NumericalMethods(dt=0.01).integrate(self.pendulum.equations_of_motion,
+                                                    self.pendulum.compute_state(), None, 50)
+        methods = NumericalMethods(dt=0.01, instrumentation=self.instrumentation)
+        counted = methods.integrate(self.pendulum.equations_of_motion, self.pendulum.compute_state(), None, 50)
+        np.testing.assert_array_equal(counted, plain)
+        summary = self.instrumentation.summary()
+        self.assertEqual(summary['counters']['rhs_calls'], 4 * 50)
+        self.assertEqual(summary['counters']['steps'], 50)
+        self.assertEqual(summary['phase_calls']['integrate'], 1)
+
+        methods.integrate(self.pendulum.equations_of_motion, self.pendulum.compute_state(), (0, 5.0), 10,
+                          method='adaptive_runge_kutta')
+        self.assertIn('rejected_steps', self.instrumentation.counters)
+
+    def test_logger_phases_and_sink(self):
+        """Test that logging and flushing are timed and every phase reaches the JSON-lines sink."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'profile.jsonl')
+            with JSONLinesSink(path) as sink:
+                self.instrumentation.sinks.append(sink)
+                logger = DataLogger(instrumentation=self.instrumentation)
+                logger.log_states(np.zeros((10, 4)))
+                logger.save_to_csv(os.path.join(directory, 'data.csv'))
+                self.instrumentation.report()
+            with open(path) as file:
+                records = [json.loads(line) for line in file]
+        self.assertEqual([record.get('name') for record in records], ['log', 'flush', None])
+        self.assertEqual(records[-1]['counters']['logged_states'], 10)
+
+class TestPlanner(unittest.TestCase):
+
+    def setUp(self):
+        self.pendulum = DoublePendulum(1.0, 1.0, 1.0, 1.0, np.pi / 2, np.pi / 2, 0.0, 0.0)
+
+    def test_plan_meets_target(self):
+        """Test that the planned run keeps the error below the target and prefers the cheap high-order method."""
+        methods = ('euler', 'midpoint', 'runge_kutta')
+        for metric in ('position', 'energy'):
+            plan = plan_integration(self.pendulum, 4.0, 1e-4, metric=metric, methods=methods)
+            self.assertEqual(plan.method, 'runge_kutta')
+            self.assertAlmostEqual(plan.dt * plan.n_steps, 4.0)
+            trajectory = plan.integrate(self.pendulum)
+            if metric == 'energy':
+                energy = self.pendulum.hamiltonian(self.pendulum.to_canonical(trajectory.T))
+                error = np.max(np.abs(energy - energy[0]))
+            else:
+                reference = DormandPrince(self.pendulum.equations_of_motion, 0.0, self.pendulum.compute_state(),
+                                          rtol=1e-12, atol=1e-12).solve(4.0)
+                error = np.max(np.abs(trajectory[-1, :2] - reference[:2]))
+            self.assertLess(error, 1e-4)
+            self.assertIn('runge_kutta', plan.report())
+
+    def test_unknown_metric(self):
+        """Test that an unknown metric is rejected."""
+        with self.assertRaises(ValueError):
+            plan_integration(self.pendulum, 1.0, 1e-4, metric='momentum')
+
+    def test_long_chaotic_run_is_infeasible(self):
+        """Test that an overflowing error growth marks every method infeasible instead of raising OverflowError."""
+        self.assertEqual(planner.error_growth(self.pendulum, 2000.0, 1.0, 'position', lyapunov_time=10.0), np.inf)
+        with mock.patch.object(planner, 'error_growth', return_value=np.inf):
+            with self.assertRaises(ValueError):
+                plan_integration(self.pendulum, 4.0, 1e-2, methods=('runge_kutta', 'adaptive_runge_kutta'))
+
+    def test_adaptive_cost_uses_run_tolerance(self):
+        """Test that a loose target predicts the cost of the capped tolerance the plan actually runs at."""
+        plan = plan_integration(self.pendulum, 4.0, 10.0, methods=('adaptive_runge_kutta',))
+        self.assertEqual(plan.tolerance, 1e-3)
+        instrumentation = Instrumentation()
+        plan.integrate(self.pendulum, instrumentation)
+        self.assertLess(abs(np.log(plan.predicted_rhs_calls / instrumentation.counters['rhs_calls'])), np.log(1.5))
+
+class TestDiagnostics(unittest.TestCase):
+
+    def setUp(self):
+        self.pendulum = DoublePendulum(1.2, 0.8, 1.1, 0.9, np.pi / 3, np.pi / 6, 0.5, -0.2)
+        self.dt = 0.001
+        self.trajectory = NumericalMethods(dt=self.dt).integrate(self.pendulum.equations_of_motion,
+                                                                 self.pendulum.compute_state(), None, 500)
+
+    def test_matches_scalar_methods(self):
+        """Test the vectorized energies and positions against the DoublePendulum methods, state by state."""
+        energy = diagnostics.total_energy(self.trajectory, self.pendulum)
+        positions = diagnostics.positions(self.trajectory, self.pendulum)
+        for i in (0, 250, 500):
+            pendulum = DoublePendulum(1.2, 0.8, 1.1, 0.9, *self.trajectory[i])
+            self.assertAlmostEqual(energy[i], pendulum.total_energy(), places=12)
+            np.testing.assert_allclose(positions[i], pendulum.get_positions(), atol=1e-14)
+
+        # Cartesian velocities are the time derivatives of the positions
+        velocities = diagnostics.velocities(self.trajectory, self.pendulum)
+        np.testing.assert_allclose(np.gradient(positions, self.dt, axis=0)[1:-1], velocities[1:-1], atol=1e-4)
+
+    def test_ensemble_trajectories(self):
+        """Test (N, T, 4) trajectories with per-member parameters."""
+        ensemble = PendulumEnsemble([1.0, 2.0], 1.0, [1.0, 0.5], 1.0, [0.3, 1.0], 0.2, 0.0, 0.0)
+        trajectory = ensemble.simulate(0.01, 50, record=True).swapaxes(0, 1)
+        drift = diagnostics.energy_drift(trajectory, ensemble)
+        self.assertEqual(drift.shape, (2, 51))
+        self.assertLess(np.abs(drift).max(), 1e-6)
+        pendulum = DoublePendulum(2.0, 1.0, 0.5, 1.0, *trajectory[1, 20])
+        self.assertAlmostEqual(diagnostics.total_energy(trajectory, ensemble)[1, 20], pendulum.total_energy())
+
+        # The same run in the (T, N, 4) layout takes E0 along the first axis
+        drift_by_time = diagnostics.energy_drift(trajectory.swapaxes(0, 1), ensemble, member_axis=1)
+        self.assertEqual(drift_by_time.shape, (51, 2))
+        np.testing.assert_allclose(drift_by_time, drift.T, atol=1e-15)
+        np.testing.assert_array_equal(drift_by_time[0], 0.0)
+
+    def test_streaming_reducers(self):
+        """Test that the reducers over logger chunks match the results on the whole trajectory."""
+        with tempfile.TemporaryDirectory() as directory:
+            logger = StreamingDataLogger(directory, chunk_size=64)
+            logger.log_states(self.trajectory)
+            drift, mean = diagnostics.reduce_chunks(
+                logger.iter_chunks(), diagnostics.MaxEnergyDrift(self.pendulum),
+                diagnostics.RunningMean(lambda chunk: diagnostics.total_energy(chunk, self.pendulum)))
+        energy = diagnostics.total_energy(self.trajectory, self.pendulum)
+        self.assertAlmostEqual(drift.max_drift, np.abs(energy - energy[0]).max(), places=15)
+        self.assertEqual(drift.index, np.argmax(np.abs(energy - energy[0])))
+        self.assertAlmostEqual(mean.mean, energy.mean(), places=12)
+        self.assertEqual(mean.count, len(self.trajectory))
+
+class TestSimulationServer(unittest.TestCase):
+
+    def test_streams_and_backpressure(self):
+        """Test HTTP and WebSocket streams, a stalled client, and the job limit against localhost."""
+        pendulum = DoublePendulum(1.0, 1.0, 1.0, 1.0, 1.0, 0.5, 0.0, 0.0)
+        reference = NumericalMethods(dt=0.01).integrate(pendulum.equations_of_motion,
+                                                        pendulum.compute_state(), None, 1500)
+
+        async def run():
+            simulation = server.SimulationServer(port=0, workers=2, max_jobs=3, queue_size=2)
+            port = await simulation.start()
+            try:
+                # A client that never reads holds a job slot but must not stall the others
+                stalled = []
+                for _ in range(2):
+                    _, writer = await asyncio.open_connection('127.0.0.1', port)
+                    writer.write(b"GET /simulate?n_steps=100000000&chunk_steps=10000 HTTP/1.1\r\n\r\n")
+                    stalled.append(writer)
+                await asyncio.sleep(0.2)
+                http, = await asyncio.wait_for(asyncio.gather(
+                    server.fetch_http('127.0.0.1', port, angle1=1.0, angle2=0.5, n_steps=1500, decimation=3,
+                                      chunk_steps=400)), timeout=30)
+                np.testing.assert_array_equal(http, reference[::3])
+
+                with self.assertRaises(RuntimeError):
+                    await server.fetch_http('127.0.0.1', port, method='unknown')
+                stalled[0].close()
+                await asyncio.sleep(0.2)
+                websocket = await asyncio.wait_for(server.fetch_websocket(
+                    '127.0.0.1', port, angle1=1.0, angle2=0.5, n_steps=1500, chunk_steps=700, dtype='float32'),
+                    timeout=30)
+                self.assertEqual(websocket.dtype, np.float32)
+                np.testing.assert_allclose(websocket, reference, atol=1e-5)
+
+                # Occupy the freed slot and the last one; the next job is refused
+                _, writer = await asyncio.open_connection('127.0.0.1', port)
+                writer.write(b"GET /simulate?n_steps=100000000&chunk_steps=10000 HTTP/1.1\r\n\r\n")
+                stalled.append(writer)
+                _, writer = await asyncio.open_connection('127.0.0.1', port)
+                writer.write(b"GET /simulate?n_steps=100000000&chunk_steps=10000 HTTP/1.1\r\n\r\n")
+                stalled.append(writer)
+                await asyncio.sleep(0.2)
+                with self.assertRaisesRegex(RuntimeError, '503'):
+                    await server.fetch_http('127.0.0.1', port, n_steps=10)
+                for writer in stalled:
+                    writer.close()
+            finally:
+                await simulation.close()
+
+        asyncio.run(run())
+
+    def test_parse_job_rejects_bad_numbers(self):
+        """Test that settings that would stall a worker are rejected before a job starts."""
+        for values in ({'method': 'adaptive_runge_kutta', 'tolerance': '0'}, {'tolerance': '-1e-6'},
+                       {'tolerance': 'nan'}, {'angle1': 'nan'}, {'velocity2': 'inf'}, {'g': 'nan'},
+                       {'dt': 'inf'}, {'length1': '0'}, {'mass2': '-1'}, {'n_steps': '0'}):
+            with self.assertRaises(ValueError, msg=str(values)):
+                server.parse_job(values)
+        self.assertEqual(server.parse_job({'tolerance': '1e-9'})['tolerance'], 1e-9)
+
+        async def run():
+            simulation = server.SimulationServer(port=0, max_jobs=1, executor=ThreadPoolExecutor(1))
+            port = await simulation.start()
+            try:
+                with self.assertRaisesRegex(RuntimeError, '400'):
+                    await server.fetch_http('127.0.0.1', port, method='adaptive_runge_kutta', tolerance=0)
+                with self.assertRaisesRegex(RuntimeError, 'finite'):
+                    await server.fetch_websocket('127.0.0.1', port, angle1=float('nan'))
+                self.assertEqual(simulation.active_jobs, 0)
+            finally:
+                await simulation.close()
+
+        asyncio.run(run())
+
+    def test_failed_job_releases_slot(self):
+        """Test that a job failing mid-stream ends both streams with an error and frees its slot."""
+        original = server.simulate_block
+        calls = []
+
+        def failing_block(job, state, n_steps):
+            calls.append(n_steps)
+            if len(calls) % 2 == 0:
+                raise ZeroDivisionError("division by zero")
+            return original(job, state, n_steps)
+
+        async def run():
+            simulation = server.SimulationServer(port=0, max_jobs=1, executor=ThreadPoolExecutor(2))
+            port = await simulation.start()
+            try:
+                with mock.patch.object(server, 'simulate_block', failing_block):
+                    with self.assertRaisesRegex(RuntimeError, 'ZeroDivisionError'):
+                        await asyncio.wait_for(server.fetch_http('127.0.0.1', port, n_steps=50, chunk_steps=10),
+                                               timeout=10)
+                    self.assertEqual(simulation.active_jobs, 0)
+                    with self.assertRaisesRegex(RuntimeError, 'ZeroDivisionError'):
+                        await asyncio.wait_for(server.fetch_websocket('127.0.0.1', port, n_steps=50,
+                                                                      chunk_steps=10), timeout=10)
+                    self.assertEqual(simulation.active_jobs, 0)
+                states = await asyncio.wait_for(server.fetch_http('127.0.0.1', port, n_steps=20), timeout=10)
+                self.assertEqual(states.shape, (21, 4))
+                with self.assertRaisesRegex(RuntimeError, '400'):
+                    await server.fetch_http('127.0.0.1', port, length1=0.0, n_steps=10)
+                with self.assertRaisesRegex(RuntimeError, 'must be positive'):
+                    await server.fetch_websocket('127.0.0.1', port, mass2=-1.0)
+                self.assertEqual(simulation.active_jobs, 0)
+            finally:
+                await simulation.close()
+
+        asyncio.run(run())
+
+class TestNLinkPendulum(unittest.TestCase):
+
+    def test_matches_double_pendulum(self):
+        """Test that the two-link chain gives DoublePendulum's derivatives, energy and trajectory."""
+        pendulum = DoublePendulum(1.5, 0.7, 1.2, 0.8, 2.0, -1.0, 0.5, 1.5)
+        chain = NLinkPendulum.from_double_pendulum(pendulum)
+        state = pendulum.compute_state()
+        np.testing.assert_allclose(chain.equations_of_motion(0, state), pendulum.equations_of_motion(0, state),
+                                   atol=1e-12)
+        self.assertAlmostEqual(chain.total_energy(), pendulum.total_energy(), places=12)
+        methods = NumericalMethods(dt=0.01)
+        np.testing.assert_allclose(methods.integrate(chain.equations_of_motion, state, None, 200),
+                                   methods.integrate(pendulum.equations_of_motion, state, None, 200), atol=1e-9)
+
+    def test_matches_dense_solve(self):
+        """Test the O(N) tension solve against the dense mass matrix for a longer chain."""
+        rng = np.random.default_rng(3)
+        chain = NLinkPendulum(rng.uniform(0.5, 2, 6), rng.uniform(0.5, 2, 6), rng.uniform(-3, 3, 6),
+                              rng.uniform(-2, 2, 6))
+        state = chain.compute_state()
+        expected = np.linalg.solve(chain.mass_matrix(state), chain.generalized_forces(state))
+        np.testing.assert_allclose(chain.equations_of_motion(0, state)[6:], expected, atol=1e-10)
+        self.assertAlmostEqual(chain.kinetic_energy(),
+                               0.5 * state[6:] @ chain.mass_matrix(state) @ state[6:], places=10)
+
+        single = NLinkPendulum([1.0], [2.0], [0.3], [0.0])
+        self.assertAlmostEqual(single.equations_of_motion(0, single.compute_state())[1], -9.81 * np.sin(0.3) / 2.0)
+
+    def test_solve_tridiagonal(self):
+        """Test the Thomas algorithm against a dense solve."""
+        rng = np.random.default_rng(4)
+        lower, upper, rhs = rng.normal(size=4), rng.normal(size=4), rng.normal(size=5)
+        diagonal = 4 + rng.random(5)
+        matrix = np.diag(diagonal) + np.diag(lower, -1) + np.diag(upper, 1)
+        np.testing.assert_allclose(solve_tridiagonal(lower, diagonal, upper, rhs), np.linalg.solve(matrix, rhs))
+
+    def test_energy_conservation(self):
+        """Test that a triple pendulum conserves energy under Runge-Kutta with a small step."""
+        chain = NLinkPendulum([1.0, 1.0, 1.0], [1.0, 1.0, 1.0], [1.0, 0.5, -0.5], [0.0, 0.0, 0.0])
+        trajectory = NumericalMethods(dt=0.001).integrate(chain.equations_of_motion, chain.compute_state(),
+                                                          None, 2000)
+        self.assertLess(abs(chain.total_energy(trajectory[-1]) - chain.total_energy()), 1e-6)
+
+class TestPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.pendulum = DoublePendulum(1.0, 1.0, 1.0, 1.0, 1.5, 0.5, 0.0, 0.0)
+        self.reference = NumericalMethods(dt=0.01).integrate(self.pendulum.equations_of_motion,
+                                                             self.pendulum.compute_state(), None, 1000)
+
+    def source(self, n_steps=1000):
+        return pipeline.integrate_blocks(self.pendulum.equations_of_motion, self.pendulum.compute_state(), 0.01,
+                                         n_steps, block_steps=128)
+
+    def test_stages_and_sinks(self):
+        """Test decimation, energy and coordinate stages against the whole trajectory, and the sinks."""
+        with tempfile.TemporaryDirectory() as directory:
+            trajectory_path = os.path.join(directory, 'run.bin')
+            csv_path = os.path.join(directory, 'run.csv')
+            run = (pipeline.Pipeline(self.source())
+                   .then(pipeline.tap(pipeline.TrajectorySink(trajectory_path)))
+                   .then(pipeline.decimate(7))
+                   .then(pipeline.energy(self.pendulum))
+                   .then(pipeline.coordinates(self.pendulum))
+                   .to(pipeline.CSVSink(csv_path, fields=['energy']), pipeline.StatisticsSink('energy')))
+            _, _, statistics = run.run()
+
+            np.testing.assert_array_equal(TrajectoryStore(trajectory_path).states, self.reference)
+            expected = self.reference[::7]
+            rows = np.loadtxt(csv_path, delimiter=',', skiprows=1)
+            np.testing.assert_allclose(rows[:, 0], np.arange(len(expected)) * 0.07, atol=1e-12)
+            np.testing.assert_array_equal(rows[:, 1:5], expected)
+            energies = diagnostics.total_energy(expected, self.pendulum)
+            np.testing.assert_allclose(rows[:, 5], energies)
+            self.assertEqual(statistics['count'], len(expected))
+            self.assertAlmostEqual(statistics['max'], energies.max())
+
+        positions = np.vstack([block.fields['positions'] for block in
+                               pipeline.Pipeline(self.source()).then(pipeline.coordinates(self.pendulum))])
+        np.testing.assert_allclose(positions, compute_positions(self.reference, 1.0, 1.0))
+
+    def test_events_and_laziness(self):
+        """Test that the events stage matches detect_events and that a terminal event stops the integration."""
+        section = poincare_section(0)
+        log = NumericalMethods(dt=0.01).detect_events(self.pendulum.equations_of_motion,
+                                                      self.pendulum.compute_state(), None, 1000, [section])
+        blocks = list(pipeline.Pipeline(self.source()).then(pipeline.events([section],
+                                                                            self.pendulum.equations_of_motion)))
+        times = np.concatenate([block.times for block in blocks])
+        np.testing.assert_allclose(times, log.times, atol=1e-9)
+
+        pulled = []
+
+        def counted(blocks):
+            for block in blocks:
+                pulled.append(len(block))
+                yield block
+        terminal = Event(lambda t, y: y[0], terminal=True)
+        run = (pipeline.Pipeline(self.source(100000)).then(counted)
+               .then(pipeline.events([terminal], self.pendulum.equations_of_motion)))
+        self.assertEqual(pulled, [])  # Nothing runs before the blocks are pulled
+        first, = list(run)
+        self.assertEqual(len(first), 1)
+        self.assertLess(sum(pulled), 1000)
+
+class TestHeadless(unittest.TestCase):
+
+    def test_core_imports_without_matplotlib(self):
+        """Test that the simulation core and the CLI import in a fresh interpreter without loading matplotlib."""
+        code = ("import sys, pendulum, numerical_methods, data_logger, visualization, pipeline, cli; "
+                "print('matplotlib' in sys.modules)")
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+        self.assertEqual(result.stdout.strip(), 'False')
+
+    def test_cli_run(self):
+        """Test that the CLI writes the same states as a direct integration."""
+        expected = NumericalMethods(dt=0.02).integrate(DoublePendulum(1.0, 2.0, 1.0, 0.5, 1.0, -1.0, 0.0, 0.0)
+                                                       .equations_of_motion, [1.0, -1.0, 0.0, 0.0], None, 300)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'run.bin')
+            cli.main(['--mass2', '2', '--length2', '0.5', '--angle1', '1', '--angle2', '-1', '--dt', '0.02',
+                      '--steps', '300', '--decimation', '4', '--block-steps', '64', '-o', path, '-q'])
+            store = TrajectoryStore(path)
+            np.testing.assert_array_equal(store.states, expected[::4])
+            self.assertAlmostEqual(store.dt, 0.08)
+
+class TestMonteCarlo(unittest.TestCase):
+
+    def test_statistics_match_stored_members(self):
+        """Test the merged batch statistics against the full set of members, and reproducibility."""
+        monte_carlo = MonteCarlo({'angle1': Normal(1.0, 0.05), 'mass2': Uniform(0.9, 1.1)}, n_steps=100,
+                                 record_every=20, batch_size=700, seed=11)
+        statistics = monte_carlo.run(2000)
+        self.assertEqual(len(monte_carlo.times), 6)
+
+        seeds = np.random.SeedSequence(11).spawn(3)
+        final = []
+        for seed_sequence, n in zip(seeds, (700, 700, 600)):
+            ensemble = PendulumEnsemble(**monte_carlo.sample(np.random.default_rng(seed_sequence), n))
+            final.append(ensemble.simulate(0.01, 100))
+        final = np.vstack(final)
+        self.assertEqual(statistics.count[-1], 2000)
+        np.testing.assert_allclose(statistics.mean[-1], final.mean(axis=0), atol=1e-12)
+        np.testing.assert_allclose(statistics.std()[-1], final.std(axis=0, ddof=1), atol=1e-12)
+        bin_width = 4 * np.pi / 400
+        np.testing.assert_allclose(statistics.quantile(0.5)[-1, :2], np.median(final[:, :2], axis=0),
+                                   atol=bin_width)
+
+        again = MonteCarlo({'angle1': Normal(1.0, 0.05), 'mass2': Uniform(0.9, 1.1)}, n_steps=100,
+                           record_every=20, batch_size=700, seed=11).run(2000, workers=2)
+        np.testing.assert_array_equal(again.mean, statistics.mean)
+        np.testing.assert_array_equal(again.histogram, statistics.histogram)
+
+    def test_online_statistics_merge(self):
+        """Test that merging per-batch moments gives the moments of all values."""
+        values = np.random.default_rng(2).normal(3.0, 2.0, (1000, 4))
+        first, second = OnlineStatistics(1), OnlineStatistics(1)
+        first.update(0, values[:300])
+        second.update(0, values[300:])
+        first.merge(second)
+        np.testing.assert_allclose(first.mean[0], values.mean(axis=0))
+        np.testing.assert_allclose(first.variance()[0], values.var(axis=0, ddof=1))
+        with self.assertRaises(ValueError):
+            MonteCarlo({'spring': Normal(1.0, 0.1)})
+
 class TestNumericalMethods(unittest.TestCase):
     
     def setUp(self):
@@ -95,6 +735,28 @@ class TestNumericalMethods(unittest.TestCase):
         expected = [self.initial_state[0] * np.exp(-self.dt)] #Analytical solution
         self.assertAlmostEqual(result[0], expected[0], delta=1e-6)
         
+    def test_adaptive_solve_ode_continues_run(self):
+        """Test that consecutive adaptive solve_ode calls continue one Dormand-Prince run like integrate."""
+        pendulum = DoublePendulum(1.0, 1.0, 1.0, 1.0, np.pi / 2, np.pi / 3, 0.0, 0.0)
+        instrumentation = Instrumentation()
+        methods = NumericalMethods(dt=0.05, instrumentation=instrumentation)
+        y = pendulum.compute_state()
+        states = [y]
+        for _ in range(40):
+            y = methods.solve_ode(pendulum.equations_of_motion, y, method='adaptive_runge_kutta', tolerance=1e-8)
+            states.append(y)
+        expected = NumericalMethods(dt=0.05).integrate(pendulum.equations_of_motion, pendulum.compute_state(),
+                                                       None, 40, method='adaptive_runge_kutta', tolerance=1e-8)
+        # integrate() clips its last step at t_end, so only the final state may differ, within tolerance
+        np.testing.assert_array_equal(np.array(states)[:-1], expected[:-1])
+        np.testing.assert_allclose(states[-1], expected[-1], atol=1e-7)
+        self.assertEqual(instrumentation.counters['steps'], 40)
+
+        # A state that does not continue the run starts a fresh solver
+        restarted = methods.solve_ode(pendulum.equations_of_motion, pendulum.compute_state(),
+                                      method='adaptive_runge_kutta', tolerance=1e-8)
+        np.testing.assert_array_equal(restarted, expected[1])
+
     def test_midpoint(self):
         result = self.methods.solve_ode(
             self.linear_ode, self.initial_state, method='midpoint'
@@ -102,6 +764,370 @@ class TestNumericalMethods(unittest.TestCase):
         expected = [self.initial_state[0] * np.exp(-self.dt)] #Analytical solution
         self.assertAlmostEqual(result[0], expected[0], delta=1e-6)
 
+    def test_integrate_matches_solve_ode(self):
+        """Test that integrate reproduces repeated solve_ode calls."""
+        pendulum = DoublePendulum(1.0, 1.0, 1.0, 1.0, np.pi / 3, np.pi / 6, 0.0, 0.0)
+        for method in ['euler', 'runge_kutta', 'midpoint']:
+            trajectory = self.methods.integrate(pendulum.equations_of_motion, pendulum.compute_state(),
+                                                (0, 50 * self.dt), 50, method=method)
+            self.assertEqual(trajectory.shape, (51, 4))
+            state = pendulum.compute_state()
+            for i in range(50):
+                state = self.methods.solve_ode(pendulum.equations_of_motion, state, method=method)
+                np.testing.assert_allclose(trajectory[i + 1], state, rtol=1e-12, atol=1e-14)
+
+    def test_integrate_linear_ode(self):
+        """Test integrate against the analytical solution of the linear ODE."""
+        trajectory = self.methods.integrate(self.linear_ode, self.initial_state, (0, 1), 100)
+        np.testing.assert_allclose(trajectory[:, 0], np.exp(-np.linspace(0, 1, 101)), atol=1e-9)
+        with self.assertRaises(ValueError):
+            self.methods.integrate(self.linear_ode, self.initial_state, (0, 1), 100, method='unknown')
+
+    def test_symplectic_methods_bound_energy(self):
+        """Test that the symplectic methods keep the energy error small at a large step."""
+        pendulum = DoublePendulum(1.0, 1.0, 1.0, 1.0, 2.0, 1.5, 0.0, 0.0)
+        canonical = pendulum.to_canonical(pendulum.compute_state())
+        energy = pendulum.hamiltonian(canonical)
+        methods = NumericalMethods(dt=0.05)
+        for method, tolerance in [('implicit_midpoint', 0.2), ('stormer_verlet', 0.5), ('yoshida', 0.05)]:
+            trajectory = methods.integrate(pendulum.hamiltonian_equations, canonical, (0, 20), 400, method=method)
+            drift = max(abs(pendulum.hamiltonian(y) - energy) for y in trajectory)
+            self.assertLess(drift, tolerance, method)
+        step = methods.solve_ode(pendulum.hamiltonian_equations, canonical, method='yoshida')
+        np.testing.assert_allclose(step, trajectory[1], atol=1e-12)
+
+    def test_dormand_prince_fails_instead_of_hanging(self):
+        """Test that a blow-up or an impossible tolerance raises instead of shrinking the step forever."""
+        with self.assertRaisesRegex(RuntimeError, 'underflow'):
+            self.methods.integrate(lambda t, y: y**2, [1.0], (0, 2), 20, method='adaptive_runge_kutta')
+        with self.assertRaises(ValueError):
+            self.methods.integrate(self.linear_ode, self.initial_state, (0, 1), 10, method='adaptive_runge_kutta',
+                                   tolerance=0)
+        with self.assertRaises(ValueError):
+            DormandPrince(self.linear_ode, 0, self.initial_state, rtol=np.nan)
+        with self.assertRaisesRegex(RuntimeError, 'finite'):
+            DormandPrince(lambda t, y: np.full_like(y, np.nan), 0, [1.0], h0=0.1).step()
+
+    def test_dormand_prince_carries_step_size(self):
+        """Test that the adaptive solver grows its step and interpolates between steps."""
+        solver = DormandPrince(self.linear_ode, 0, self.initial_state, rtol=1e-8, atol=1e-10, h0=self.dt)
+        solver.step()
+        self.assertGreater(solver.h, self.dt)
+        result = solver.solve(5.0)
+        self.assertAlmostEqual(result[0], np.exp(-5.0), delta=1e-8)
+        t_mid = solver.t_old + 0.4 * solver.h_last
+        self.assertAlmostEqual(solver.dense_output(t_mid)[0], np.exp(-t_mid), delta=1e-8)
+        # FSAL: six new evaluations per attempted step, plus the setup evaluation
+        attempts = solver.n_accepted + solver.n_rejected
+        self.assertEqual(solver.n_fev, 1 + 6 * attempts)
+
+    def test_integrate_adaptive(self):
+        """Test adaptive integrate on a fixed output grid against a fine RK4 run."""
+        pendulum = DoublePendulum(1.0, 1.0, 1.0, 1.0, np.pi / 3, np.pi / 6, 0.0, 0.0)
+        state = pendulum.compute_state()
+        reference = self.methods.integrate(pendulum.equations_of_motion, state, (0, 2), 2000)
+        result = self.methods.integrate(pendulum.equations_of_motion, state, (0, 2), 100,
+                                        method='adaptive_runge_kutta', tolerance=1e-9)
+        np.testing.assert_allclose(result, reference[::20], atol=1e-6)
+
+class TestEvents(unittest.TestCase):
+
+    def setUp(self):
+        self.methods = NumericalMethods(dt=0.01)
+        self.pendulum = DoublePendulum(1.0, 1.0, 1.0, 1.0, 0.3, 0.2, 0.0, 0.0)
+
+    def test_poincare_section(self):
+        """Test that section crossings are located inside the step and match a tight reference."""
+        for method in ('runge_kutta', 'adaptive_runge_kutta'):
+            log = self.methods.detect_events(self.pendulum.equations_of_motion, self.pendulum.compute_state(),
+                                             None, 2000, [poincare_section()], method=method, tolerance=1e-10)
+            self.assertFalse(log.terminated)
+            self.assertAlmostEqual(log.t, 20.0)
+            self.assertGreater(len(log), 3)
+            self.assertLess(np.abs(log.states[:, 0]).max(), 1e-12)
+            self.assertTrue((log.states[:, 2] > 0).all())
+            reference = DormandPrince(self.pendulum.equations_of_motion, 0.0, self.pendulum.compute_state(),
+                                      rtol=1e-12, atol=1e-12).solve(log.times[0])
+            self.assertLess(abs(reference[0]), 1e-6)
+
+        # direction=0 records the crossings of both signs
+        sections = [poincare_section(direction=1), poincare_section(direction=-1), poincare_section(direction=0)]
+        log = self.methods.detect_events(self.pendulum.equations_of_motion, self.pendulum.compute_state(),
+                                         None, 2000, sections)
+        times_up, _ = log.of(0)
+        times_down, _ = log.of(1)
+        times_either, _ = log.of(2)
+        self.assertGreater(len(times_down), 3)
+        np.testing.assert_allclose(times_either, np.sort(np.concatenate([times_up, times_down])))
+
+    def test_direction_and_terminal(self):
+        """Test crossing directions, several events at once, and stopping at a terminal flip."""
+        both = Event(lambda t, y: y[0])
+        up = Event(lambda t, y: y[0], direction=1)
+        log = self.methods.detect_events(self.pendulum.equations_of_motion, self.pendulum.compute_state(),
+                                         None, 1000, [both, up])
+        times_both, _ = log.of(0)
+        times_up, _ = log.of(1)
+        self.assertEqual(len(times_both), 2 * len(times_up) + (len(times_both) % 2))
+        self.assertTrue(np.all(np.diff(log.times) >= 0))
+
+        pendulum = DoublePendulum(1.0, 1.0, 1.0, 1.0, 2.5, 2.0, 0.0, 0.0)
+        log = self.methods.detect_events(pendulum.equations_of_motion, pendulum.compute_state(), None, 2000,
+                                         [flip_event()])
+        self.assertTrue(log.terminated)
+        self.assertEqual(len(log), 1)
+        self.assertAlmostEqual(max(abs(log.y[0]), abs(log.y[1])), np.pi, places=9)
+        flip_time, _ = flip_times(np.array([2.5]), np.array([2.0]), 20.0, 0.01)
+        self.assertLess(flip_time[0] - log.t, 0.01 + 1e-9)
+        self.assertGreaterEqual(flip_time[0] - log.t, 0)
+
+class TestPendulumEnsemble(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a few pendulums with different parameters."""
+        self.dt = 0.01
+        self.pendulums = [
+            DoublePendulum(1.0, 1.0, 1.0, 1.0, np.pi / 3, np.pi / 6, 0.0, 0.0),
+            DoublePendulum(2.0, 0.5, 1.5, 0.7, -0.4, 2.5, 0.3, -1.2, 9.7),
+            DoublePendulum(0.3, 1.7, 0.8, 1.1, 3.0, -3.0, 2.0, 1.0, 1.62),
+        ]
+        self.ensemble = PendulumEnsemble.from_pendulums(self.pendulums)
+
+    def test_equations_of_motion_match_scalar(self):
+        """Test the vectorized derivatives against DoublePendulum.equations_of_motion."""
+        derivatives = self.ensemble.equations_of_motion(0, self.ensemble.compute_state())
+        for i, pendulum in enumerate(self.pendulums):
+            expected = pendulum.equations_of_motion(0, pendulum.compute_state())
+            np.testing.assert_allclose(derivatives[i], expected, rtol=1e-12, atol=1e-12)
+
+    def test_step_matches_scalar_path(self):
+        """Test that each member follows the scalar solve_ode path for every method."""
+        methods = NumericalMethods(dt=self.dt)
+        for method in ['euler', 'runge_kutta', 'midpoint']:
+            ensemble = PendulumEnsemble.from_pendulums(self.pendulums)
+            final = ensemble.simulate(self.dt, 20, method=method)
+            for i, pendulum in enumerate(self.pendulums):
+                state = pendulum.compute_state()
+                for _ in range(20):
+                    state = methods.solve_ode(pendulum.equations_of_motion, state, method=method)
+                np.testing.assert_allclose(final[i], state, rtol=1e-10, atol=1e-12)
+
+    def test_broadcast_and_record(self):
+        """Test scalar broadcasting and trajectory recording."""
+        ensemble = PendulumEnsemble(1.0, 1.0, 1.0, 1.0, np.linspace(-1, 1, 5), 0.0, 0.0, 0.0)
+        self.assertEqual(len(ensemble), 5)
+        trajectory = ensemble.simulate(self.dt, 3, record=True)
+        self.assertEqual(trajectory.shape, (4, 5, 4))
+        with self.assertRaises(ValueError):
+            ensemble.step(self.dt, method='unknown')
+
+    def test_reduced_precision(self):
+        """Test float32 and mixed precision runs against float64 and the divergence flag."""
+        angles = np.linspace(-2.0, 2.0, 50)
+        runs = {}
+        for dtype, accumulate_dtype in [(np.float64, None), (np.float32, None), (np.float32, np.float64)]:
+            ensemble = PendulumEnsemble(1.0, 1.0, 1.0, 1.0, angles, angles[::-1], 0.0, 0.0,
+                                        dtype=dtype, accumulate_dtype=accumulate_dtype)
+            initial_energy = ensemble.total_energy()
+            trajectory = ensemble.simulate(self.dt, 100, record=True)
+            self.assertEqual(trajectory.dtype, np.dtype(dtype))
+            self.assertEqual(ensemble.state.dtype, np.dtype(accumulate_dtype or dtype))
+            self.assertLess(ensemble.energy_error(initial_energy).max(), 1e-2)
+            runs[(dtype, accumulate_dtype)] = ensemble.state
+        reference = runs[(np.float64, None)]
+        mixed_error = np.abs(runs[(np.float32, np.float64)] - reference).max()
+        self.assertLess(mixed_error, 1e-3)
+        self.assertLessEqual(mixed_error, np.abs(runs[(np.float32, None)] - reference).max())
+
+        ensemble = PendulumEnsemble(1.0, 1.0, 1.0, 1.0, [0.1, 0.2], 0.0, 0.0, 0.0, dtype=np.float32)
+        initial_energy = ensemble.total_energy()
+        ensemble.state[1] = [0.2, 0.0, 5.0, 0.0]  # Corrupt one member
+        np.testing.assert_array_equal(ensemble.diverged(initial_energy, 1e-3), [1])
+
+class TestLyapunov(unittest.TestCase):
+
+    def setUp(self):
+        self.ensemble = PendulumEnsemble([1.3, 1.0], [0.7, 1.0], [1.1, 1.0], [0.8, 1.0],
+                                         [0.1, 2.0], [0.1, 2.0], [0.4, 0.0], [-0.3, 0.0], [9.7, 9.81])
+
+    def test_jacobian_matches_finite_differences(self):
+        """Test the analytic Jacobian against central differences of equations_of_motion."""
+        state = self.ensemble.compute_state()
+        jacobian = self.ensemble.jacobian(0, state)
+        for k in range(4):
+            shift = np.zeros(4)
+            shift[k] = 1e-6
+            column = (self.ensemble.equations_of_motion(0, state + shift) -
+                      self.ensemble.equations_of_motion(0, state - shift)) / 2e-6
+            np.testing.assert_allclose(jacobian[:, :, k], column, atol=1e-7)
+
+    def test_spectrum(self):
+        """Test that regular motion has near-zero exponents, chaotic motion a positive one."""
+        spectrum = lyapunov_spectrum(self.ensemble, 0.01, 2000)
+        self.assertLess(spectrum[0, 0], 0.05)
+        self.assertGreater(spectrum[1, 0], 0.5)
+        # Hamiltonian flow: exponents come in +/- pairs and sum to (nearly) zero
+        np.testing.assert_allclose(spectrum.sum(axis=1), 0, atol=0.05)
+
+        pendulum = DoublePendulum(1.0, 1.0, 1.0, 1.0, 2.0, 2.0, 0.0, 0.0)
+        single = pendulum_lyapunov_spectrum(pendulum, 0.01, 2000)
+        np.testing.assert_allclose(single, spectrum[1], rtol=1e-8)
+        ensemble = PendulumEnsemble.from_pendulums([pendulum])
+        self.assertAlmostEqual(largest_lyapunov_exponent(ensemble, 0.01, 2000)[0], spectrum[1, 0], delta=1e-8)
+
+class TestFastRHS(unittest.TestCase):
+
+    def setUp(self):
+        self.pendulum = DoublePendulum(1.3, 0.7, 1.1, 0.8, 0.9, -2.1, 0.4, -1.3, 9.7)
+        self.state = self.pendulum.compute_state()
+
+    def test_math_backend_matches(self):
+        """Test the math backend against equations_of_motion."""
+        rhs = fast_rhs.make_fast_rhs(self.pendulum, backend='math')
+        np.testing.assert_allclose(rhs(0, self.state), self.pendulum.equations_of_motion(0, self.state), rtol=1e-13)
+
+    @unittest.skipIf(fast_rhs.numba is None, "Numba is not installed.")
+    def test_numba_backend_matches(self):
+        """Test the Numba backend against equations_of_motion."""
+        rhs = fast_rhs.make_fast_rhs(self.pendulum, backend='numba')
+        np.testing.assert_allclose(rhs(0, self.state), self.pendulum.equations_of_motion(0, self.state), rtol=1e-13)
+
+    def test_backend_selection(self):
+        """Test the automatic fallback and the benchmark output."""
+        rhs = fast_rhs.make_fast_rhs(self.pendulum)
+        self.assertEqual(len(rhs(0, self.state)), 4)
+        with self.assertRaises(ValueError):
+            fast_rhs.make_fast_rhs(self.pendulum, backend='unknown')
+        results = fast_rhs.benchmark_rhs(self.pendulum, n_evals=100, repeats=1)
+        self.assertIn('equations_of_motion', results)
+        self.assertIn('math', results)
+
+class TestParameterSweep(unittest.TestCase):
+
+    def setUp(self):
+        self.sweep = ParameterSweep(np.linspace(-1, 1, 5), np.linspace(-1, 1, 4), mass_ratios=[0.5, 2.0],
+                                    dt=0.01, n_steps=20)
+        self.directory = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.directory.name, 'sweep.npy')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_parallel_run_is_ordered(self):
+        """Test that a multi-process run stores every grid point in grid order."""
+        results = self.sweep.run(self.output, chunk_size=7, workers=2)
+        np.testing.assert_array_equal(results, self.sweep.run_chunk(0, len(self.sweep)))
+        angles1, angles2, mass_ratios, _ = self.sweep.parameters(0, len(self.sweep))
+        self.assertEqual((angles1[1], angles2[1], mass_ratios[1]), (-1.0, -1.0, 2.0))
+
+    def test_resume_skips_finished_chunks(self):
+        """Test that a rerun only computes chunks missing from the progress file."""
+        expected = np.array(self.sweep.run(self.output, chunk_size=7, workers=1))
+        with open(self.output + '.progress') as progress:
+            lines = progress.read().splitlines()
+        with open(self.output + '.progress', 'w') as progress:
+            progress.write('\n'.join(lines[:-1]) + '\n')  # Pretend the last chunk never finished
+        results = np.lib.format.open_memmap(self.output, mode='r+')
+        results[:] = 0.0
+        results.flush()
+        del results
+
+        resumed = self.sweep.run(self.output, chunk_size=7, workers=1)
+        last = int(lines[-1]) * 7
+        np.testing.assert_array_equal(resumed[last:last + 7], expected[last:last + 7])
+        self.assertTrue(np.all(resumed[:last] == 0.0))
+
+        other = ParameterSweep([0.0], [0.0])
+        with self.assertRaises(ValueError):
+            other.run(self.output)
+
+class TestHeadlessRendering(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.states = np.column_stack([np.linspace(0, 2, 120), np.linspace(0, -2, 120), np.zeros(120), np.zeros(120)])
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_png_frames_in_parallel(self):
+        """Test that chunks rendered by several workers produce one ordered frame sequence."""
+        output = os.path.join(self.directory.name, 'frames')
+        files = render.render_trajectory(self.states, output, dt=0.01, fps=50, workers=2, chunk_frames=25,
+                                         size=(2, 2), dpi=50)
+        self.assertEqual(len(files), 60)
+        self.assertEqual(sorted(os.listdir(output)), [os.path.basename(path) for path in files])
+
+    def test_gif_from_store(self):
+        """Test GIF export of a stored trajectory."""
+        from PIL import Image
+        path = os.path.join(self.directory.name, 'run.traj')
+        save_trajectory(path, self.states, dt=0.01, parameters={'length1': 1.0, 'length2': 0.5})
+        output = os.path.join(self.directory.name, 'run.gif')
+        render.render_store(TrajectoryStore(path), output, fps=20, workers=1, chunk_frames=7, size=(2, 2), dpi=50)
+        with Image.open(output) as gif:
+            self.assertEqual(gif.n_frames, 24)
+        with self.assertRaises(ValueError):
+            render.render_trajectory(self.states, os.path.join(self.directory.name, 'run.avi'))
+
+    def test_gif_streams_frames(self):
+        """Test that GIF stitching keeps the frames and never holds more than a few files open."""
+        from PIL import Image
+        resource = __import__('resource')
+        rng = np.random.default_rng(0)
+        palette = rng.integers(0, 256, 768, dtype=np.uint8).tobytes()
+        paths = []
+        for i in range(200):
+            frame = Image.fromarray(rng.integers(0, 256, (8, 8), dtype=np.uint8), 'P')
+            frame.putpalette(palette)
+            paths.append(os.path.join(self.directory.name, f"frame_{i:04d}.png"))
+            frame.save(paths[-1])
+        output = os.path.join(self.directory.name, 'stream.gif')
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(64, hard), hard))
+        try:
+            render._stitch_gif(paths, output, fps=25)
+        finally:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+        with Image.open(output) as gif:
+            self.assertEqual(gif.n_frames, 200)
+            self.assertEqual(gif.info['duration'], 40)
+            for index in (0, 123):
+                gif.seek(index)
+                with Image.open(paths[index]) as frame:
+                    np.testing.assert_array_equal(np.asarray(gif.convert('RGB')), np.asarray(frame.convert('RGB')))
+
+class TestChaosMap(unittest.TestCase):
+
+    def test_flip_times_match_single_runs(self):
+        """Test masked ensemble flip times against individual integrations."""
+        angle1 = np.array([0.3, 2.8, 3.0])
+        angle2 = np.array([0.2, 2.9, -2.5])
+        flip_time, final_state = flip_times(angle1, angle2, t_max=3.0, dt=0.01)
+        self.assertTrue(np.isnan(flip_time[0]))  # Small swings never flip
+        methods = NumericalMethods(dt=0.01)
+        for i in range(3):
+            pendulum = DoublePendulum(1.0, 1.0, 1.0, 1.0, angle1[i], angle2[i], 0.0, 0.0)
+            trajectory = methods.integrate(pendulum.equations_of_motion, pendulum.compute_state(), (0, 3.0), 300)
+            flipped = np.nonzero(np.any(np.abs(trajectory[:, :2]) > np.pi, axis=1))[0]
+            if len(flipped):
+                self.assertAlmostEqual(flip_time[i], flipped[0] * 0.01)
+                np.testing.assert_allclose(final_state[i], trajectory[flipped[0]], atol=1e-12)
+            else:
+                np.testing.assert_allclose(final_state[i], trajectory[-1], atol=1e-12)
+
+    def test_tiles_and_cache(self):
+        """Test that tiled, cached and memory-mapped maps agree with a single tile."""
+        with tempfile.TemporaryDirectory() as directory:
+            whole = ChaosMap(resolution=12, t_max=1.0, tile_size=12).compute()
+            tiled = ChaosMap(resolution=12, t_max=1.0, tile_size=5, cache_dir=os.path.join(directory, 'cache'))
+            flip_time, final_state = tiled.compute(output_dir=os.path.join(directory, 'map'))
+            np.testing.assert_array_equal(flip_time, whole[0])
+            np.testing.assert_array_equal(final_state, whole[1])
+            self.assertEqual(len(os.listdir(os.path.join(directory, 'cache'))), 9)
+            cached = tiled.compute(workers=2)
+            np.testing.assert_array_equal(cached[0], whole[0])
+
 class MockLogger:
     def __init__(self):
         self.data = []
@@ -143,7 +1169,39 @@ class TestVisualization(unittest.TestCase):
             vis.plot_angles_and_velocities(10, self.dt, [0.1]*1000, [0.2]*1000, [0.3]*1000,[0.4]*1000)
         except Exception as e:
             self.fail(f"ERROR: Static plotting raised an exception: {e}.")
+
+    def test_plot_static_planned_step(self):
+        """Test that one time is drawn per sample for step counts where arange(0, t_max, dt) rounds badly."""
+        vis = Visualization(self.logger, self.pendulum, self.dt)
+        for n_steps in (122, 211, 244, 245, 422):
+            dt = 10.0 / n_steps
+            vis.plot_angles_and_velocities(n_steps * dt, dt, [0.1] * n_steps, [0.2] * n_steps, [0.3] * n_steps,
+                                           [0.4] * n_steps)
     
+    def test_plot_from_store(self):
+        """Test plotting directly from a trajectory file."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'run.traj')
+            save_trajectory(path, np.zeros((50, 4)), dt=self.dt)
+            vis = Visualization(self.logger, self.pendulum, self.dt)
+            vis.plot_angles_and_velocities(store=TrajectoryStore(path), every=2)
+            vis.plot_phase_space(store=TrajectoryStore(path))
+
+    def test_precomputed_animation(self):
+        """Test that replaying a trajectory uses precomputed positions and skips frames."""
+        states = np.column_stack([np.linspace(0, 1, 300), np.linspace(1, 0, 300), np.zeros(300), np.zeros(300)])
+        positions = compute_positions(states, self.length1, self.length2)
+        self.pendulum.initial_conditions(self.mass1, self.mass2, self.length1, self.length2, *states[7])
+        np.testing.assert_allclose(positions[7], self.pendulum.get_positions())
+
+        vis = Visualization(self.logger, self.pendulum, self.dt)
+        frames = vis.set_trajectory(states, target_fps=25)
+        self.assertEqual(vis.frame_step, 4)
+        self.assertEqual(len(frames), 75)
+        line1, line2 = vis.update_precomputed(frames[-1])
+        np.testing.assert_allclose(line2.get_xdata(), positions[frames[-1]][[0, 2]])
+        vis.animate(trajectory=states, target_fps=25)
+
     def test_create_animation(self):
         """Test animation functionality."""
         try:
@@ -0,0 +1,154 @@
+"""
+File name: trajectory_store.py
+Author: Troy Chin (CWID: 885586685)
+Date: 2026-10-18
+Version: 1.0
+Status: Ready to deliver to customers
+Description: This script stores trajectories in a binary file that is read back through a memory map.
+"""
+
+import json
+import numpy as np
+
+# File layout: MAGIC, a JSON header padded with spaces to HEADER_SIZE bytes, then the
+# contiguous (n_samples, width) state block in the dtype named by the header. Ensemble runs
+# store the (members, 4) states of every sample as one row of width members * 4.
+MAGIC = b'PENDTRAJ'
+HEADER_SIZE = 4096
+
+def pendulum_parameters(pendulum):
+    """Get the physical parameters of a DoublePendulum as a plain dictionary."""
+    return {
+        'mass1': float(pendulum.mass1),
+        'mass2': float(pendulum.mass2),
+        'length1': float(pendulum.length1),
+        'length2': float(pendulum.length2),
+        'g': float(pendulum.g),
+    }
+
+def _write_header(file, header):
+    """Write the magic string and the padded JSON header at the start of the file."""
+    encoded = json.dumps(header).encode('utf-8')
+    if len(MAGIC) + len(encoded) > HEADER_SIZE:
+        raise ValueError("Trajectory header is too large. Store fewer or shorter parameters.")
+    file.seek(0)
+    file.write(MAGIC + encoded.ljust(HEADER_SIZE - len(MAGIC)))
+
+def read_header(path):
+    """Read the JSON header of a trajectory file."""
+    with open(path, 'rb') as file:
+        block = file.read(HEADER_SIZE)
+    if not block.startswith(MAGIC):
+        raise ValueError(f"{path} is not a trajectory file.")
+    return json.loads(block[len(MAGIC):].decode('utf-8'))
+
+class TrajectoryWriter:
+
+    def __init__(self, path, dt, width=4, t0=0.0, method=None, parameters=None, dtype=np.float64, members=1):
+        """
+        Open a trajectory file for appending states sampled every dt starting at t0. Each sample
+        holds the width-wide states of members ensemble members; dtype=np.float32 halves the file.
+        """
+        self.path = path
+        self.dtype = np.dtype(dtype).newbyteorder('<')
+        self.header = {
+            'version': 1,
+            'dtype': self.dtype.str,
+            'width': int(width) * int(members),
+            'members': int(members),
+            'n_samples': 0,
+            'dt': float(dt),
+            't0': float(t0),
+            'method': method,
+            'parameters': parameters or {},
+        }
+        self.file = open(path, 'wb')
+        _write_header(self.file, self.header)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def append(self, states):
+        """Append a block of states (or a single state) to the end of the file."""
+        states = np.ascontiguousarray(states, dtype=self.dtype).reshape(-1, self.header['width'])
+        states.tofile(self.file)
+        self.header['n_samples'] += len(states)
+
+    def close(self):
+        """Record the final sample count in the header and close the file."""
+        if self.file.closed:
+            return
+        _write_header(self.file, self.header)
+        self.file.close()
+
+def save_trajectory(path, states, dt, t0=0.0, method=None, parameters=None, dtype=np.float64):
+    """Write a whole (n_samples, width) trajectory to path in one call."""
+    states = np.asarray(states)
+    with TrajectoryWriter(path, dt, states.shape[1], t0, method, parameters, dtype) as writer:
+        writer.append(states)
+
+def save_ensemble_trajectory(path, trajectory, dt, t0=0.0, method=None, parameters=None, dtype=None):
+    """Write an (n_samples, members, 4) ensemble trajectory, in its own dtype unless one is given."""
+    trajectory = np.asarray(trajectory)
+    n_samples, members, width = trajectory.shape
+    with TrajectoryWriter(path, dt, width, t0, method, parameters, dtype or trajectory.dtype, members) as writer:
+        writer.append(trajectory.reshape(n_samples, members * width))
+
+def save_logger(path, logger, dt, t0=0.0, method=None, parameters=None, dtype=np.float64):
+    """Copy the states of a StreamingDataLogger to a trajectory file chunk by chunk."""
+    dt = dt * logger.decimation
+    width = 4 if logger.buffer is None else logger.buffer.shape[1]
+    with TrajectoryWriter(path, dt, width, t0, method, parameters, dtype) as writer:
+        for chunk in logger.iter_chunks():
+            writer.append(chunk)
+
+class TrajectoryStore:
+
+    def __init__(self, path, mode='r'):
+        """Open a trajectory file; states are memory-mapped, so nothing is read until it is indexed."""
+        self.path = path
+        self.header = read_header(path)
+        self.dt = self.header['dt']
+        self.t0 = self.header['t0']
+        self.method = self.header['method']
+        self.parameters = self.header['parameters']
+        self.members = self.header.get('members', 1)
+        shape = (self.header['n_samples'], self.header['width'])
+        dtype = np.dtype(self.header['dtype'])
+        if shape[0] == 0:
+            self.states = np.empty(shape, dtype=dtype)
+        else:
+            self.states = np.memmap(path, dtype=dtype, mode=mode, offset=HEADER_SIZE, shape=shape)
+
+    def __len__(self):
+        return self.states.shape[0]
+
+    def times(self, start=0, stop=None, step=1):
+        """Get the sample times for the index range start:stop:step."""
+        return self.t0 + self.dt * np.arange(*slice(start, stop, step).indices(len(self)))
+
+    def index(self, t):
+        """Get the index of the first sample at or after time t."""
+        return int(min(max(np.ceil((t - self.t0) / self.dt - 1e-9), 0), len(self)))
+
+    def window(self, t_start, t_end, step=1):
+        """Get (times, states) for samples with t_start <= t <= t_end, keeping every step-th sample."""
+        start = self.index(t_start)
+        stop = int(np.floor((t_end - self.t0) / self.dt + 1e-9)) + 1
+        stop = min(max(stop, start), len(self))
+        return self.times(start, stop, step), self.states[start:stop:step]
+
+    def every(self, n):
+        """Get (times, states) keeping every n-th sample of the whole run."""
+        return self.times(0, None, n), self.states[::n]
+
+    def ensemble_states(self):
+        """Get the states as an (n_samples, members, width) view of the memory map."""
+        return self.states.reshape(len(self), self.members, -1)
+
+    def column(self, index, step=1):
+        """Get one state column (0: angle 1, 1: angle 2, 2: velocity 1, 3: velocity 2)."""
+        return self.states[::step, index]
@@ -8,16 +8,32 @@ Description: This script contains the graphical attributes and optimization attr
 """
 
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
+
+# matplotlib is imported inside the plotting methods, so importing this module (e.g. for
+# compute_positions in a worker process) does not load pyplot or probe for a GUI backend
+
+def compute_positions(states, length1, length2):
+    """Compute the (T, 4) bob positions x1, y1, x2, y2 for a whole (T, 4) trajectory at once."""
+    states = np.asarray(states)
+    angle1, angle2 = states[:, 0], states[:, 1]
+    positions = np.empty((len(states), 4))
+    positions[:, 0] = length1 * np.sin(angle1)
+    positions[:, 1] = -length1 * np.cos(angle1)
+    positions[:, 2] = positions[:, 0] + length2 * np.sin(angle2)
+    positions[:, 3] = positions[:, 1] - length2 * np.cos(angle2)
+    return positions
 
 class Visualization:
     
-    def __init__(self, logger, pendulum, dt):
+    def __init__(self, logger, pendulum, dt, debug=False):
         """Initialize graphical attributes of the visualization system."""
         self.logger = logger
         self.pendulum = pendulum
         self.dt = dt  # Store dt for use in update_plot
+        self.debug = debug  # Print bob positions on every frame
+        self.positions = None  # Precomputed bob positions, see set_trajectory
+        self.frame_step = 1
+        import matplotlib.pyplot as plt
         self.fig, self.ax = plt.subplots()  # Create a figure and axis for the animation
         self.line1, = self.ax.plot([], [], 'o-', lw=2, color='blue')  # Line for the first pendulum
         self.line2, = self.ax.plot([], [], 'o-', lw=2, color='red')   # Line for the second pendulum
@@ -47,7 +63,7 @@ class Visualization:
         # Ensure the lengths are valid
         if length1 <= 0 or length2 <= 0:
             print("Pendulum lengths must be greater than zero.")
-            return
+            return self.line1, self.line2
     
         x1 = length1 * np.sin(angle1)
         y1 = -length1 * np.cos(angle1)
@@ -59,20 +75,55 @@ class Visualization:
         self.line2.set_data([x1, x2], [y1, y2])
     
         # Print the positions for debugging
-        print(f"Frame: {frame} | Pendulum 1 Position: x1={x1}, y1={y1}")
-        print(f"Frame: {frame} | Pendulum 2 Position: x2={x2}, y2={y2}")
+        if self.debug:
+            print(f"Frame: {frame} | Pendulum 1 Position: x1={x1}, y1={y1}")
+            print(f"Frame: {frame} | Pendulum 2 Position: x2={x2}, y2={y2}")
     
         return self.line1, self.line2
+
+    def set_trajectory(self, states, target_fps=None):
+        """
+        Precompute bob positions for a simulated (T, 4) trajectory so frames only update line data.
+        With target_fps, frames are skipped so that playback runs in real time at that rate.
+        """
+        self.positions = compute_positions(states, self.pendulum.length1, self.pendulum.length2)
+        if target_fps:
+            self.frame_step = max(1, int(round(1 / (self.dt * target_fps))))
+        else:
+            self.frame_step = 1
+        return range(0, len(self.positions), self.frame_step)
+
+    def update_precomputed(self, frame):
+        """Update the lines from the precomputed positions of sample index frame."""
+        x1, y1, x2, y2 = self.positions[frame]
+        self.line1.set_data([0, x1], [0, y1])
+        self.line2.set_data([x1, x2], [y1, y2])
+
+        if self.debug:
+            print(f"Frame: {frame} | Pendulum 1 Position: x1={x1}, y1={y1}")
+            print(f"Frame: {frame} | Pendulum 2 Position: x2={x2}, y2={y2}")
+
         return self.line1, self.line2
 
-    def animate(self, frames):
-        """Begin animation for the pendulum system."""
+    def animate(self, frames=None, trajectory=None, target_fps=None):
+        """
+        Begin animation for the pendulum system. Given a precomputed trajectory the
+        animation replays it instead of stepping the pendulum on every frame.
+        """
+        import matplotlib.pyplot as plt
+        from matplotlib.animation import FuncAnimation
+
         # Initialize the plot before starting the animation
         self.init_plot()
     
         # Create the animation
-        ani = FuncAnimation(self.fig, self.update_plot, frames=frames,
-                            blit=True, interval=self.dt * 1000)
+        if trajectory is not None:
+            sample_frames = self.set_trajectory(trajectory, target_fps)
+            ani = FuncAnimation(self.fig, self.update_precomputed, frames=sample_frames,
+                                blit=True, interval=self.dt * self.frame_step * 1000)
+        else:
+            ani = FuncAnimation(self.fig, self.update_plot, frames=frames,
+                                blit=True, interval=self.dt * 1000)
     
         # Set titles and labels
         self.ax.set_title("Pendulum Movement", fontsize=14)
@@ -82,14 +133,27 @@ class Visualization:
         # Show the plot
         plt.show()
             
-    def plot_angles_and_velocities(self, t_max, dt, angles1, angles2, velocities1, velocities2):
-        """Plot angles and velocities of the pendulum system."""
+    def plot_angles_and_velocities(self, t_max=None, dt=None, angles1=None, angles2=None,
+                                   velocities1=None, velocities2=None, store=None, every=1, times=None):
+        """
+        Plot angles and velocities of the pendulum system, from lists or from a TrajectoryStore.
+        Without explicit times, sample i is drawn at i * dt, so there is one time per sample.
+        """
+        if store is not None:
+            # Read every n-th sample straight from the memory-mapped store
+            times, states = store.every(every)
+            angles1, angles2, velocities1, velocities2 = states.T
+        elif times is None:
+            # np.arange(0, t_max, dt) can gain or lose a sample to rounding
+            times = np.arange(len(angles1)) * dt
+
+        import matplotlib.pyplot as plt
         plt.figure(figsize=(12, 8))  # Adjusted size
 
         # Plot angles
         plt.subplot(2, 1, 1)
-        plt.plot(np.arange(0, t_max, dt), angles1, label='Angle 1 (rad)')
-        plt.plot(np.arange(0, t_max, dt), angles2, label='Angle 2 (rad)')
+        plt.plot(times, angles1, label='Angle 1 (rad)')
+        plt.plot(times, angles2, label='Angle 2 (rad)')
         plt.title('Double Pendulum Angles Over Time')
         plt.xlabel('Time (s)')
         plt.ylabel('Angle (rad)')
@@ -97,22 +161,27 @@ class Visualization:
 
         # Plot velocities
         plt.subplot(2, 1, 2)
-        plt.plot(np.arange(0, t_max, dt), velocities1, label='Angular Velocity 1')
-        plt.plot(np.arange(0, t_max, dt), velocities2, label='Angular Velocity 2')
+        plt.plot(times, velocities1, label='Angular Velocity 1')
+        plt.plot(times, velocities2, label='Angular Velocity 2')
         plt.xlabel('Time (s)')
         plt.ylabel('Angular Velocity (rad/s)')
         plt.legend()
         
-    def plot_phase_space(self):
+    def plot_phase_space(self, store=None, every=1):
         """
         Plots the phase space of the double pendulum, showing the relationship
-        between angles and angular velocities.
+        between angles and angular velocities. The states come from the logger,
+        or from a TrajectoryStore when one is given.
         """
-        angles1 = [state[0] for state in self.logger.data]
-        angles2 = [state[1] for state in self.logger.data]
-        velocities1 = [state[2] for state in self.logger.data]
-        velocities2 = [state[3] for state in self.logger.data]
+        if store is not None:
+            angles1, angles2, velocities1, velocities2 = store.every(every)[1].T
+        else:
+            angles1 = [state[0] for state in self.logger.data]
+            angles2 = [state[1] for state in self.logger.data]
+            velocities1 = [state[2] for state in self.logger.data]
+            velocities2 = [state[3] for state in self.logger.data]
         
+        import matplotlib.pyplot as plt
         plt.figure(figsize=(12, 6))
     
         # Plot phase space for first pendulum